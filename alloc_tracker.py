@@ -0,0 +1,145 @@
+""" Opt-in per-frame allocation and GC tracking, attributed to phases of the frame loop. """
+import gc
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class PhaseStats:
+    """ Allocation and garbage collection totals for one phase of the frame loop. """
+    entries: int = 0
+    bytes: int = 0  # Sum over entries of the traced-memory peak growth
+    max_bytes: int = 0
+    blocks: int = 0  # Sum over entries of the net change in allocated blocks
+    max_blocks: int = 0
+    gc_pauses: int = 0
+    gc_seconds: float = 0.0
+
+
+class AllocationTracker:
+    """
+    Purpose: Measures memory allocated in each phase of the frame loop with tracemalloc (peak
+             growth in bytes) and sys.getallocatedblocks (net allocated blocks), and times
+             garbage collections through gc.callbacks, charging each to the phase it ran in.
+             Tracing slows the game down, so it is only enabled on request.
+    Examples:
+        tracker = AllocationTracker()
+        tracker.start()
+        with tracker.phase("simulation"):
+            sim.step(None, 1 / 60)
+        tracker.end_frame()
+        tracker.per_frame("simulation")  # -> (bytes, blocks) per frame
+        tracker.stop()
+    """
+    def __init__(self, trace_depth: int = 1):
+        self.trace_depth = trace_depth
+        self.phases: Dict[str, PhaseStats] = {}
+        self.frames = 0
+        self.current = "outside"  # Phase that GC pauses are charged to
+        self.gc_started = 0.0
+        self.running = False
+
+    def start(self) -> None:
+        if self.running:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_depth)
+        gc.callbacks.append(self.on_gc)
+        self.running = True
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        gc.callbacks.remove(self.on_gc)
+        tracemalloc.stop()
+        self.running = False
+
+    def stats(self, name: str) -> PhaseStats:
+        if name not in self.phases:
+            self.phases[name] = PhaseStats()
+        return self.phases[name]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Purpose: Attributes the allocations and GC pauses inside the block to phase `name`.
+                 Does nothing (beyond the call) when the tracker is not running.
+        Examples:
+            with tracker.phase("draw"):
+                draw_board(...)
+        """
+        if not self.running:
+            yield
+            return
+        stats = self.stats(name)
+        previous, self.current = self.current, name
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        start_blocks = sys.getallocatedblocks()
+        try:
+            yield
+        finally:
+            blocks = sys.getallocatedblocks() - start_blocks
+            allocated = tracemalloc.get_traced_memory()[1] - start_bytes
+            self.current = previous
+            stats.entries += 1
+            stats.bytes += allocated
+            stats.max_bytes = max(stats.max_bytes, allocated)
+            stats.blocks += blocks
+            stats.max_blocks = max(stats.max_blocks, blocks)
+
+    def end_frame(self) -> None:
+        self.frames += 1
+
+    def on_gc(self, event: str, info: Dict[str, int]) -> None:
+        if event == "start":
+            self.gc_started = time.perf_counter()
+        else:
+            stats = self.stats(self.current)
+            stats.gc_pauses += 1
+            stats.gc_seconds += time.perf_counter() - self.gc_started
+
+    def per_frame(self, name: str) -> Tuple[float, float]:
+        """
+        Purpose: Returns the mean (bytes, net blocks) a phase allocated per frame.
+        Examples:
+            tracker.per_frame("simulation") -> (412.3, 0.8)
+        """
+        stats = self.phases.get(name)
+        if stats is None or not self.frames:
+            return 0.0, 0.0
+        return stats.bytes / self.frames, stats.blocks / self.frames
+
+    def over_budget(self, budgets: Dict[str, Tuple[Optional[float], Optional[float]]]) -> List[str]:
+        """
+        Purpose: Checks per-frame means against budgets of (max bytes, max net blocks) per phase
+                 (None means unlimited) and returns a description of every budget exceeded.
+        Examples:
+            tracker.over_budget({"simulation": (1024, 4)}) -> []
+        """
+        problems = []
+        for name, (max_bytes, max_blocks) in budgets.items():
+            per_frame_bytes, per_frame_blocks = self.per_frame(name)
+            if max_bytes is not None and per_frame_bytes > max_bytes:
+                problems.append(f"{name}: {per_frame_bytes:.0f} bytes/frame > {max_bytes} budget")
+            if max_blocks is not None and per_frame_blocks > max_blocks:
+                problems.append(f"{name}: {per_frame_blocks:.1f} blocks/frame > {max_blocks} budget")
+        return problems
+
+    def report(self) -> str:
+        """
+        Purpose: Formats a table of per-frame allocation and GC cost by phase.
+        Examples:
+            print(tracker.report())
+        """
+        lines = [f"{self.frames} frames",
+                 f"{'phase':<12} {'bytes/frame':>12} {'max bytes':>10} {'blocks/frame':>13} {'gc pauses':>10} {'gc ms':>8}"]
+        for name, stats in self.phases.items():
+            per_frame_bytes, per_frame_blocks = self.per_frame(name)
+            lines.append(f"{name:<12} {per_frame_bytes:>12.0f} {stats.max_bytes:>10} {per_frame_blocks:>13.2f} "
+                         f"{stats.gc_pauses:>10} {stats.gc_seconds * 1000:>8.2f}")
+        return "\n".join(lines)
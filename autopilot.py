@@ -0,0 +1,326 @@
+""" Monte Carlo Tree Search autopilot that plays Pacman without keyboard input. """
+import math
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from board import build_move_table
+from entity_store import FIXED_SHIFT
+from game import GameState
+from ghost import GhostStrategy, PalletHoveringGhostStrategy, RandomGhostStrategy
+from simulation import BOOST_FRAMES, GHOST_SPEED, Simulation
+
+# Tile offsets of Pacman's direction commands: right, left, up, down
+DIRECTION_OFFSETS = ((1, 0), (-1, 0), (0, -1), (0, 1))
+
+
+class TileState(NamedTuple):
+    """
+    An immutable tile-level snapshot for planning. Cloning is free: every step builds a new
+    tuple, and pellets are bitmasks rather than a copy of the maze.
+    """
+    pacman: Tuple[int, int]
+    ghosts: Tuple[Tuple[int, int], ...]
+    dots: int  # Bitmask of remaining '.' cells
+    power: int  # Bitmask of remaining 'o' cells
+    boost: int  # Pacman moves of boost left
+    eaten: int  # Bitmask of ghosts eaten during the current boost
+    tick: int  # Pacman moves since the root, for the ghosts' slower cadence
+    over: bool
+
+
+class TileModel:
+    """
+    Purpose: A forward model of the game at tile resolution. Pacman moves one tile per step;
+             the ghosts move every `ghost_period` steps using the game's own ghost strategies,
+             which makes them the rollout model for the opponents. Their private copies draw
+             their random choices from `rng`, so rollouts do not depend on the random module.
+    Examples:
+        model = TileModel(sim)
+        state = model.root_state(sim)
+        state, reward = model.step(state, 1)  # Pacman moves one tile left
+    """
+    def __init__(self, sim: Simulation, fps: float = 60.0, death_penalty: float = 50.0, win_bonus: float = 50.0,
+                 rng: Optional[random.Random] = None):
+        maze = sim.maze
+        self.death_penalty = death_penalty
+        self.win_bonus = win_bonus
+        self.ghost_ids = [ghost.id for ghost in sim.ghosts]
+        self.spawns = tuple(sim.state.ghost_positions[ghost.id] for ghost in sim.ghosts)
+        rng = rng if rng is not None else random.Random()
+        self.strategies: Dict[str, GhostStrategy] = {  # Private copies for rollouts
+            g_id: type(strategy)(rng=rng) if isinstance(strategy, (RandomGhostStrategy, PalletHoveringGhostStrategy))
+            else type(strategy)()
+            for g_id, strategy in sim.strategies.items()
+        }
+        self.scratch = GameState((0, 0), {}, maze)  # Reused as the strategies' view of a state
+
+        # Pacman may not enter doors, so its moves come from the table minus 'D' cells
+        table = sim.move_table if sim.move_table is not None else build_move_table(maze)
+        self.pacman_moves: Dict[Tuple[int, int], List[Tuple[int, Tuple[int, int]]]] = {}
+        for (x, y), moves in table.items():
+            options = []
+            for action, (dx, dy) in enumerate(DIRECTION_OFFSETS):
+                target = (x + dx, y + dy)
+                if target in moves and maze[target[1]][target[0]] != 'D':
+                    options.append((action, target))
+            self.pacman_moves[(x, y)] = options
+
+        self.pellet_bits: Dict[Tuple[int, int], int] = {}
+        for y, row in enumerate(maze):
+            for x, cell in enumerate(row):
+                if cell in '.o':
+                    self.pellet_bits[(x, y)] = 1 << len(self.pellet_bits)
+
+        frames_per_tile = sim.unit_width / sim.pacman.speed
+        self.ghost_period = max(1, round(fps / GHOST_SPEED / frames_per_tile))
+        self.boost_steps = max(1, round(BOOST_FRAMES / frames_per_tile))
+
+    def root_state(self, sim: Simulation) -> TileState:
+        """
+        Purpose: Snapshots a running simulation. Ghosts are placed on the tile they are heading
+                 to; ghosts already eaten this boost are marked harmless.
+        Examples:
+            model.root_state(sim).pacman -> (9, 11)
+        """
+        pacman = sim.pacman
+        dots = power = 0
+        for (x, y), bit in self.pellet_bits.items():
+            cell = sim.maze[y][x]
+            if cell == '.':
+                dots |= bit
+            elif cell == 'o':
+                power |= bit
+        boost = 0
+        if pacman.boosted:
+            boost = max(1, round(self.boost_steps * (1 - pacman.boost_timer / BOOST_FRAMES)))
+        eaten = 0
+        for i, ghost in enumerate(sim.ghosts):
+            if ghost.dead or (boost and sim.eaten_ghosts[ghost.id]):
+                eaten |= 1 << i
+        return TileState(
+            pacman=(round(pacman.x / sim.unit_width), round(pacman.y / sim.unit_height)),
+            ghosts=tuple(ghost.target_tile for ghost in sim.ghosts),
+            dots=dots, power=power, boost=boost, eaten=eaten, tick=0, over=False
+        )
+
+    def actions(self, state: TileState) -> List[int]:
+        return [action for action, _ in self.pacman_moves.get(state.pacman, [])]
+
+    def step(self, state: TileState, action: int) -> Tuple[TileState, float]:
+        """
+        Purpose: Applies one Pacman move (and the ghosts' move on their cadence) and returns the
+                 next state and the reward: the score gained, minus `death_penalty` for losing
+                 a life, plus `win_bonus` for clearing the maze. Both end the episode.
+        Examples:
+            model.step(state, 0) -> (TileState(...), 1.0)  # Ate a dot to the right
+        """
+        pacman = state.pacman
+        for move, target in self.pacman_moves[pacman]:
+            if move == action:
+                pacman = target
+                break
+        reward = 0.0
+        dots, power, boost, eaten = state.dots, state.power, max(0, state.boost - 1), state.eaten
+        bit = self.pellet_bits.get(pacman, 0)
+        if dots & bit:
+            dots &= ~bit
+            reward += 1
+        elif power & bit:
+            power &= ~bit
+            reward += 2
+            boost, eaten = self.boost_steps, 0
+        if not boost:
+            eaten = 0
+
+        ghosts = state.ghosts
+        tick = state.tick + 1
+        if tick % self.ghost_period == 0:
+            scratch = self.scratch
+            scratch.pacman_pos = pacman
+            positions = scratch.ghost_positions
+            for g_id, position in zip(self.ghost_ids, ghosts):
+                positions[g_id] = position
+            moved = []
+            for i, g_id in enumerate(self.ghost_ids):
+                if eaten & (1 << i):
+                    moved.append(ghosts[i])  # Eaten ghosts wait at their spawn
+                    continue
+                moved.append(self.strategies[g_id].get_next_position(scratch, g_id) or ghosts[i])
+            ghosts = tuple(moved)
+
+        # Hitboxes are a tile wide, so a live ghost on a neighbouring tile already touches Pacman
+        over = False
+        for i, ghost in enumerate(ghosts):
+            if eaten & (1 << i) or abs(ghost[0] - pacman[0]) + abs(ghost[1] - pacman[1]) > (0 if boost else 1):
+                continue
+            if boost:
+                eaten |= 1 << i
+                ghosts = ghosts[:i] + (self.spawns[i],) + ghosts[i + 1:]
+            else:
+                reward -= self.death_penalty
+                over = True
+                break
+        if not over and not dots and not power:
+            reward += self.win_bonus
+            over = True
+        return TileState(pacman, ghosts, dots, power, boost, eaten, tick, over), reward
+
+
+class Node:
+    """ A node of the open-loop search tree: statistics for one sequence of Pacman moves. """
+    __slots__ = ('children', 'visits', 'value')
+
+    def __init__(self) -> None:
+        self.children: Dict[int, 'Node'] = {}
+        self.visits = 0
+        self.value = 0.0
+
+
+class Autopilot:
+    """
+    Purpose: A bot input source for the game loop. Whenever Pacman is exactly on a tile it runs
+             MCTS for `budget` seconds over TileModel and returns the most visited move; between
+             tiles it returns None so Pacman keeps its heading. The subtree of the chosen move
+             is kept as the next root when Pacman arrives where expected. With `max_playouts`,
+             a search also ends after that many playouts. The search and the ghosts' rollouts
+             draw only from random.Random(seed), so a seeded autopilot whose searches end on
+             playouts rather than time makes the same moves every run.
+    Examples:
+        autopilot = Autopilot(budget=0.01)
+        while not sim.over:
+            sim.step(autopilot(sim), 1 / 60)
+        autopilot.playouts_per_second  # Search throughput
+    """
+    def __init__(self, budget: float = 0.01, depth: int = 40, exploration: float = 2.0,
+                 discount: float = 0.97, seed: Optional[int] = None, max_playouts: Optional[int] = None):
+        self.budget = budget
+        self.max_playouts = max_playouts
+        self.depth = depth
+        self.exploration = exploration
+        self.discount = discount
+        self.random = random.Random(seed)
+        self.model: Optional[TileModel] = None
+        self.sim: Optional[Simulation] = None
+        self.root: Optional[Node] = None
+        self.expected_tile: Optional[Tuple[int, int]] = None
+        self.last_tile: Optional[Tuple[int, int]] = None
+        self.last_action: Optional[int] = None
+        self.playouts = 0
+        self.search_seconds = 0.0
+        self.decisions = 0
+        self.reused = 0  # Decisions that started from a kept subtree
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.search_seconds if self.search_seconds else 0.0
+
+    def describe(self) -> str:
+        return (f"{self.decisions} decisions, {self.playouts} playouts in {self.search_seconds:.2f} s "
+                f"({self.playouts_per_second:.0f}/s), {self.reused} reused trees")
+
+    def __call__(self, sim: Simulation) -> Optional[int]:
+        if self.sim is not sim:  # New game or level: rebuild the model and drop the tree
+            self.sim, self.model, self.root, self.expected_tile, self.last_tile = sim, TileModel(sim, rng=random.Random(self.random.getrandbits(64))), None, None, None
+        pacman = sim.pacman
+        unit_x, unit_y = sim.unit_width << FIXED_SHIFT, sim.unit_height << FIXED_SHIFT
+        if sim.entities.fx[pacman.index] % unit_x or sim.entities.fy[pacman.index] % unit_y:
+            return None  # Between tiles; keep going
+        tile = (sim.entities.fx[pacman.index] // unit_x, sim.entities.fy[pacman.index] // unit_y)
+        if tile == self.last_tile:
+            return self.last_action  # Already decided for this tile
+        return self.decide(sim, tile)
+
+    def decide(self, sim: Simulation, tile: Tuple[int, int]) -> Optional[int]:
+        """
+        Purpose: Searches from the current state and returns the chosen direction command.
+        Examples:
+            autopilot.decide(sim, (9, 11)) -> 1
+        """
+        model = self.model
+        assert model is not None, "__call__ builds the model before deciding"
+        state = model.root_state(sim)
+        root = self.root
+        if root is not None and tile == self.expected_tile:
+            self.reused += 1
+        else:
+            root = self.root = Node()
+        start = time.perf_counter()
+        deadline = start + self.budget
+        playouts = 0
+        while True:
+            self.search(state)
+            playouts += 1
+            if time.perf_counter() >= deadline or playouts == self.max_playouts:
+                break
+        self.search_seconds += time.perf_counter() - start
+        self.playouts += playouts
+        self.decisions += 1
+
+        children = root.children
+        if not children:
+            return None
+        action = max(children, key=lambda a: children[a].visits)
+        self.root = children[action]
+        self.expected_tile = dict(model.pacman_moves[tile]).get(action)
+        self.last_tile, self.last_action = tile, action
+        return action
+
+    def search(self, state: TileState) -> None:
+        """
+        Purpose: Runs one iteration: select with UCT down the tree, expand one move, play out
+                 randomly to `depth` and back the discounted return up the path.
+        Examples:
+            autopilot.search(model.root_state(sim))
+        """
+        model, node = self.model, self.root
+        assert model is not None and node is not None, "decide builds the model and root before searching"
+        path = [node]
+        rewards: List[float] = []
+        while not state.over and len(rewards) < self.depth:
+            actions = model.actions(state)
+            if not actions:
+                break
+            untried = [a for a in actions if a not in node.children]
+            if untried:
+                action = self.random.choice(untried)
+                node.children[action] = Node()
+                state, reward = model.step(state, action)
+                node = node.children[action]
+                path.append(node)
+                rewards.append(reward)
+                break
+            log_visits, children = math.log(node.visits), node.children
+            action = max(actions, key=lambda a: self.uct(children[a], log_visits))
+            state, reward = model.step(state, action)
+            node = children[action]
+            path.append(node)
+            rewards.append(reward)
+
+        # Playout: random moves that avoid turning straight back
+        playout_return, scale = 0.0, 1.0
+        previous = state.pacman
+        here = state.pacman
+        for _ in range(self.depth - len(rewards)):
+            if state.over:
+                break
+            moves = model.pacman_moves.get(here, [])
+            if not moves:
+                break
+            forward = [move for move in moves if move[1] != previous] or moves
+            action, _ = self.random.choice(forward)
+            previous = here
+            state, reward = model.step(state, action)
+            here = state.pacman
+            playout_return += scale * reward
+            scale *= self.discount
+
+        # Back up: each node gets the discounted return from its own depth onwards
+        value = playout_return
+        for depth in range(len(rewards), -1, -1):
+            path[depth].visits += 1
+            path[depth].value += value
+            if depth > 0:
+                value = rewards[depth - 1] + self.discount * value
+
+    def uct(self, child: Node, log_visits: float) -> float:
+        return child.value / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
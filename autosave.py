@@ -0,0 +1,134 @@
+""" Periodic autosave: checkpoints are taken on the game loop and written on a background thread. """
+import queue
+import threading
+import time
+from typing import Callable, Optional
+from game import Checkpoint, GameState, write_checkpoint
+
+AUTOSAVE_FILE = "autosave.csv"
+
+
+class Autosaver:
+    """
+    Purpose: Writes checkpoints every `interval` seconds without stalling frames. The game loop
+             only takes the snapshot; serialization and the atomic write (write_checkpoint) run
+             on a worker thread. At most `queue_size` checkpoints wait for the worker: when the
+             disk is slow, the oldest waiting checkpoint is dropped for the newest instead of
+             blocking the loop. Write errors are counted and kept, not raised, so a full disk
+             or an unexpected serialization error never ends the game or the worker.
+    Examples:
+        autosaver = Autosaver("autosave.csv", interval=10)
+        autosaver.maybe_submit(lambda: game.checkpoint(game_state, pacman.lives))  # Every frame
+        autosaver.close()  # Waits for the last checkpoint to be written
+    """
+    def __init__(self, file_path: str = AUTOSAVE_FILE, interval: float = 10.0, queue_size: int = 1,
+                 writer: Callable[[str, Checkpoint], None] = write_checkpoint):
+        self.file_path = file_path
+        self.interval = interval
+        self.writer = writer
+        self.queue: "queue.Queue[Optional[Checkpoint]]" = queue.Queue(maxsize=queue_size)  # None stops the worker
+        self.last_submit = time.monotonic()
+        self.submitted = 0
+        self.saved = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error: Optional[Exception] = None
+        self.write_seconds = 0.0
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+
+    def due(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return now - self.last_submit >= self.interval
+
+    def submit(self, checkpoint: Checkpoint) -> bool:
+        """
+        Purpose: Queues a checkpoint without blocking. Returns False if an older checkpoint
+                 that was still waiting had to be dropped to make room.
+        Examples:
+            autosaver.submit(game.checkpoint(game_state))
+        """
+        if self.closed:
+            raise RuntimeError("The autosaver is closed.")
+        self.submitted += 1
+        self.last_submit = time.monotonic()
+        kept = True
+        while True:
+            try:
+                self.queue.put_nowait(checkpoint)
+                return kept
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()  # Drop the oldest waiting checkpoint
+                    self.dropped += 1
+                    kept = False
+                except queue.Empty:
+                    pass  # The worker took it in the meantime
+
+    def maybe_submit(self, snapshot: Callable[[], Checkpoint], now: Optional[float] = None) -> bool:
+        """
+        Purpose: Takes and queues a checkpoint if `interval` has passed; call it every frame.
+                 The snapshot function only runs when a checkpoint is due. Returns True if
+                 a checkpoint was queued.
+        Examples:
+            autosaver.maybe_submit(lambda: game.checkpoint(game_state, pacman.lives))
+        """
+        if not self.due(now):
+            return False
+        self.submit(snapshot())
+        return True
+
+    def run(self) -> None:
+        """ Worker thread: writes queued checkpoints until close() asks it to stop. """
+        while True:
+            checkpoint = self.queue.get()
+            if checkpoint is None:
+                return
+            start = time.perf_counter()
+            try:
+                self.writer(self.file_path, checkpoint)
+                self.saved += 1
+            except Exception as e:
+                self.errors += 1
+                self.last_error = e
+            self.write_seconds += time.perf_counter() - start
+
+    def close(self, final: Optional[Checkpoint] = None, timeout: Optional[float] = None) -> None:
+        """
+        Purpose: Optionally queues a `final` checkpoint, then waits (up to `timeout` seconds in
+                 all) for the worker to write what is queued and stop. Returns at once if the
+                 worker is no longer running.
+        Examples:
+            autosaver.close(game.checkpoint(game_state, pacman.lives))
+        """
+        if self.closed:
+            return
+        if final is not None:
+            self.submit(final)
+        self.closed = True
+        if not self.thread.is_alive():
+            return  # Nothing would take the stop request off the queue
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self.queue.put(None, timeout=timeout)  # Blocks only until the worker has taken the pending checkpoint
+        except queue.Full:
+            return  # Still writing; the daemon thread is left to finish on its own
+        self.thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+
+
+def apply_checkpoint(game_state: GameState, checkpoint: Checkpoint) -> bool:
+    """
+    Purpose: Puts a recovered checkpoint's maze and positions into a freshly loaded level's
+             game state, before the simulation is built from it. Returns False (and changes
+             nothing) if the checkpoint's maze does not have the level's dimensions.
+    Examples:
+        apply_checkpoint(level.game_state, read_checkpoint("autosave.csv")) -> True
+    """
+    maze = game_state.maze
+    if len(checkpoint.maze) != len(maze) or any(len(saved) != len(row) for saved, row in zip(checkpoint.maze, maze)):
+        return False
+    maze[:] = [list(row) for row in checkpoint.maze]
+    game_state.pacman_pos = checkpoint.pacman_pos
+    game_state.ghost_positions = dict(checkpoint.ghost_positions)
+    return True
@@ -1,5 +1,11 @@
 """ Board functions. """
-from typing import List, Tuple
+import hashlib
+import itertools
+import re
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+NOT_LAYOUT = re.compile(r"[^#D\n]")  # Cells other than walls and doors, blanked out of layout digests
 
 
 def is_valid_position(maze: List[List[str]], pos: Tuple[int, int]) -> bool:
@@ -43,3 +49,82 @@ def get_valid_moves(maze: List[List[str]], current_pos: Tuple[int, int]) -> List
         if is_valid_position(maze, new_pos):
             moves.append(new_pos)
     return moves
+
+
+def build_move_table(maze: List[List[str]]) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+    """
+    Purpose: Precomputes get_valid_moves for every cell of the maze. Eating pellets never
+             changes which cells are walls, so the table stays valid for the whole level.
+    Examples:
+        maze = [
+            ["#", ".", "#"],
+            [".", " ", "."],
+            ["#", "#", "#"]
+        ]
+        build_move_table(maze)[(1, 1)] -> [(1, 0), (2, 1), (0, 1)]
+    """
+    return {(x, y): get_valid_moves(maze, (x, y)) for y in range(len(maze)) for x in range(len(maze[y]))}
+
+
+class VersionedMaze(list):
+    """
+    Purpose: A maze (list of rows) that counts its changes. Every `set_cell` bumps `generation`
+             and appends (generation, x, y, old, new) to a bounded change log; changes that
+             touch walls or doors also bump `layout_generation`, which is all that paths and
+             valid moves depend on. Reads work exactly like the plain list of rows.
+    Examples:
+        maze = VersionedMaze([list("#.o#")])
+        maze.set_cell(1, 0, ' ')
+        maze.generation, maze.layout_generation -> (1, 0)
+        maze.changes_since(0) -> [(1, 1, 0, '.', ' ')]
+        maze.layout_id == VersionedMaze([list("# .#")]).layout_id -> True
+    """
+    ids = itertools.count()
+
+    def __init__(self, rows: Iterable[List[str]] = (), log_capacity: int = 1024):
+        super().__init__(rows)
+        self.uid = next(VersionedMaze.ids)  # Tells mazes apart in shared caches
+        self.generation = 0
+        self.layout_generation = 0
+        self.layout_checked = -1  # layout_generation that cached_layout_id was computed at
+        self.cached_layout_id = -1
+        self.log: Deque[Tuple[int, int, int, str, str]] = deque(maxlen=log_capacity)
+
+    def set_cell(self, x: int, y: int, value: str) -> None:
+        old = self[y][x]
+        if old == value:
+            return
+        self[y][x] = value
+        self.generation += 1
+        if old in '#D' or value in '#D':
+            self.layout_generation += 1
+        self.log.append((self.generation, x, y, old, value))
+
+    @property
+    def layout_id(self) -> int:
+        """
+        Purpose: Numbers the current layout of walls and doors with a 64-bit digest of it. Mazes
+                 with the same layout get the same number, in any process, so games hosted side
+                 by side share their layout-only decisions (valid moves, paths) instead of each
+                 computing and caching its own. Nothing is kept per layout, and the digest is
+                 only recomputed after a wall or door changes.
+        Examples:
+            VersionedMaze([list("#.#")]).layout_id == VersionedMaze([list("# #")]).layout_id -> True
+        """
+        if self.layout_checked != self.layout_generation:
+            layout = NOT_LAYOUT.sub(' ', "\n".join(map("".join, self)))
+            self.cached_layout_id = int.from_bytes(hashlib.blake2b(layout.encode(), digest_size=8).digest(), 'big')
+            self.layout_checked = self.layout_generation
+        return self.cached_layout_id
+
+    def changes_since(self, generation: int) -> Optional[List[Tuple[int, int, int, str, str]]]:
+        """
+        Purpose: Returns the changes made after `generation`, oldest first, or None if some of
+                 them have already dropped out of the log.
+        Examples:
+            maze.changes_since(maze.generation) -> []
+        """
+        count = self.generation - generation
+        if count > len(self.log):
+            return None
+        return list(itertools.islice(self.log, len(self.log) - count, None))
@@ -0,0 +1,132 @@
+""" Multi-level campaigns with the next level prepared on a background thread. """
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from board import build_move_table
+from game import HEIGHT, WIDTH, GameState, load_game_state, render_background
+from simulation import window_unit_size
+
+
+@dataclass
+class PreparedLevel:
+    """ A level that is parsed, validated and ready to play. """
+    index: int
+    path: str
+    game_state: GameState
+    unit_width: int
+    unit_height: int
+    move_table: Dict[Tuple[int, int], List[Tuple[int, int]]]
+    background: Any  # pygame.Surface from render_background, or None when not rendering
+    prepare_seconds: float
+
+
+def validate_level(game_state: GameState) -> None:
+    """
+    Purpose: Checks that a parsed level is playable: Pacman and every ghost start inside the
+             maze on a non-wall cell, and there is at least one pellet to eat.
+             Raises ValueError describing the first problem found.
+    Examples:
+        validate_level(load_game_state("maze.txt"))  # -> None
+    """
+    maze = game_state.maze
+    starts = [("Pacman", game_state.pacman_pos)] + list(game_state.ghost_positions.items())
+    for name, (x, y) in starts:
+        if not (0 <= y < len(maze) and 0 <= x < len(maze[y])) or maze[y][x] == '#':
+            raise ValueError(f"{name} starts at {(x, y)}, which is not an open cell.")
+    if not any('.' in row or 'o' in row for row in maze):
+        raise ValueError("Level has no pellets to eat.")
+
+
+def prepare_level(index: int, path: str, render: bool = True, size: Tuple[int, int] = (WIDTH, HEIGHT)) -> PreparedLevel:
+    """
+    Purpose: Does all the work needed before a level can start: parse (through the compiled
+             maze cache), validate, build the move table and render the static background
+             at the render target's `size`.
+    Examples:
+        prepare_level(0, "maze.txt").unit_width -> 40
+        prepare_level(0, "maze.txt", size=(380, 450)).background.get_size() -> (380, 450)
+    """
+    start = time.perf_counter()
+    game_state = load_game_state(path)
+    validate_level(game_state)
+    unit_width, unit_height = window_unit_size(game_state.maze)
+    move_table = build_move_table(game_state.maze)
+    background = render_background(game_state.maze, size=size) if render else None
+    return PreparedLevel(index, path, game_state, unit_width, unit_height, move_table, background,
+                         time.perf_counter() - start)
+
+
+class Campaign:
+    """
+    Purpose: Plays an ordered list of maze files. While a level is played, the next one is
+             prepared on a single worker thread, so `advance` normally returns immediately.
+    Examples:
+        campaign = Campaign(["maze.txt", "levels/2.txt"])
+        level = campaign.start()     # Level 0; level 1 starts preparing in the background
+        level = campaign.advance()   # Level 1, already prepared
+        campaign.has_next -> False
+        campaign.close()
+    """
+    def __init__(self, level_paths: List[str], render: bool = True, size: Tuple[int, int] = (WIDTH, HEIGHT)):
+        if not level_paths:
+            raise ValueError("A campaign needs at least one level.")
+        self.level_paths = level_paths
+        self.render = render
+        self.size = size  # Backgrounds are rendered at the render target's size
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-loader")
+        self.current: Optional[PreparedLevel] = None
+        self.pending: Optional[Future] = None
+        self.wait_seconds = 0.0  # Time `advance` spent waiting on the worker, ideally zero
+
+    @property
+    def has_next(self) -> bool:
+        index = self.current.index + 1 if self.current is not None else 0
+        return index < len(self.level_paths)
+
+    def preload(self, index: int) -> None:
+        """
+        Purpose: Starts preparing level `index` on the worker thread, if it exists.
+        Examples:
+            campaign.preload(1)
+        """
+        self.pending = None
+        if index < len(self.level_paths):
+            self.pending = self.executor.submit(prepare_level, index, self.level_paths[index], self.render, self.size)
+
+    def start(self, index: int = 0) -> PreparedLevel:
+        """
+        Purpose: Prepares level `index` (the first unless resuming) in the calling thread and
+                 queues the one after it.
+        Examples:
+            level = campaign.start()
+            level = campaign.start(checkpoint.level)  # Resume a saved run
+        """
+        if not 0 <= index < len(self.level_paths):
+            raise ValueError(f"The campaign has no level {index}.")
+        self.current = prepare_level(index, self.level_paths[index], self.render, self.size)
+        self.preload(index + 1)
+        return self.current
+
+    def advance(self) -> PreparedLevel:
+        """
+        Purpose: Switches to the next level and queues the one after it. Errors raised while
+                 preparing the level (e.g. ValueError for a bad maze) are re-raised here.
+        Examples:
+            if sim.won and campaign.has_next:
+                level = campaign.advance()
+        """
+        if not self.has_next:
+            raise IndexError("The campaign has no more levels.")
+        if self.pending is None:
+            self.preload(self.current.index + 1 if self.current is not None else 0)
+        pending = self.pending
+        assert pending is not None, "has_next means preload queued the next level"
+        start = time.perf_counter()
+        self.current = pending.result()
+        self.wait_seconds += time.perf_counter() - start
+        self.preload(self.current.index + 1)
+        return self.current
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -1,13 +1,36 @@
 """ Manages Character class. """
-from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
+from entity_store import EntityStore, TurnsView, fixed_field, store_field
+
 
-@dataclass
 class Character:
-    x: int
-    y: int
-    size: int
-    speed: float
-    counter: int
-    direction: int
-    turns: List[bool]
+    """
+    A character is a thin view onto one slot of an EntityStore. Characters that share a store
+    can be updated together in one batched pass; without a store, each gets a private one.
+    Positions read and write in pixels but are stored as fixed-point integers.
+    """
+    __slots__ = ('store', 'index', 'turns_view')
+
+    x = fixed_field('fx')
+    y = fixed_field('fy')
+    size = store_field('size')
+    speed = store_field('speed')
+    counter = store_field('counter')
+    direction = store_field('direction')
+
+    def __init__(self, x: int, y: int, size: int, speed: float, counter: int, direction: int,
+                 turns: List[bool], store: Optional[EntityStore] = None):
+        self.store = store if store is not None else EntityStore()
+        self.index = self.store.add(x, y, size, speed, counter, direction, turns)
+        self.turns_view = TurnsView(self.store, self.index)
+
+    @property
+    def turns(self) -> TurnsView:
+        return self.turns_view
+
+    @turns.setter
+    def turns(self, flags: List[bool]) -> None:
+        self.turns_view.assign(flags)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(index={self.index}, x={self.x}, y={self.y}, direction={self.direction})"
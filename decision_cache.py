@@ -0,0 +1,72 @@
+""" Bounded LRU memoization for ghost decisions over versioned mazes. """
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+from board import VersionedMaze
+
+Change = Tuple[int, int, int, str, str]  # (generation, x, y, old, new) from VersionedMaze.log
+
+MISSING = object()
+
+
+class DecisionCache:
+    """
+    Purpose: Remembers decisions computed on a VersionedMaze. Each entry records the maze
+             generation it was computed at. Entries whose key identifies the layout
+             (VersionedMaze.layout_id) stay valid however many pellets are eaten; entries that
+             depend on pellets pass an `affected` check, and are only dropped when a change
+             logged since then affects them. The least recently used entries go past `capacity`.
+    Examples:
+        cache = DecisionCache(capacity=2)
+        cache.put(("path", maze.layout_id, start, goal), path, maze)
+        cache.get(("path", maze.layout_id, start, goal), maze) -> path
+    """
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable, maze: VersionedMaze,
+            affected: Optional[Callable[[Any, List[Change]], bool]] = None) -> Any:
+        """
+        Purpose: Returns the cached value for `key`, or MISSING. With `affected`, an entry from
+                 an older generation is kept (and refreshed) unless affected(value, changes)
+                 says the changes since then matter, or the log no longer covers them.
+        Examples:
+            cache.get(key, maze, lambda pellet, changes: any((x, y) == pellet for _, x, y, _, _ in changes))
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        value, generation = entry
+        if affected is not None and generation != maze.generation:
+            changes = maze.changes_since(generation)
+            if changes is None or affected(value, changes):
+                del self.entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return MISSING
+            self.entries[key] = (value, maze.generation)
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, maze: VersionedMaze) -> Any:
+        """
+        Purpose: Stores `value` for `key` at the maze's current generation and returns it.
+        Examples:
+            return cache.put(key, compute(), maze)
+        """
+        self.entries[key] = (value, maze.generation)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self.entries.clear()
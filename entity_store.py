@@ -0,0 +1,265 @@
+""" Structure-of-arrays storage for character state. """
+from array import array
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Positions are fixed-point integers: FIXED_ONE sub-pixel units per pixel
+FIXED_SHIFT = 8
+FIXED_ONE = 1 << FIXED_SHIFT
+
+
+def to_fixed(pixels: float) -> int:
+    """
+    Purpose: Converts a pixel coordinate or distance to fixed-point units.
+    Examples:
+        to_fixed(2) -> 512
+        to_fixed(0.5) -> 128
+    """
+    return round(pixels * FIXED_ONE)
+
+
+def snap_to_unit(value: int, unit: int) -> int:
+    """
+    Purpose: Rounds a fixed-point coordinate to the nearest multiple of `unit`, with halves
+             going to the even multiple like Python's round().
+    Examples:
+        snap_to_unit(30, 40) -> 40
+        snap_to_unit(60, 40) -> 80
+    """
+    q, r = divmod(value, unit)
+    if 2 * r > unit or (2 * r == unit and q % 2):
+        q += 1
+    return q * unit
+
+
+class PixelView:
+    """
+    Purpose: Presents a fixed-point coordinate array in pixels, so `store.x[i]` reads and
+             writes pixels while the hot loops work on the integer array directly.
+    Examples:
+        store.x[0] = 79.5
+        store.fx[0] -> 20352
+    """
+    __slots__ = ('values',)
+
+    def __init__(self, values: array):
+        self.values = values
+
+    def __getitem__(self, index: int) -> float:
+        return self.values[index] / FIXED_ONE
+
+    def __setitem__(self, index: int, pixels: float) -> None:
+        self.values[index] = round(pixels * FIXED_ONE)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[float]:
+        return (value / FIXED_ONE for value in self.values)
+
+
+class EntityStore:
+    """
+    Purpose: Holds the state of every character in parallel typed arrays (one slot per entity),
+             so per-frame updates for many ghosts run as one pass over contiguous memory.
+             Characters are thin views onto one index of the store. Positions are held as
+             fixed-point integers in `fx`/`fy` so motion is exact and reproducible; `x`/`y`
+             give the same values in pixels.
+    Examples:
+        store = EntityStore()
+        index = store.add(x=40, y=80, size=40, speed=1, counter=0, direction=0, turns=[False] * 4)
+        store.x[index] -> 40.0
+        store.fx[index] -> 10240
+    """
+    def __init__(self) -> None:
+        self.fx = array('q')
+        self.fy = array('q')
+        self.x = PixelView(self.fx)
+        self.y = PixelView(self.fy)
+        self.size = array('i')
+        self.speed = array('d')
+        self.counter = array('i')
+        self.direction = array('b')
+        self.timer = array('i')
+        self.alive = array('b')
+        self.target_x = array('q')  # Target tile, in whole tiles
+        self.target_y = array('q')
+        self.turns = array('b')  # Four flags per entity: right, left, up, down
+
+    def __len__(self) -> int:
+        return len(self.fx)
+
+    def add(self, x: float, y: float, size: int, speed: float, counter: int, direction: int, turns: Sequence[bool],
+            target: Optional[Tuple[int, int]] = None) -> int:
+        """
+        Purpose: Appends a new entity to every array and returns its index. Its `target` tile
+                 defaults to the tile it stands on, taking its `size` as the tile size (entities
+                 are one tile large); pass it when tiles are another size.
+        Examples:
+            store.add(0, 0, 40, 2, 0, 0, [False] * 4) -> 0
+            store.add(40, 0, 40, 1, 0, 0, [True, False, False, False]) -> 1
+            store.target_x[1] -> 1
+        """
+        if target is None:
+            tile = max(size, 1)
+            target = (int(x // tile), int(y // tile))
+        self.fx.append(to_fixed(x))
+        self.fy.append(to_fixed(y))
+        self.size.append(size)
+        self.speed.append(speed)
+        self.counter.append(counter)
+        self.direction.append(direction)
+        self.timer.append(0)
+        self.alive.append(1)
+        self.target_x.append(target[0])
+        self.target_y.append(target[1])
+        flags = list(turns) + [False] * (4 - len(turns))
+        self.turns.extend(1 if flag else 0 for flag in flags[:4])
+        return len(self.fx) - 1
+
+    def at_target(self, index: int, unit_width: int, unit_height: int) -> bool:
+        """
+        Purpose: Returns True if the entity is exactly on its target tile.
+        Examples:
+            store.at_target(0, 40, 40) -> True
+        """
+        return (self.fx[index] == self.target_x[index] * (unit_width << FIXED_SHIFT) and
+                self.fy[index] == self.target_y[index] * (unit_height << FIXED_SHIFT))
+
+    def move_towards_targets(self, indices: Iterable[int], unit_width: int, unit_height: int, deltaT: float) -> List[int]:
+        """
+        Purpose: Moves every listed entity towards its target tile (target_x, target_y in tile
+                 units) at `speed` tiles per second, in one pass of integer arithmetic. Motion
+                 is corridor-aligned: an entity first lines up horizontally, then vertically,
+                 and stops exactly on the tile. Returns the indices that are on their target.
+                 Same rule as ghost.move_ghost_towards_tile, applied to a batch.
+        Examples:
+            store.target_x[0], store.target_y[0] = 2, 0
+            store.move_towards_targets([0], 40, 40, 0.5)  # x moves 20 pixels towards 80
+        """
+        xs, ys, speeds = self.fx, self.fy, self.speed
+        target_xs, target_ys = self.target_x, self.target_y
+        unit_x, unit_y = unit_width << FIXED_SHIFT, unit_height << FIXED_SHIFT
+        scale = unit_x * deltaT
+        reached = []
+        for i in indices:
+            x, target_x = xs[i], target_xs[i] * unit_x
+            y, target_y = ys[i], target_ys[i] * unit_y
+            if x != target_x:
+                step = int(speeds[i] * scale)
+                if x < target_x:
+                    x = min(x + step, target_x)
+                else:
+                    x = max(x - step, target_x)
+                xs[i] = x
+                if x != target_x or y != target_y:
+                    continue
+            elif y != target_y:
+                step = int(speeds[i] * scale)
+                if y < target_y:
+                    y = min(y + step, target_y)
+                else:
+                    y = max(y - step, target_y)
+                ys[i] = y
+                if y != target_y:
+                    continue
+            reached.append(i)
+        return reached
+
+    def tick_respawn_timers(self, indices: Iterable[int], revive_speed: float) -> List[int]:
+        """
+        Purpose: Counts down the timers of dead entities in one pass. Entities whose timer hits
+                 zero are brought back to life at `revive_speed`; their indices are returned.
+        Examples:
+            store.alive[0], store.timer[0] = 0, 1
+            store.tick_respawn_timers([0], revive_speed=1) -> [0]  # store.alive[0] -> 1
+        """
+        timers, alive, speeds = self.timer, self.alive, self.speed
+        revived = []
+        for i in indices:
+            if not alive[i] and timers[i] > 0:
+                timers[i] -= 1
+                if timers[i] == 0:
+                    alive[i] = 1
+                    speeds[i] = revive_speed
+                    revived.append(i)
+        return revived
+
+
+class TurnsView:
+    """
+    Purpose: A list-like view of one entity's four turn flags, updated in place instead of
+             allocating a new list every frame.
+    Examples:
+        turns = TurnsView(store, 0)
+        turns[2] = True
+        turns == [False, False, True, False] -> True
+    """
+    __slots__ = ('store', 'offset')
+
+    def __init__(self, store: EntityStore, index: int):
+        self.store = store
+        self.offset = index * 4
+
+    def __getitem__(self, direction: int) -> bool:
+        if not 0 <= direction < 4:
+            raise IndexError(direction)
+        return bool(self.store.turns[self.offset + direction])
+
+    def __setitem__(self, direction: int, value: bool) -> None:
+        if not 0 <= direction < 4:
+            raise IndexError(direction)
+        self.store.turns[self.offset + direction] = 1 if value else 0
+
+    def __len__(self) -> int:
+        return 4
+
+    def __iter__(self) -> Iterator[bool]:
+        return (bool(flag) for flag in self.store.turns[self.offset:self.offset + 4])
+
+    def __eq__(self, other: Any) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def assign(self, flags: Sequence[bool]) -> None:
+        """
+        Purpose: Overwrites all four flags at once.
+        Examples:
+            turns.assign([True, True, False, False])
+        """
+        for direction in range(4):
+            self.store.turns[self.offset + direction] = 1 if flags[direction] else 0
+
+
+def fixed_field(name: str) -> property:
+    """
+    Purpose: Builds a property that exposes a fixed-point EntityStore array in pixels.
+    Examples:
+        class View:
+            x = fixed_field('fx')
+    """
+    def get(self: Any) -> Any:
+        return getattr(self.store, name)[self.index] / FIXED_ONE
+
+    def set(self: Any, value: Any) -> None:
+        getattr(self.store, name)[self.index] = round(value * FIXED_ONE)
+
+    return property(get, set)
+
+
+def store_field(name: str) -> property:
+    """
+    Purpose: Builds a property that reads and writes one EntityStore array at the view's index,
+             so view classes keep plain attribute access (`ghost.x += 1`).
+    Examples:
+        class View:
+            x = store_field('x')
+    """
+    def get(self: Any) -> Any:
+        return getattr(self.store, name)[self.index]
+
+    def set(self: Any, value: Any) -> None:
+        getattr(self.store, name)[self.index] = value
+
+    return property(get, set)
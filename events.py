@@ -0,0 +1,186 @@
+""" In-process event bus for game events, dispatched once per frame. """
+import logging
+import queue
+import sys
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Deque, Dict, List, Optional, TextIO, Tuple
+import pygame
+
+PELLET_EATEN = "pellet_eaten"
+POWER_UP = "power_up"
+GHOST_EATEN = "ghost_eaten"
+LIFE_LOST = "life_lost"
+RESPAWN = "respawn"
+WIN = "win"
+LOSE = "lose"
+
+EVENT_KINDS = (PELLET_EATEN, POWER_UP, GHOST_EATEN, LIFE_LOST, RESPAWN, WIN, LOSE)
+
+
+@dataclass
+class Event:
+    """ Something that happened during a frame. """
+    kind: str
+    frame: int
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class EventBus:
+    """
+    Purpose: Collects events published during a frame and delivers them to subscribers in one
+             batch when `dispatch` is called, so the frame loop never waits on a subscriber.
+    Examples:
+        bus = EventBus()
+        bus.subscribe(print, [GHOST_EATEN])
+        bus.publish(GHOST_EATEN, ghost_id="G1")
+        bus.dispatch()  # -> prints Event(kind='ghost_eaten', frame=0, data={'ghost_id': 'G1'})
+    """
+    def __init__(self) -> None:
+        self.frame = 0
+        self.pending: List[Event] = []
+        self.subscribers: Dict[Optional[str], List[Callable[[Event], None]]] = {}
+
+    def subscribe(self, handler: Callable[[Event], None], kinds: Optional[List[str]] = None) -> None:
+        """
+        Purpose: Registers a handler for the given event kinds, or for every kind if None.
+        Examples:
+            bus.subscribe(stats)                  # All events
+            bus.subscribe(sounds, [POWER_UP, WIN])  # Only power-ups and wins
+        """
+        for kind in kinds if kinds is not None else [None]:
+            self.subscribers.setdefault(kind, []).append(handler)
+
+    def publish(self, kind: str, **data: Any) -> None:
+        """
+        Purpose: Queues an event for the next dispatch. Cheap enough to call from the frame loop.
+        Examples:
+            bus.publish(PELLET_EATEN, pos=(3, 4), score=12)
+        """
+        self.pending.append(Event(kind, self.frame, data))
+
+    def dispatch(self) -> int:
+        """
+        Purpose: Delivers every queued event to its subscribers, advances the frame counter and
+                 returns the number of events delivered. Call once per frame.
+        Examples:
+            bus.publish(WIN)
+            bus.dispatch() -> 1
+        """
+        events, self.pending = self.pending, []
+        catch_all = self.subscribers.get(None, [])
+        for event in events:
+            for handler in self.subscribers.get(event.kind, []):
+                handler(event)
+            for handler in catch_all:
+                handler(event)
+        self.frame += 1
+        return len(events)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """ A QueueHandler that drops records when its bounded queue is full instead of blocking. """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_log_listener(name: str = "pacman", stream: TextIO = sys.stdout,
+                       max_queue: int = 1024) -> Tuple[logging.Logger, QueueListener]:
+    """
+    Purpose: Returns a logger whose records go through a bounded, non-blocking queue and are
+             written to `stream` on a background thread, plus the listener to stop at exit.
+    Examples:
+        logger, listener = start_log_listener()
+        logger.info("Game started")  # Written by the listener thread, never blocks the caller
+        listener.stop()
+    """
+    log_queue: queue.Queue = queue.Queue(max_queue)
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    listener = QueueListener(log_queue, logging.StreamHandler(stream))
+    listener.start()
+    return logger, listener
+
+
+def describe_event(event: Event) -> str:
+    """
+    Purpose: Formats an event as a single human-readable log line.
+    Examples:
+        describe_event(Event(RESPAWN, 120, {"ghost_id": "G1"})) -> "[120] respawn ghost_id=G1"
+    """
+    details = " ".join(f"{key}={value}" for key, value in event.data.items())
+    return f"[{event.frame}] {event.kind} {details}".rstrip()
+
+
+class RingBufferLogger:
+    """
+    Purpose: Keeps the most recent `capacity` event lines in memory for debugging and, if given
+             a logger, forwards each line to it.
+    Examples:
+        ring = RingBufferLogger(capacity=2)
+        bus.subscribe(ring)
+        ring.lines  # -> deque of the last two formatted events
+    """
+    def __init__(self, capacity: int = 256, logger: Optional[logging.Logger] = None):
+        self.lines: Deque[str] = deque(maxlen=capacity)
+        self.logger = logger
+
+    def __call__(self, event: Event) -> None:
+        line = describe_event(event)
+        self.lines.append(line)
+        if self.logger is not None:
+            self.logger.info(line)
+
+
+class GameStatistics:
+    """
+    Purpose: Counts events by kind over a run.
+    Examples:
+        stats = GameStatistics()
+        bus.subscribe(stats)
+        stats.counts[PELLET_EATEN]  # -> number of pellets eaten so far
+    """
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+
+    def __call__(self, event: Event) -> None:
+        self.counts[event.kind] += 1
+
+
+class SoundEffects:
+    """
+    Purpose: Plays a sound file for each event kind that has one. Sounds load lazily on first
+             use; if the mixer or a file is unavailable, that sound is silently disabled.
+    Examples:
+        sounds = SoundEffects({POWER_UP: "assets/sounds/power.wav"})
+        bus.subscribe(sounds, list(sounds.paths))
+    """
+    def __init__(self, paths: Dict[str, str]):
+        self.paths = paths
+        self.sounds: Dict[str, Any] = {}
+
+    def __call__(self, event: Event) -> None:
+        if event.kind not in self.paths:
+            return
+        if event.kind not in self.sounds:
+            try:
+                if not pygame.mixer.get_init():
+                    pygame.mixer.init()
+                self.sounds[event.kind] = pygame.mixer.Sound(self.paths[event.kind])
+            except (pygame.error, FileNotFoundError):
+                self.sounds[event.kind] = None
+        sound = self.sounds[event.kind]
+        if sound is not None:
+            sound.play()
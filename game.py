@@ -1,11 +1,20 @@
 """Manages Game state."""
 import sys
 import os
+import ast
+import csv
+import tempfile
+from copy import deepcopy
 from typing import Dict, Any, Tuple, List, Optional
 from dataclasses import dataclass, field
 import pygame
 from datetime import datetime
 from functools import reduce
+from maze_loader import read_maze_header, iter_maze_rows
+from maze_cache import load_compiled_maze
+from hud import Hud, TextCache
+from render_target import display_format
+from board import VersionedMaze
 
 # Get the Python version as a tuple
 python_version = sys.version_info
@@ -32,6 +41,7 @@ class Game:
     unit_width: int
     font: Any
     score: int = 0
+    level: int = 0  # Index of the current level in the campaign
     timestamp: datetime = field(default_factory=datetime.now)  # Auto-set the current timestamp
 
     def __eq__(self, other: Self) -> bool:
@@ -66,38 +76,135 @@ class Game:
         self.deltaT = self.clock.tick(self.fps) / 1000
         return self
 
-    def save(self, file_path: str, game_state: 'GameState') -> None:
+    def checkpoint(self, game_state: 'GameState', lives: Optional[int] = None) -> 'Checkpoint':
         """
-        Saves the current game state to a CSV file.
+        Purpose: Snapshots the run cheaply (a few string joins) so it can be written out later,
+                 possibly on another thread, while the game keeps changing.
+        Examples:
+            autosaver.submit(game.checkpoint(game_state, pacman.lives))
         """
-        with open(file_path, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(['score', 'level', 'timestamp', 'pacman_pos', 'ghost_positions', 'maze'])
-            writer.writerow([
-                self.score,
-                self.level,
-                self.timestamp.isoformat(),
-                game_state.pacman_pos,
-                {k: v for k, v in game_state.ghost_positions.items()},
-                ["".join(row) for row in game_state.maze]
-            ])
+        return Checkpoint(self.score, self.level, datetime.now(), game_state.pacman_pos,
+                          dict(game_state.ghost_positions), tuple("".join(row) for row in game_state.maze), lives)
+
+    def save(self, file_path: str, game_state: 'GameState', lives: Optional[int] = None) -> None:
+        """
+        Saves the current game state to a CSV file, atomically (see write_checkpoint).
+        """
+        write_checkpoint(file_path, self.checkpoint(game_state, lives))
 
     def load(self, file_path: str) -> Tuple[Self, 'GameState']:
         """
         Loads a game state from a CSV file and returns it along with the GameState.
+        If the file is missing or damaged (e.g. after a crash), the previous checkpoint kept
+        next to it is used instead; ValueError is raised if neither can be read.
         """
-        with open(file_path, 'r') as file:
+        saved = read_checkpoint(file_path)
+        self.score = saved.score
+        self.level = saved.level
+        self.timestamp = saved.timestamp
+        maze = [list(row) for row in saved.maze]
+        game_state = GameState(pacman_pos=saved.pacman_pos, ghost_positions=dict(saved.ghost_positions), maze=maze)
+        return self, game_state
+
+
+CHECKPOINT_HEADER = ['score', 'level', 'timestamp', 'pacman_pos', 'ghost_positions', 'maze', 'lives']
+
+@dataclass
+class Checkpoint:
+    """ A snapshot of a run for Game.save and autosaves; `lives` is None in older saves. """
+    score: int
+    level: int
+    timestamp: datetime
+    pacman_pos: Tuple[int, int]
+    ghost_positions: Dict[str, Tuple[int, int]]
+    maze: Tuple[str, ...]
+    lives: Optional[int] = None
+
+def write_checkpoint(file_path: str, checkpoint: Checkpoint) -> None:
+    """
+    Purpose: Writes a checkpoint as CSV without ever leaving a half-written file behind: the
+             data goes to a temporary file in the same folder and is flushed to disk, the
+             previous checkpoint is kept as `file_path + ".bak"`, and the new file is moved
+             into place with os.replace.
+    Examples:
+        write_checkpoint("autosave.csv", game.checkpoint(game_state, pacman.lives))
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    descriptor, temporary = tempfile.mkstemp(prefix=os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(CHECKPOINT_HEADER)
+            writer.writerow([
+                checkpoint.score,
+                checkpoint.level,
+                checkpoint.timestamp.isoformat(),
+                checkpoint.pacman_pos,
+                checkpoint.ghost_positions,
+                list(checkpoint.maze),
+                '' if checkpoint.lives is None else checkpoint.lives
+            ])
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(file_path):
+            os.replace(file_path, file_path + '.bak')
+        os.replace(temporary, file_path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+def parse_checkpoint(file_path: str) -> Checkpoint:
+    """
+    Purpose: Reads one checkpoint file, raising ValueError if it is incomplete or malformed.
+             Fields are parsed with ast.literal_eval, so a damaged file cannot run code.
+    Examples:
+        parse_checkpoint("autosave.csv").score -> 120
+    """
+    try:
+        with open(file_path, 'r', newline='') as file:
             reader = csv.reader(file)
             next(reader)  # Skip header
             row = next(reader)
-            self.score = int(row[0])
-            self.level = int(row[1])
-            self.timestamp = datetime.fromisoformat(row[2])
-            pacman_pos = eval(row[3])
-            ghost_positions = eval(row[4])
-            maze = [list(row) for row in eval(row[5])]
-        game_state = GameState(pacman_pos=pacman_pos, ghost_positions=ghost_positions, maze=maze)
-        return self, game_state
+        lives = row[6] if len(row) > 6 else ''
+        checkpoint = Checkpoint(
+            score=int(row[0]),
+            level=int(row[1]),
+            timestamp=datetime.fromisoformat(row[2]),
+            pacman_pos=tuple(ast.literal_eval(row[3])),
+            ghost_positions={k: tuple(v) for k, v in ast.literal_eval(row[4]).items()},
+            maze=tuple(ast.literal_eval(row[5])),
+            lives=int(lives) if lives else None
+        )
+    except (StopIteration, IndexError, SyntaxError, TypeError, AttributeError, ValueError) as e:
+        raise ValueError(f"{file_path} is not a complete checkpoint: {e}") from e
+    if not checkpoint.maze or len({len(row) for row in checkpoint.maze}) != 1:
+        raise ValueError(f"{file_path} has a damaged maze.")
+    return checkpoint
+
+def read_checkpoint(file_path: str) -> Checkpoint:
+    """
+    Purpose: Recovers the latest readable checkpoint: `file_path` itself, or the previous one
+             kept as `file_path + ".bak"` if a crash left the main file missing or damaged.
+    Examples:
+        read_checkpoint("autosave.csv").level -> 0
+    """
+    errors = []
+    for candidate in (file_path, file_path + '.bak'):
+        try:
+            return parse_checkpoint(candidate)
+        except FileNotFoundError:
+            errors.append(f"{candidate} is missing")
+        except ValueError as e:
+            errors.append(str(e))
+    raise ValueError("No checkpoint could be recovered: " + "; ".join(errors))
+
+def remove_checkpoint(file_path: str) -> None:
+    """ Deletes a checkpoint and its backup, e.g. once the run it belongs to has finished. """
+    for candidate in (file_path, file_path + '.bak'):
+        if os.path.exists(candidate):
+            os.remove(candidate)
+
 
 @dataclass
 class GameState:
@@ -287,37 +394,20 @@ def parse_positions(lines: List[str]) -> Tuple[Optional[Tuple[int, int]], Dict[s
 def parse_game_state_from_txt(file_path: str) -> GameState:
     """
     Purpose: Reads a TXT file to initialize a game state, including Pacman’s position, ghost
-             positions, and the maze layout.
+             positions, and the maze layout. Rows are validated while streaming, so errors
+             report the offending line and column.
     Examples:
         game_state = parse_game_state_from_txt("game_state.txt")
     """
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-
-    # Separate position definitions from maze layout
-    positions_lines = []
-    maze_lines = []
-    maze_started = False
-    for line in lines:
-        if not line.strip():
-            maze_started = True
-            continue
-        if not maze_started:
-            positions_lines.append(line)
-        else:
-            maze_lines.append(line.rstrip('\n'))
-
-    # Parse positions
-    pacman_pos, ghost_positions = parse_positions(positions_lines)
+    # Stream the header and maze rows, validating each row as it is read
+    with open(file_path, 'rb') as file:
+        pacman_pos, ghost_positions, line_no = read_maze_header(file)
+        maze = [list(row.decode('ascii')) for row in iter_maze_rows(file, line_no)]
 
     if pacman_pos is None:
         raise ValueError("Pacman position not found in TXT file.")
-
-    # Parse maze
-    maze = parse_maze(maze_lines)
-
-    # Verify maze consistency
-    verify_maze_consistency(maze)
+    if not maze:
+        raise ValueError("Maze is empty.")
 
     return GameState(
         pacman_pos=pacman_pos,
@@ -325,6 +415,23 @@ def parse_game_state_from_txt(file_path: str) -> GameState:
         maze=maze
     )
 
+def load_game_state(file_path: str) -> GameState:
+    """
+    Purpose: Loads a game state from either maze encoding (`maze.txt` or `CSV/maze.csv`)
+             through the compiled maze cache, so repeated launches skip parsing.
+    Examples:
+        game_state = load_game_state("maze.txt")
+        game_state = load_game_state("CSV/maze.csv")
+    """
+    pacman_pos, ghost_positions, packed = load_compiled_maze(file_path)
+    if pacman_pos is None:
+        raise ValueError(f"Pacman position not found in {file_path}.")
+    return GameState(
+        pacman_pos=pacman_pos,
+        ghost_positions=ghost_positions,
+        maze=packed.to_rows()
+    )
+
 def verify_maze_consistency(maze: List[List[str]]):
     """
     Purpose: Validates the consistency of the maze structure by ensuring all rows are of the 
@@ -353,30 +460,90 @@ WIDTH = 760
 high_score_file = "high_score.txt"
 high_score = load_high_score(high_score_file)
 
-def display_message(screen, font, message: str):
-    """Displays a message in the center of the screen. """
-    # Set up the background rectangle for the message
-    rect_width, rect_height = 600, 300
+text_cache = TextCache()  # Rendered text shared by the HUD and messages
+huds: Dict[Any, Hud] = {}  # One HUD per font and render size, created on first draw
+TILE = 40  # Unit size the pellet, wall and sprite sizes were drawn for; they scale with the unit
+
+def board_unit_size(maze: List[List[str]], size: Tuple[int, int] = (WIDTH, HEIGHT)) -> Tuple[int, int]:
+    """
+    Purpose: Returns the (width, height) in pixels of one maze cell when a board is drawn at
+             `size`, leaving the same share of the height for the UI as the 900 pixel window.
+    Examples:
+        board_unit_size(maze) -> (40, 40)  # maze.txt at WIDTH x HEIGHT
+        board_unit_size(maze, (380, 450)) -> (20, 20)
+    """
+    num_rows = len(maze)
+    num_cols = len(maze[0]) if num_rows > 0 else 0
+    width, height = size
+    return width // num_cols, (height - 50 * height // HEIGHT) // num_rows  # Subtracting space for UI
+
+def scale_to_unit(length: int, unit_width: int) -> int:
+    """ Scales a length drawn for TILE-sized cells to cells `unit_width` wide, keeping it at least 1. """
+    return max(1, length * unit_width // TILE)
+
+def display_message(screen, font, message: str, present=pygame.display.flip):
+    """Displays a message in the center of the screen, showing it with `present`. """
+    # Set up the background rectangle for the message, sized for the screen
+    rect_width, rect_height = 600 * screen.get_width() // WIDTH, 300 * screen.get_height() // HEIGHT
     rect_x = (screen.get_width() - rect_width) // 2
     rect_y = (screen.get_height() - rect_height) // 2
     pygame.draw.rect(screen, 'white', [rect_x, rect_y, rect_width, rect_height], 0, 10)
     pygame.draw.rect(screen, 'grey', [rect_x, rect_y, rect_width, rect_height], 10, 8)
     
     # Render the message text
-    text = font.render(message, True, 'black')
+    text = text_cache.render(font, message, 'black')
     text_rect = text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
     
     # Display the text on the screen
     screen.blit(text, text_rect)
-    pygame.display.flip()  # Update the display
+    present()  # Update the display
     
     # Pause for 3 seconds to allow the user to see the message
     pygame.time.delay(3000)
 
-def draw_board(screen, maze, score, font, lives, high_score):
+def render_background(maze: List[List[str]], background: Any = 'black', rounded: bool = True,
+                      size: Tuple[int, int] = (WIDTH, HEIGHT)) -> pygame.Surface:
+    """
+    Purpose: Draws the walls and doors of a maze, which never change during a level, onto a
+             surface of the render `size` that draw_board can blit instead of drawing them
+             every frame. Only uses a plain surface, so levels can be prepared on a background
+             thread; convert it to the display format before drawing it every frame.
+             With `rounded` False, walls are plain rectangles without the grey outline.
+    Examples:
+        surface = render_background(maze)
+        draw_board(screen, maze, score=100, font=font, lives=3, high_score=500, background=surface)
+    """
+    num_rows = len(maze)
+    num_cols = len(maze[0]) if num_rows > 0 else 0
+    unit_width, unit_height = board_unit_size(maze, size)
+    surface = pygame.Surface(size)
+    surface.fill(background)
+    for y in range(num_rows):
+        for x in range(num_cols):
+            cell = maze[y][x]
+            if cell in '#D':
+                draw_wall(surface, cell, x * unit_width, y * unit_height, unit_width, unit_height, rounded)
+    return surface
+
+def draw_wall(screen: pygame.Surface, cell: str, x: int, y: int, unit_width: int, unit_height: int,
+              rounded: bool = True) -> None:
+    """ Draws one wall ('#') or door ('D') cell, rounded and outlined unless `rounded` is False. """
+    radius = scale_to_unit(8, unit_width) if rounded else 0
+    if cell == '#':
+        pygame.draw.rect(screen, 'blue', (x, y, unit_width, unit_height), 0, radius)
+        if rounded:
+            pygame.draw.rect(screen, 'grey', (x, y, unit_width, unit_height), scale_to_unit(3, unit_width), radius)
+    else:
+        pygame.draw.rect(screen, 'orange', (x, y, unit_width, unit_height), 0, radius)  # Orange door
+
+def draw_board(screen, maze, score, font, lives, high_score, background=None, rounded=True, size=(WIDTH, HEIGHT)):
     """
     Purpose: Draws the maze, score, and remaining lives on the game screen. 
              Each cell in the maze is rendered based on its type (e.g., walls, dots, power-ups).
+             The score and lives go through a cached Hud, so text is only rendered when it changes.
+             If a `background` from render_background is given, it is blitted in place of
+             drawing the walls and doors; `rounded` False draws plain walls (see draw_wall).
+             Cells, pellets and the HUD are laid out for a board of the render `size`.
     Examples:
         maze = [["#", ".", " "], ["o", " ", "#"], ["#", "D", "#"]]
         draw_board(screen, maze, score=100, font=font, lives=3, highscore=)
@@ -384,78 +551,89 @@ def draw_board(screen, maze, score, font, lives, high_score):
     """
     num_rows = len(maze)
     num_cols = len(maze[0]) if num_rows > 0 else 0
-    unit_height = (HEIGHT - 50) // num_rows  # Subtracting space for UI
-    unit_width = WIDTH // num_cols
+    unit_width, unit_height = board_unit_size(maze, size)
+    pellet_radius, power_radius = scale_to_unit(4, unit_width), scale_to_unit(10, unit_width)
+    if background is not None:
+        screen.blit(background, (0, 0))
     
     for y in range(num_rows):
         for x in range(num_cols):
             cell = maze[y][x]
-            if cell == '#':
-                pygame.draw.rect(screen, 'blue', (x * unit_width, y * unit_height, unit_width, unit_height), 0, 8)
-                pygame.draw.rect(screen, 'grey', (x * unit_width, y * unit_height, unit_width, unit_height), 3, 8)
+            if background is not None and cell in '#D':
+                continue  # Already on the background
+            if cell == '#' or cell == 'D':
+                draw_wall(screen, cell, x * unit_width, y * unit_height, unit_width, unit_height, rounded)
             elif cell == '.':
                 center_x = int(x * unit_width + 0.5 * unit_width)
                 center_y = int(y * unit_height + 0.5 * unit_height)
-                pygame.draw.circle(screen, 'white', (center_x, center_y), 4)
+                pygame.draw.circle(screen, 'white', (center_x, center_y), pellet_radius)
             elif cell == 'o':
                 center_x = int(x * unit_width + 0.5 * unit_width)
                 center_y = int(y * unit_height + 0.5 * unit_height)
-                pygame.draw.circle(screen, 'white', (center_x, center_y), 10)
-            elif cell == 'D':
-                pygame.draw.rect(screen, 'orange', (x * unit_width, y * unit_height, unit_width, unit_height), 0, 8)  # Orange door
+                pygame.draw.circle(screen, 'white', (center_x, center_y), power_radius)
             elif cell == ' ':
                 # Empty space; no drawing needed
                 pass
 
-    # Draw score
-    score_text = font.render(f'Score: {score}', True, 'white')
-    screen.blit(score_text, (10, HEIGHT - 35))
-    
-    # Draw high score
-    high_score_text = font.render(f'High Score: {high_score}', True, 'white')
-    screen.blit(high_score_text, (10, HEIGHT - 70))  
+    # Draw score, high score and lives
+    key = (font, size)
+    if key not in huds:
+        huds[key] = Hud(font, size[0], size[1], text_cache, size[1] / HEIGHT)
+    huds[key].draw(screen, score, high_score, lives)
 
-    # Draw lives
-    for i in range(lives):
-        try:
-            life_img = pygame.transform.scale(pygame.image.load('assets/pacman_images/1.png'), (30, 30))
-            screen.blit(life_img, (WIDTH - 100 + i * 40, HEIGHT - 35))
-        except pygame.error as e:
-            print(f"Error loading life image: {e}")
-            # If life image not found, draw a simple circle
-            pygame.draw.circle(screen, 'yellow', (WIDTH - 100 + i * 40 + 15, HEIGHT - 35 + 15), 15)
-    
-def draw_player(screen, pacman_x, pacman_y, size, direction, counter):
+pacman_image_sets: Dict[int, List[pygame.Surface]] = {}  # Scaled animation frames by size
+oriented_pacman_images: Dict[Tuple[int, int, int], pygame.Surface] = {}  # Flipped/rotated frames by (size, frame, direction)
+
+def load_pacman_images(size: int) -> List[pygame.Surface]:
     """
-    Purpose: Draws Pacman at the given position with directional animation determined by 
-             the counter (frame-based animation).
+    Purpose: Returns Pacman's four animation frames scaled to `size`, loading them from disk
+             only the first time each size is requested. Frames are converted to the display's
+             pixel format once a window is open, so blitting them needs no conversion.
     Examples:
-        draw_player(screen, pacman_x=100, pacman_y=150, size=30, direction=1, counter=20)
-        # Draws Pacman facing left (direction=1) at the specified position with the 
-        # appropriate animation frame.
+        len(load_pacman_images(40)) -> 4
     """
+    if size in pacman_image_sets:
+        return pacman_image_sets[size]
     pacman_images = []
     try:
         for i in range(1, 5):
-            pacman_images.append(pygame.transform.scale(pygame.image.load(f'assets/pacman_images/{i}.png'), (size, size)))
-    except pygame.error as e:
+            image = pygame.transform.scale(pygame.image.load(f'assets/pacman_images/{i}.png'), (size, size))
+            pacman_images.append(display_format(image, alpha=True))
+    except (pygame.error, FileNotFoundError) as e:
         print(f"Error loading Pacman images: {e}")
         # If Pacman images not found, use a placeholder
         pacman_images = [pygame.Surface((size, size), pygame.SRCALPHA) for _ in range(4)]
         for img in pacman_images:
             pygame.draw.circle(img, 'yellow', (size // 2, size // 2), size // 2)
+    pacman_image_sets[size] = pacman_images
+    return pacman_images
 
-    img = pacman_images[counter // 10 % len(pacman_images)]
-    if direction == 0:  # right
-        screen.blit(img, (pacman_x, pacman_y))
-    elif direction == 1:  # left
-        screen.blit(pygame.transform.flip(img, True, False), (pacman_x, pacman_y))
-    elif direction == 2:  # up
-        screen.blit(pygame.transform.rotate(img, 90), (pacman_x, pacman_y))
-    elif direction == 3:  # down
-        screen.blit(pygame.transform.rotate(img, 270), (pacman_x, pacman_y))
-
-def check_collisions_and_update_maze(pacman, maze):
+def draw_player(screen, pacman_x, pacman_y, size, direction, counter):
+    """
+    Purpose: Draws Pacman at the given position with directional animation determined by 
+             the counter (frame-based animation).
+    Examples:
+        draw_player(screen, pacman_x=100, pacman_y=150, size=30, direction=1, counter=20)
+        # Draws Pacman facing left (direction=1) at the specified position with the 
+        # appropriate animation frame.
+    """
+    pacman_images = load_pacman_images(size)
+    frame = counter // 10 % len(pacman_images)
+    key = (size, frame, direction)
+    if key not in oriented_pacman_images:
+        img = pacman_images[frame]
+        if direction == 1:  # left
+            img = pygame.transform.flip(img, True, False)
+        elif direction == 2:  # up
+            img = pygame.transform.rotate(img, 90)
+        elif direction == 3:  # down
+            img = pygame.transform.rotate(img, 270)
+        elif direction != 0:  # right
+            return
+        oriented_pacman_images[key] = img
+    screen.blit(oriented_pacman_images[key], (pacman_x, pacman_y))
+
+def check_collisions_and_update_maze(pacman, maze, unit_width=None, unit_height=None):
     """
     Purpose: Detects collisions between Pacman and maze elements (e.g., dots, power-ups),
              updating Pacman’s score and attributes while modifying the maze as needed.
@@ -465,23 +643,41 @@ def check_collisions_and_update_maze(pacman, maze):
         check_collisions_and_update_maze(pacman, maze)
         # If Pacman eats a dot ('.'), the score is incremented, and the maze cell is cleared.
         # If Pacman eats a power-up ('o'), boosted mode is activated, and the boost timer starts.
+        # Returns the eaten cell ('.' or 'o'), or None if nothing was eaten.
+        # A VersionedMaze records the change in its generation counter and change log.
     """
-    num_rows = len(maze)
-    num_cols = len(maze[0]) if num_rows > 0 else 0
-    unit_height = (HEIGHT - 50) // num_rows
-    unit_width = WIDTH // num_cols
+    if unit_width is None or unit_height is None:
+        # Default to the tile size used for the game window
+        num_rows = len(maze)
+        num_cols = len(maze[0]) if num_rows > 0 else 0
+        unit_height = (HEIGHT - 50) // num_rows
+        unit_width = WIDTH // num_cols
     center_x = pacman.x + pacman.size // 2
     center_y = pacman.y + pacman.size // 2
-    maze_x = center_x // unit_width
-    maze_y = center_y // unit_height
+    maze_x = int(center_x // unit_width)
+    maze_y = int(center_y // unit_height)
 
     if 0 <= maze_y < len(maze) and 0 <= maze_x < len(maze[0]):
         cell = maze[maze_y][maze_x]
         if cell == '.':
             pacman.score += 1
-            maze[maze_y][maze_x] = ' '
+            clear_cell(maze, maze_x, maze_y)
+            return cell
         elif cell == 'o':
             pacman.score += 2
             pacman.boosted = True
             pacman.boost_timer = 0
-            maze[maze_y][maze_x] = ' '
\ No newline at end of file
+            clear_cell(maze, maze_x, maze_y)
+            return cell
+    return None
+
+def clear_cell(maze: List[List[str]], x: int, y: int) -> None:
+    """
+    Purpose: Empties a maze cell, going through set_cell for a VersionedMaze so the change is logged.
+    Examples:
+        clear_cell(maze, 1, 0)  # maze[0][1] -> ' '
+    """
+    if isinstance(maze, VersionedMaze):
+        maze.set_cell(x, y, ' ')
+    else:
+        maze[y][x] = ' '
@@ -7,17 +7,73 @@ from copy import deepcopy
 from collections import deque, defaultdict
 from game import *
 from character import Character
+from entity_store import EntityStore, store_field
+from board import VersionedMaze
+from decision_cache import DecisionCache, MISSING
+from render_target import display_format
+
+# Shared frightened/dead images, loaded on first use rather than at import time
+state_images: Dict[str, Any] = {}
+
+def load_state_image(name: str, size: int = 40) -> Any:
+    """
+    Purpose: Returns the shared ghost image for a state ('scared' or 'dead') at `size` pixels,
+             loading and scaling it once per size on first use, in the display's pixel format.
+    Examples:
+        load_state_image('scared')  # -> 40x40 Surface from assets/ghost_images/scared.png
+    """
+    key = name if size == 40 else f"{name}@{size}"
+    if key not in state_images:
+        image = pygame.transform.scale(pygame.image.load(f'assets/ghost_images/{name}.png'), (size, size))
+        state_images[key] = display_format(image, alpha=True)
+    return state_images[key]
+
+def draw_ghost_image(screen: Any, img: Any, x: float, y: float, dead: bool, boosted: bool, eaten: bool) -> None:
+    """
+    Purpose: Blits a ghost at (x, y): its own `img` normally or once eaten during a boost, the
+             scared image while Pacman is boosted, and the dead image while it respawns.
+             Takes plain values so frame snapshots can be drawn as well as live ghosts; the state
+             images are drawn at the size of `img`.
+    Examples:
+        draw_ghost_image(screen, ghost_images["G1"], 120, 80, dead=False, boosted=True, eaten=False)  # Scared
+    """
+    if dead:
+        screen.blit(load_state_image('dead', img.get_width()), (x, y))
+    elif boosted and not eaten:
+        screen.blit(load_state_image('scared', img.get_width()), (x, y))
+    else:
+        screen.blit(img, (x, y))
 
-@dataclass
 class Ghost(Character):
-    dead: bool
-    img: Any
-    id: int
-    in_box: bool
-    respawn_timer: int = 0
+    __slots__ = ('img', 'id', 'in_box')
+
+    respawn_timer = store_field('timer')
+
+    def __init__(self, x: int, y: int, size: int, speed: float, counter: int, direction: int, turns: List[bool],
+                 dead: bool, img: Any, id: str, in_box: bool, respawn_timer: int = 0,
+                 store: Optional[EntityStore] = None):
+        super().__init__(x, y, size, speed, counter, direction, turns, store)
+        self.img = img
+        self.id = id
+        self.in_box = in_box
+        self.dead = dead
+        self.respawn_timer = respawn_timer
+
+    @property
+    def dead(self) -> bool:
+        return not self.store.alive[self.index]
+
+    @dead.setter
+    def dead(self, value: bool) -> None:
+        self.store.alive[self.index] = 0 if value else 1
 
-    scared_img: Any = pygame.transform.scale(pygame.image.load('assets/ghost_images/scared.png'), (40, 40))
-    dead_img: Any = pygame.transform.scale(pygame.image.load('assets/ghost_images/dead.png'), (40, 40))
+    @property
+    def target_tile(self) -> Tuple[int, int]:
+        return (self.store.target_x[self.index], self.store.target_y[self.index])
+
+    @target_tile.setter
+    def target_tile(self, tile: Tuple[int, int]) -> None:
+        self.store.target_x[self.index], self.store.target_y[self.index] = tile
 
     def draw_ghost(self, screen, boosted, eaten_ghosts, unit_width, unit_height):
         """
@@ -27,12 +83,7 @@ class Ghost(Character):
             ghost = Ghost(x=100, y=200, size=40, speed=2.0, counter=0, dead=False, direction=0, img=img, id=1, turns=[], in_box=False)
             ghost.draw_ghost(screen, boosted=True, eaten_ghosts={"1": False}, unit_width=30, unit_height=30)
         """
-        if (not boosted and not self.dead) or (eaten_ghosts[self.id] and boosted and not self.dead):
-            screen.blit(self.img, (self.x, self.y))
-        elif boosted and not self.dead and not eaten_ghosts[self.id]:
-            screen.blit(self.scared_img, (self.x, self.y))
-        else:
-            screen.blit(self.dead_img, (self.x, self.y))
+        draw_ghost_image(screen, self.img, self.x, self.y, self.dead, boosted, eaten_ghosts[self.id])
         
         ghost_hitbox = pygame.rect.Rect((self.x, self.y), (unit_width, unit_height))
         return ghost_hitbox
@@ -168,44 +219,68 @@ def bfs_shortest_path(maze: List[List[str]], start: Tuple[int, int], goal: Tuple
                 queue.append(path + [neighbor])
     return None
 
+
+# Decisions shared by all strategies. Layout-only decisions are keyed by the maze's layout_id,
+# so games on the same layout share them; pellet-dependent ones by its uid so mazes never mix
+decision_cache = DecisionCache(capacity=4096)
+path_tables: Dict[int, Any] = {}  # Precomputed shortest paths by layout_id, e.g. an installed SharedMaze
+
+def memo_valid_moves(maze: List[List[str]], current_pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """
+    Purpose: get_valid_moves, memoized per tile and layout for a VersionedMaze.
+             Returns a shared list that must not be modified. Plain mazes are not cached.
+    Examples:
+        memo_valid_moves(VersionedMaze(maze), (1, 1)) -> [(1, 2), (1, 0)]
+    """
+    if not isinstance(maze, VersionedMaze):
+        return get_valid_moves(maze, current_pos)
+    key = ("moves", maze.layout_id, current_pos)
+    moves = decision_cache.get(key, maze)
+    if moves is MISSING:
+        moves = decision_cache.put(key, get_valid_moves(maze, current_pos), maze)
+    return moves
+
+def memo_shortest_path(maze: List[List[str]], start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+    """
+    Purpose: bfs_shortest_path, memoized per (start, goal) and layout for a VersionedMaze;
+             eating pellets never invalidates a path. The list must not be modified.
+             Layouts with installed `path_tables` are answered from those instead.
+    Examples:
+        memo_shortest_path(VersionedMaze(maze), (1, 0), (1, 2)) -> [(1, 0), (1, 1), (1, 2)]
+    """
+    if not isinstance(maze, VersionedMaze):
+        return bfs_shortest_path(maze, start, goal)
+    tables = path_tables.get(maze.layout_id)
+    if tables is not None:
+        return tables.shortest_path(start, goal)
+    key = ("path", maze.layout_id, start, goal)
+    path = decision_cache.get(key, maze)
+    if path is MISSING:
+        path = decision_cache.put(key, bfs_shortest_path(maze, start, goal), maze)
+    return path
+
 def move_ghost_towards_tile(ghost, target_tile, unit_width, unit_height, deltaT):
     """
     Purpose: Moves the ghost incrementally towards the specified target tile based on its 
              speed and the elapsed time (`deltaT`). Stops once the ghost reaches the tile.
+             Sets the ghost's target tile and uses the store's fixed-point movement.
     Examples:
         ghost = Ghost(x=50, y=50, size=40, speed=2.0, ...)
         move_ghost_towards_tile(ghost, (5, 5), unit_width=20, unit_height=20, deltaT=0.016)
         # Ghost moves closer to tile (5, 5) at a rate determined by its speed and `deltaT`.
     """
-    target_x = target_tile[0] * unit_width
-    target_y = target_tile[1] * unit_height
-
-    dx = target_x - ghost.x
-    dy = target_y - ghost.y
-    dist = (dx**2 + dy**2)**0.5
-
-    if dist < 1:
-        ghost.x = target_x
-        ghost.y = target_y
-        return True  # Reached the tile
-
-    pixels_per_second = ghost.speed * unit_width
-    step = pixels_per_second * deltaT
-
-    if step > dist:
-        step = dist
-
-    ghost.x += (dx / dist) * step
-    ghost.y += (dy / dist) * step
-
-    return False
-
+    ghost.target_tile = target_tile
+    return bool(ghost.store.move_towards_targets([ghost.index], unit_width, unit_height, deltaT))
 
 class GhostStrategy:
     """
     Purpose: Abstract base class for ghost AI strategies. Subclasses must implement the 
-             `get_next_position` method to define ghost behavior.
+             `get_next_position` method to define ghost behavior. A `stateless` strategy's
+             answer depends only on the maze, the ghost's tile and Pacman's tile, which lets
+             Simulation.fast_forward skip asking again while none of them change.
     """
+    stateless = False
+
     def get_next_position(self, state: GameState, ghost_id: str) -> Tuple[int, int]:
         raise NotImplementedError
 
@@ -214,21 +289,21 @@ class RandomGhostStrategy(GhostStrategy):
     """
     Purpose: Implements a random movement strategy for ghosts, ensuring they don't revisit 
              recent positions to avoid repetitive behavior.
+             Choices come from `rng` when given, so games can be reproduced without seeding
+             the random module.
     Examples:
-        strategy = RandomGhostStrategy(history_length=3)
+        strategy = RandomGhostStrategy(history_length=3, rng=random.Random(0))
         next_pos = strategy.get_next_position(state, ghost_id="ghost1")
         # Returns a random valid position near the current position.
     """
-    def __init__(self, history_length: int = 3):
+    def __init__(self, history_length: int = 3, rng: Optional[random.Random] = None):
         self.history_length = history_length
         self.position_history: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.rng = rng
 
     def get_next_position(self, state: GameState, ghost_id: str) -> Tuple[int, int]:
         current_pos = state.ghost_positions[ghost_id]
-        valid_moves = get_valid_moves(state.maze, current_pos)
-
-        # Ensure valid_moves doesn't allow diagonal movement
-        valid_moves = [move for move in valid_moves if self.is_straight_move(current_pos, move)]
+        valid_moves = self.straight_moves(state.maze, current_pos)
 
         if not valid_moves:
             return current_pos
@@ -236,13 +311,33 @@ class RandomGhostStrategy(GhostStrategy):
         recent_positions = self.position_history[ghost_id]
         filtered_moves = [m for m in valid_moves if m not in recent_positions]
 
-        chosen = random.choice(filtered_moves) if filtered_moves else random.choice(valid_moves)
+        rng = self.rng if self.rng is not None else random
+        chosen = rng.choice(filtered_moves) if filtered_moves else rng.choice(valid_moves)
         recent_positions.append(chosen)
         if len(recent_positions) > self.history_length:
             recent_positions.pop(0)
 
         return chosen
 
+    def straight_moves(self, maze: List[List[str]], current_pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Purpose: Returns the valid non-diagonal moves from a tile, memoized per tile and maze
+                 layout for a VersionedMaze.
+        Examples:
+            strategy.straight_moves(maze, (1, 1)) -> [(1, 2), (1, 0)]
+        """
+        if not isinstance(maze, VersionedMaze):
+            return self.find_straight_moves(maze, current_pos)
+        key = ("straight", maze.layout_id, current_pos)
+        moves = decision_cache.get(key, maze)
+        if moves is MISSING:
+            moves = decision_cache.put(key, self.find_straight_moves(maze, current_pos), maze)
+        return moves
+
+    def find_straight_moves(self, maze: List[List[str]], current_pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """ The valid moves from a tile, without diagonal ones. """
+        return [move for move in get_valid_moves(maze, current_pos) if self.is_straight_move(current_pos, move)]
+
     def is_straight_move(self, current_pos: Tuple[int, int], next_pos: Tuple[int, int]) -> bool:
         """
         Purpose: Checks if the move is a straight (non-diagonal) move.
@@ -266,6 +361,8 @@ class ChasingGhostStrategy(GhostStrategy):
         next_pos = strategy.get_next_position(state, ghost_id="ghost2")
         # Returns the next position along the shortest path to Pacman.
     """
+    stateless = True
+
     def get_next_position(self, state: GameState, ghost_id: str) -> Tuple[int, int]:
         current_pos = state.ghost_positions[ghost_id]
         pacman_pos = state.pacman_pos
@@ -273,7 +370,7 @@ class ChasingGhostStrategy(GhostStrategy):
         if current_pos == pacman_pos:
             return current_pos
 
-        path = bfs_shortest_path(state.maze, current_pos, pacman_pos)
+        path = memo_shortest_path(state.maze, current_pos, pacman_pos)
         if not path or len(path) < 2:
             return current_pos
         return path[1]
@@ -288,9 +385,10 @@ class PalletHoveringGhostStrategy(GhostStrategy):
         next_pos = strategy.get_next_position(state, ghost_id="ghost3")
         # Returns a position near the pellet or moves towards a new target pellet.
     """
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None) -> None:
         self.target_pellet: Optional[Tuple[int, int]] = None
         self.hover_positions: List[Tuple[int, int]] = []
+        self.rng = rng  # Picks a move when no pellet is left; the random module if None
 
     def get_next_position(self, state: GameState, ghost_id: str) -> Tuple[int, int]:
         current_pos = state.ghost_positions[ghost_id]
@@ -298,13 +396,14 @@ class PalletHoveringGhostStrategy(GhostStrategy):
 
         # Find the nearest pellet if no target
         if not self.target_pellet or not self.is_pellet_present(maze, self.target_pellet):
-            self.target_pellet = self.find_nearest_pellet(maze, current_pos)
+            self.target_pellet = self.memo_nearest_pellet(maze, current_pos)
 
         if not self.target_pellet:
-            valid_moves = get_valid_moves(maze, current_pos)
-            return random.choice(valid_moves) if valid_moves else current_pos
+            valid_moves = memo_valid_moves(maze, current_pos)
+            rng = self.rng if self.rng is not None else random
+            return rng.choice(valid_moves) if valid_moves else current_pos
 
-        self.hover_positions = self.get_hover_positions(maze, self.target_pellet)
+        self.hover_positions = self.memo_hover_positions(maze, self.target_pellet)
 
         if current_pos in self.hover_positions:
             # Hover around the pellet
@@ -315,9 +414,38 @@ class PalletHoveringGhostStrategy(GhostStrategy):
             return current_pos
         else:
             # Move towards hover positions
-            path = bfs_shortest_path(maze, current_pos, self.target_pellet)
+            path = memo_shortest_path(maze, current_pos, self.target_pellet)
             return path[1] if path and len(path) > 1 else current_pos
 
+    def memo_nearest_pellet(self, maze: List[List[str]], start: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        Purpose: find_nearest_pellet, memoized per start tile for a VersionedMaze. An answer is
+                 only recomputed when the pellet it found is eaten or a new pellet appears.
+        Examples:
+            strategy.memo_nearest_pellet(maze, (0, 0)) -> (0, 2)
+        """
+        if not isinstance(maze, VersionedMaze):
+            return self.find_nearest_pellet(maze, start)
+        key = ("nearest", maze.uid, maze.layout_generation, start)
+        pellet = decision_cache.get(key, maze, pellet_changed)
+        if pellet is MISSING:
+            pellet = decision_cache.put(key, self.find_nearest_pellet(maze, start), maze)
+        return pellet
+
+    def memo_hover_positions(self, maze: List[List[str]], pellet: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Purpose: get_hover_positions, memoized per pellet and layout for a VersionedMaze.
+        Examples:
+            strategy.memo_hover_positions(maze, (1, 1)) -> [(0, 1), (2, 1), (1, 0), (1, 2)]
+        """
+        if not isinstance(maze, VersionedMaze):
+            return self.get_hover_positions(maze, pellet)
+        key = ("hover", maze.layout_id, pellet)
+        positions = decision_cache.get(key, maze)
+        if positions is MISSING:
+            positions = decision_cache.put(key, self.get_hover_positions(maze, pellet), maze)
+        return positions
+
     def find_nearest_pellet(self, maze: List[List[str]], start: Tuple[int, int]) -> Optional[Tuple[int, int]]:
         """
         Purpose: Finds the nearest pellet ('o') in the maze from the given start position using BFS.
@@ -360,4 +488,15 @@ class PalletHoveringGhostStrategy(GhostStrategy):
         directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
         x, y = pellet
         potential_positions = [(x + dx, y + dy) for dx, dy in directions]
-        return [pos for pos in potential_positions if is_valid_position(maze, pos)]
\ No newline at end of file
+        return [pos for pos in potential_positions if is_valid_position(maze, pos)]
+
+
+def pellet_changed(pellet: Optional[Tuple[int, int]], changes: List[Tuple[int, int, int, str, str]]) -> bool:
+    """
+    Purpose: Tells the decision cache whether maze changes affect a nearest-pellet answer:
+             the pellet itself changed, or a new power pellet appeared somewhere.
+    Examples:
+        pellet_changed((2, 0), [(5, 2, 0, 'o', ' ')]) -> True
+        pellet_changed((2, 0), [(5, 1, 0, '.', ' ')]) -> False
+    """
+    return any((x, y) == pellet or new == 'o' for _, x, y, _, new in changes)
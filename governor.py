@@ -0,0 +1,76 @@
+""" Adaptive quality governor that trades visual detail for frame time. """
+from collections import deque
+from typing import Deque
+
+# Quality stages, shed in this order when frames run over budget
+WALL_OUTLINES = 1  # Plain wall rectangles instead of rounded, outlined ones
+ANIMATION = 2  # Half as many Pacman animation frames
+DISTANT_AI = 3  # Ghosts far from Pacman re-plan less often
+OVERLAYS = 4  # Diagnostic overlays are not drawn
+STAGE_NAMES = ("full quality", "plain walls", "reduced animation", "throttled distant ghosts", "no overlays")
+
+
+class QualityGovernor:
+    """
+    Purpose: Watches how long each frame's work takes against the budget of a `fps` target.
+             When the average over `window` frames exceeds `high` of the budget, it sheds the
+             next stage; when it falls below `low`, it restores one. Restoring waits three
+             times longer than shedding so the level does not oscillate.
+    Examples:
+        governor = QualityGovernor(fps=60.0)
+        governor.record(0.025)          # A 25 ms frame against a 16.7 ms budget
+        governor.sheds(WALL_OUTLINES)   # -> True once enough slow frames have been recorded
+        governor.describe()             # -> "level 1 (plain walls), 25.0/16.7 ms"
+    """
+    def __init__(self, fps: float, window: int = 30, high: float = 0.9, low: float = 0.6,
+                 cooldown: int = 60, max_level: int = len(STAGE_NAMES) - 1):
+        self.budget = 1 / fps
+        self.high = high
+        self.low = low
+        self.cooldown = cooldown
+        self.max_level = max_level
+        self.window = window
+        self.level = 0
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.frames_since_change = 0
+
+    @property
+    def average(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def sheds(self, stage: int) -> bool:
+        """
+        Purpose: Returns True if the work belonging to `stage` should currently be reduced.
+        Examples:
+            governor.sheds(OVERLAYS) -> False
+        """
+        return self.level >= stage
+
+    def record(self, frame_seconds: float) -> int:
+        """
+        Purpose: Records the work time of one frame (excluding the frame-rate sleep) and returns
+                 the possibly updated quality level.
+        Examples:
+            governor.record(0.004) -> 0
+        """
+        self.samples.append(frame_seconds)
+        self.frames_since_change += 1
+        if len(self.samples) < self.window:
+            return self.level
+        average = self.average
+        if (average > self.high * self.budget and self.level < self.max_level
+                and self.frames_since_change >= self.cooldown):
+            self.change(self.level + 1)
+        elif (average < self.low * self.budget and self.level > 0
+                and self.frames_since_change >= 3 * self.cooldown):
+            self.change(self.level - 1)
+        return self.level
+
+    def change(self, level: int) -> None:
+        self.level = level
+        self.samples.clear()  # Judge the new level on its own frames
+        self.frames_since_change = 0
+
+    def describe(self) -> str:
+        return (f"level {self.level} ({STAGE_NAMES[self.level]}), "
+                f"{self.average * 1000:.1f}/{self.budget * 1000:.1f} ms")
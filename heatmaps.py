@@ -0,0 +1,327 @@
+""" Per-tile heatmaps of where Pacman goes and dies, where ghosts spend time and when pellets go. """
+import argparse
+import os
+import zlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+import pygame
+from autopilot import Autopilot
+from game import load_game_state, render_background
+from replay import ReplayReader
+from simulation import Simulation, default_strategy, window_unit_size
+from state_codec import MSG_KEYFRAME, decode_message
+
+Tile = Tuple[int, int]
+
+PACMAN_LAYER = "pacman"
+DEATHS_LAYER = "deaths"
+PELLETS_LAYER = "pellets"  # Times each tile's pellet was eaten
+PELLET_FRAMES_LAYER = "pellet_frames"  # Sum of the frames they were eaten on, for mean timings
+DEAD_FLAG = 4  # Entity flag bit of an eaten ghost (state_codec.entity_flags)
+
+
+class FrameSample(NamedTuple):
+    """ The tile-level facts of one frame that the heatmaps count. """
+    layout: int  # Identifies the maze's walls, so samples from different mazes stay apart
+    maze: List[List[str]]
+    frame: int
+    pacman: Tile
+    ghosts: Tuple[Tuple[str, Tile], ...]  # (strategy name, tile) of every live ghost
+    died_at: Optional[Tile]  # Where Pacman lost lives this frame
+    lives_lost: int  # More than one when several ghosts caught Pacman on the same frame
+    eaten: Tuple[Tile, ...]  # Pellets eaten this frame
+
+
+def layout_key(maze: List[List[str]]) -> int:
+    """
+    Purpose: Returns a stable number for a maze's walls and doors, ignoring pellets.
+    Examples:
+        layout_key([list("#.#")]) == layout_key([list("# #")]) -> True
+    """
+    return zlib.crc32("\n".join("".join(c if c in '#D' else ' ' for c in row) for row in maze).encode())
+
+
+def to_tile(x: float, y: float, unit_width: int, unit_height: int) -> Tile:
+    return round(x / unit_width), round(y / unit_height)
+
+
+def replay_samples(file_path: str) -> Iterator[FrameSample]:
+    """
+    Purpose: Streams the frames of a replay as FrameSamples, one block in memory at a time.
+             Deaths are frames where the lives count drops; Pacman has already been moved
+             back to its spawn by then, so the death is placed where it was the frame before.
+    Examples:
+        sum(1 for _ in replay_samples("run.prpl")) -> number of recorded frames
+    """
+    with ReplayReader(file_path) as replay:
+        maze: List[List[str]] = []
+        entities: List[Tuple[float, float, int]] = []
+        labels: Dict[int, str] = {}
+        layout, unit_width, unit_height = 0, 1, 1
+        lives, previous_pacman = None, None
+        for block in range(len(replay.block_offsets)):
+            for payload in replay.block_messages(block):
+                message = decode_message(payload)
+                if message["type"] == MSG_KEYFRAME:
+                    eaten = tuple((x, y) for y, row in enumerate(message["maze"]) for x, cell in enumerate(row)
+                                  if cell == ' ' and maze and maze[y][x] in '.o')
+                    if not maze or layout_key(message["maze"]) != layout:
+                        layout = layout_key(message["maze"])
+                        unit_width, unit_height = window_unit_size(message["maze"])
+                    maze, entities = message["maze"], list(message["entities"])
+                    labels = {index: type(default_strategy(g_id)).__name__
+                              for index, g_id in message["ghost_ids"].items()}
+                else:
+                    for index, x, y, flags in message["moved"]:
+                        entities[index] = (x, y, flags)
+                    eaten_cells: List[Tile] = []
+                    for x, y, cell in message["cells"]:
+                        if maze[y][x] in '.o' and chr(cell) == ' ':
+                            eaten_cells.append((x, y))
+                        maze[y][x] = chr(cell)
+                    eaten = tuple(eaten_cells)
+                died_at, lives_lost = None, 0
+                if "lives" in message:
+                    if lives is not None and message["lives"] < lives:
+                        died_at, lives_lost = previous_pacman, lives - message["lives"]
+                    lives = message["lives"]
+                pacman = to_tile(entities[0][0], entities[0][1], unit_width, unit_height)
+                ghosts = tuple((labels[index], to_tile(x, y, unit_width, unit_height))
+                               for index, (x, y, flags) in enumerate(entities)
+                               if index in labels and not flags & DEAD_FLAG)
+                yield FrameSample(layout, maze, message["frame"], pacman, ghosts, died_at, lives_lost, eaten)
+                previous_pacman = pacman
+
+
+def simulation_samples(sim: Simulation, frames: int,
+                       controller: Optional[Callable[[Simulation], Optional[int]]] = None,
+                       fps: float = 60.0) -> Iterator[FrameSample]:
+    """
+    Purpose: Runs a simulation for up to `frames` steps (or until the game is over) and yields
+             a FrameSample for the starting frame and after every step, just as a replay of
+             the same game would, but without recording one.
+    Examples:
+        samples = simulation_samples(Simulation(load_game_state("maze.txt")), 36000, Autopilot())
+    """
+    layout = layout_key(sim.maze)
+    labels = [(ghost, type(sim.strategies[ghost.id]).__name__) for ghost in sim.ghosts]
+    unit_width, unit_height = sim.unit_width, sim.unit_height
+    pacman = sim.pacman
+
+    def sample(died_at: Optional[Tile], lives_lost: int, eaten: Tuple[Tile, ...]) -> FrameSample:
+        ghosts = tuple((label, to_tile(ghost.x, ghost.y, unit_width, unit_height))
+                       for ghost, label in labels if not ghost.dead)
+        return FrameSample(layout, sim.maze, sim.frame, to_tile(pacman.x, pacman.y, unit_width, unit_height),
+                           ghosts, died_at, lives_lost, eaten)
+
+    yield sample(None, 0, ())
+    for _ in range(frames):
+        if sim.over:
+            return
+        before = to_tile(pacman.x, pacman.y, unit_width, unit_height)
+        lives = pacman.lives
+        sim.step(controller(sim) if controller is not None else None, 1 / fps)
+        eaten = tuple((x, y) for x, y in sim.changed_cells if sim.maze[y][x] == ' ')
+        yield sample(before if pacman.lives < lives else None, lives - pacman.lives, eaten)
+
+
+class TileHeatmap:
+    """
+    Purpose: Counts tile events for one maze layout in constant memory. Events are buffered as
+             flat tile indices and folded into per-layer totals with np.bincount every `chunk`
+             events, so memory stays fixed however many frames are streamed through.
+    Examples:
+        heatmap = TileHeatmap(maze)
+        heatmap.update(sample)
+        heatmap.layer("pacman")  # -> (rows, columns) array of frames spent on each tile
+    """
+    def __init__(self, maze: List[List[str]], chunk: int = 1 << 16):
+        self.height, self.width = len(maze), len(maze[0])
+        self.cells = self.height * self.width
+        self.chunk = chunk
+        self.walls = np.array([[cell in '#D' for cell in row] for row in maze], dtype=bool)
+        self.maze = [list(row) for row in maze]  # Layout snapshot for rendering
+        self.totals: Dict[str, np.ndarray] = {}
+        self.pending: Dict[str, List[int]] = {}
+        self.pending_weights: Dict[str, List[float]] = {}
+        self.frames = 0
+
+    def add(self, layer: str, tile: Tile, weight: Optional[float] = None) -> None:
+        """
+        Purpose: Counts one event on a tile (or adds `weight` to it). Off-maze tiles are ignored.
+        Examples:
+            heatmap.add("deaths", (9, 11))
+        """
+        x, y = tile
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        indices = self.pending.setdefault(layer, [])
+        indices.append(y * self.width + x)
+        if weight is not None:
+            self.pending_weights.setdefault(layer, []).append(weight)
+        if len(indices) >= self.chunk:
+            self.flush_layer(layer)
+
+    def flush_layer(self, layer: str) -> None:
+        indices = self.pending.get(layer)
+        if not indices:
+            return
+        weights = self.pending_weights.pop(layer, None)
+        counts = np.bincount(np.array(indices, dtype=np.intp), weights=weights, minlength=self.cells)
+        if layer in self.totals:
+            self.totals[layer] += counts
+        else:
+            self.totals[layer] = counts
+        indices.clear()
+
+    def flush(self) -> None:
+        for layer in list(self.pending):
+            self.flush_layer(layer)
+
+    def update(self, sample: FrameSample) -> None:
+        self.frames += 1
+        self.add(PACMAN_LAYER, sample.pacman)
+        for label, tile in sample.ghosts:
+            self.add(label, tile)
+        if sample.died_at is not None:
+            for _ in range(sample.lives_lost):
+                self.add(DEATHS_LAYER, sample.died_at)
+        for tile in sample.eaten:
+            self.add(PELLETS_LAYER, tile)
+            self.add(PELLET_FRAMES_LAYER, tile, float(sample.frame))
+
+    @property
+    def layers(self) -> List[str]:
+        return sorted(set(self.totals) | set(self.pending))
+
+    def layer(self, name: str) -> np.ndarray:
+        """
+        Purpose: Returns a layer's totals as a (rows, columns) array (zeros if nothing was counted).
+        Examples:
+            heatmap.layer("deaths").sum() -> lives lost
+        """
+        self.flush_layer(name)
+        counts = self.totals.get(name)
+        if counts is None:
+            return np.zeros((self.height, self.width), dtype=np.int64)
+        return counts.reshape(self.height, self.width)
+
+    def mean_pellet_frame(self) -> np.ndarray:
+        """
+        Purpose: Returns the mean frame each tile's pellet was eaten on, NaN where none was.
+        Examples:
+            heatmap.mean_pellet_frame()[11, 8] -> 41.0
+        """
+        eaten = self.layer(PELLETS_LAYER)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(eaten > 0, self.layer(PELLET_FRAMES_LAYER) / eaten, np.nan)
+
+    def save(self, file_path: str) -> None:
+        """
+        Purpose: Writes every layer, the mean pellet timings and the wall mask to a .npz file.
+        Examples:
+            heatmap.save("heatmaps/maze.npz")
+        """
+        arrays: Dict[str, Any] = {name: self.layer(name) for name in self.layers}
+        arrays.update(mean_pellet_frame=self.mean_pellet_frame(), walls=self.walls, frames=np.array(self.frames))
+        np.savez_compressed(file_path, **arrays)
+
+    def render(self, name: str, file_path: Optional[str] = None) -> pygame.Surface:
+        """
+        Purpose: Draws a layer over the maze, from transparent (never) through yellow to red
+                 (most often) on a log scale, and saves it as a PNG if `file_path` is given.
+        Examples:
+            heatmap.render("deaths", "heatmaps/deaths.png")
+        """
+        values = self.mean_pellet_frame() if name == "mean_pellet_frame" else self.layer(name).astype(float)
+        values = np.nan_to_num(values, nan=0.0)
+        scaled = np.log1p(values)
+        if scaled.max() > 0:
+            scaled /= scaled.max()
+        rgba = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        rgba[..., 0] = 255
+        rgba[..., 1] = (255 * (1 - scaled)).astype(np.uint8)
+        rgba[..., 3] = np.where(values > 0, 80 + 150 * scaled, 0).astype(np.uint8)
+        overlay = pygame.image.frombuffer(rgba.tobytes(), (self.width, self.height), 'RGBA')
+        surface = render_background(self.maze)
+        unit_width, unit_height = window_unit_size(self.maze)
+        surface.blit(pygame.transform.scale(overlay, (self.width * unit_width, self.height * unit_height)), (0, 0))
+        if file_path is not None:
+            pygame.image.save(surface, file_path)
+        return surface
+
+
+def accumulate(samples: Iterable[FrameSample], heatmaps: Optional[Dict[int, TileHeatmap]] = None,
+               chunk: int = 1 << 16) -> Dict[int, TileHeatmap]:
+    """
+    Purpose: Folds a stream of samples into one TileHeatmap per maze layout and returns them.
+             Pass the result back in to keep adding replays to the same heatmaps.
+    Examples:
+        heatmaps = accumulate(replay_samples("a.prpl"))
+        heatmaps = accumulate(replay_samples("b.prpl"), heatmaps)
+    """
+    heatmaps = heatmaps if heatmaps is not None else {}
+    heatmap: Optional[TileHeatmap] = None
+    layout: Optional[int] = None
+    for sample in samples:
+        if heatmap is None or sample.layout != layout:
+            layout = sample.layout
+            if layout not in heatmaps:
+                heatmaps[layout] = TileHeatmap(sample.maze, chunk)
+            heatmap = heatmaps[layout]
+        heatmap.update(sample)
+    return heatmaps
+
+
+def export(heatmaps: Dict[int, TileHeatmap], directory: str) -> List[str]:
+    """
+    Purpose: Saves each layout's arrays and a PNG overlay per layer into `directory` and returns
+             the paths written.
+    Examples:
+        export(heatmaps, "heatmaps") -> ["heatmaps/1a2b3c4d.npz", "heatmaps/1a2b3c4d_deaths.png", ...]
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for layout, heatmap in heatmaps.items():
+        prefix = os.path.join(directory, f"{layout:08x}")
+        heatmap.save(prefix + ".npz")
+        written.append(prefix + ".npz")
+        for name in heatmap.layers + ["mean_pellet_frame"]:
+            if name == PELLET_FRAMES_LAYER:
+                continue
+            heatmap.render(name, f"{prefix}_{name}.png")
+            written.append(f"{prefix}_{name}.png")
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Purpose: Command-line entry point: builds heatmaps from replays and/or simulated games.
+    Examples:
+        python heatmaps.py runs/*.prpl --out heatmaps
+        python heatmaps.py --simulate 20 --frames 3600 --autopilot --out heatmaps
+    """
+    parser = argparse.ArgumentParser(description="Build tile heatmaps from Pacman replays or simulations.")
+    parser.add_argument("replays", nargs="*")
+    parser.add_argument("--simulate", type=int, default=0, help="Number of headless games to add")
+    parser.add_argument("--frames", type=int, default=3600, help="Frame limit per simulated game")
+    parser.add_argument("--maze", default="maze.txt")
+    parser.add_argument("--autopilot", action="store_true", help="Let the MCTS bot play the simulated games")
+    parser.add_argument("--out", default="heatmaps")
+    args = parser.parse_args(argv)
+
+    heatmaps: Dict[int, TileHeatmap] = {}
+    for path in args.replays:
+        accumulate(replay_samples(path), heatmaps)
+    for game in range(args.simulate):
+        controller = Autopilot(budget=0.005, seed=game) if args.autopilot else None
+        sim = Simulation(load_game_state(args.maze))
+        accumulate(simulation_samples(sim, args.frames, controller), heatmaps)
+    for layout, heatmap in heatmaps.items():
+        print(f"layout {layout:08x}: {heatmap.frames} frames, {int(heatmap.layer(DEATHS_LAYER).sum())} deaths")
+    for path in export(heatmaps, args.out):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+""" Cached text rendering and the score/lives HUD. """
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import pygame
+
+HUD_HEIGHT = 70  # Height of the HUD strip at the bottom of the window
+
+
+class TextCache:
+    """
+    Purpose: Keeps rendered text surfaces keyed by (string, color, font) so text that does not
+             change is rasterized once. The least recently used entries are dropped past `capacity`.
+    Examples:
+        cache = TextCache()
+        cache.render(font, "Score: 10", 'white')  # Rendered with font.render
+        cache.render(font, "Score: 10", 'white')  # Same surface, no rendering
+        cache.renders -> 1
+    """
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.surfaces: "OrderedDict[Tuple[str, Any, Any], pygame.Surface]" = OrderedDict()
+        self.renders = 0
+
+    def render(self, font: pygame.font.Font, text: str, color: Any) -> pygame.Surface:
+        key = (text, color, font)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = font.render(text, True, color)
+        self.renders += 1
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+def load_life_image(size: int = 30) -> pygame.Surface:
+    """
+    Purpose: Loads the icon used for each remaining life, or a yellow circle if it is missing.
+    Examples:
+        load_life_image().get_size() -> (30, 30)
+    """
+    try:
+        return pygame.transform.scale(pygame.image.load('assets/pacman_images/1.png'), (size, size))
+    except (pygame.error, FileNotFoundError) as e:
+        print(f"Error loading life image: {e}")
+        image = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(image, 'yellow', (size // 2, size // 2), size // 2)
+        return image
+
+
+class Hud:
+    """
+    Purpose: Draws the score, high score and lives strip at the bottom of the window. The strip
+             is composed into its own surface, which is rebuilt only when one of the values
+             changes; every other frame costs a single blit. `draw` returns the HUD rect when it
+             was rebuilt (for pygame.display.update) and None otherwise. A `scale` other than 1
+             lays the strip out for a render target smaller or larger than the window.
+    Examples:
+        hud = Hud(font, WIDTH, HEIGHT)
+        hud.draw(screen, score=10, high_score=50, lives=3)  # -> Rect(0, 830, 760, 70)
+        hud.draw(screen, score=10, high_score=50, lives=3)  # -> None, cached strip reused
+        Hud(font, 380, 450, scale=0.5).rect -> Rect(0, 415, 380, 35)
+    """
+    def __init__(self, font: pygame.font.Font, width: int, height: int, text_cache: Optional[TextCache] = None,
+                 scale: float = 1.0):
+        self.font = font
+        self.width = width
+        self.height = height
+        self.scale = scale
+        strip = self.scaled(HUD_HEIGHT)
+        self.rect = pygame.Rect(0, height - strip, width, strip)
+        self.text_cache = text_cache if text_cache is not None else TextCache()
+        self.surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.life_image: Optional[pygame.Surface] = None
+        self.values: Optional[Tuple[int, int, int]] = None  # (score, high score, lives) on the strip
+
+    def scaled(self, length: int) -> int:
+        return max(1, round(length * self.scale))
+
+    def draw(self, screen: pygame.Surface, score: int, high_score: int, lives: int) -> Optional[pygame.Rect]:
+        dirty = None
+        if self.values != (score, high_score, lives):
+            self.rebuild(score, high_score, lives)
+            dirty = self.rect
+        screen.blit(self.surface, self.rect)
+        return dirty
+
+    def rebuild(self, score: int, high_score: int, lives: int) -> None:
+        """
+        Purpose: Redraws the HUD strip for new values; positions match the original layout.
+        Examples:
+            hud.rebuild(score=10, high_score=50, lives=2)
+        """
+        if self.life_image is None:
+            self.life_image = load_life_image(self.scaled(30))
+        scaled = self.scaled
+        top = self.rect.top
+        self.surface.fill((0, 0, 0, 0))
+        self.surface.blit(self.text_cache.render(self.font, f'Score: {score}', 'white'),
+                          (scaled(10), self.height - scaled(35) - top))
+        self.surface.blit(self.text_cache.render(self.font, f'High Score: {high_score}', 'white'),
+                          (scaled(10), self.height - scaled(70) - top))
+        for i in range(lives):
+            self.surface.blit(self.life_image, (self.width - scaled(100) + i * scaled(40), self.height - scaled(35) - top))
+        self.values = (score, high_score, lives)
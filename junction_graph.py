@@ -0,0 +1,105 @@
+""" The maze compiled into junctions and the corridors between them, for ghost decisions. """
+from typing import Dict, List, NamedTuple, Set, Tuple
+from board import VersionedMaze, get_valid_moves
+from decision_cache import MISSING
+from ghost import decision_cache
+
+Tile = Tuple[int, int]
+
+
+class Corridor(NamedTuple):
+    """ The tiles walked from a tile to the next junction, and where the walk changes direction. """
+    tiles: Tuple[Tile, ...]  # Every tile after the start, ending at the junction (or back at the start on a loop)
+    waypoints: Tuple[Tile, ...]  # The tiles where each straight run ends, the last one being `end`
+
+    @property
+    def length(self) -> int:
+        return len(self.tiles)
+
+    @property
+    def end(self) -> Tile:
+        return self.tiles[-1]
+
+
+class JunctionGraph:
+    """
+    Purpose: Compiles a maze into a graph whose nodes are junctions (open tiles with other than
+             two open neighbours: forks, crossings and dead ends) and whose edges are the
+             corridors between them, with their lengths. Inside a corridor a ghost can only
+             go on or turn back, so strategies only need to decide at junctions. Corridors
+             are walked lazily and remembered, so a graph can also be entered mid-corridor.
+    Examples:
+        graph = JunctionGraph([list("#####"), list("#...#"), list("#.#.#"), list("#...#"), list("#####")])
+        graph.junctions -> set()  # A loop without forks
+        graph.corridor((1, 1), (2, 1)).waypoints -> ((3, 1), (3, 3), (1, 3), (1, 1))
+    """
+    def __init__(self, maze: List[List[str]]):
+        self.neighbours: Dict[Tile, List[Tile]] = {}
+        for y, row in enumerate(maze):
+            for x, cell in enumerate(row):
+                if cell != '#':
+                    self.neighbours[(x, y)] = get_valid_moves(maze, (x, y))
+        self.junctions: Set[Tile] = {tile for tile, moves in self.neighbours.items() if len(moves) != 2}
+        self.corridors: Dict[Tuple[Tile, Tile], Corridor] = {}
+
+    def is_junction(self, tile: Tile) -> bool:
+        return tile in self.junctions
+
+    def corridor(self, start: Tile, step: Tile) -> Corridor:
+        """
+        Purpose: Returns the corridor walked from `start` through its neighbour `step` up to the
+                 next junction, or back round to `start` on a loop without junctions.
+        Examples:
+            graph.corridor((1, 1), (2, 1)).length -> 8
+        """
+        key = (start, step)
+        corridor = self.corridors.get(key)
+        if corridor is not None:
+            return corridor
+        tiles = [step]
+        waypoints = []
+        previous, current = start, step
+        direction = (step[0] - start[0], step[1] - start[1])
+        while current not in self.junctions and current != start:
+            following = next(tile for tile in self.neighbours[current] if tile != previous)
+            turn = (following[0] - current[0], following[1] - current[1])
+            if turn != direction:
+                waypoints.append(current)
+                direction = turn
+            previous, current = current, following
+            tiles.append(current)
+        waypoints.append(current)
+        corridor = self.corridors[key] = Corridor(tuple(tiles), tuple(waypoints))
+        return corridor
+
+    def exits(self, junction: Tile) -> Dict[Tile, Corridor]:
+        """
+        Purpose: Returns the corridors leaving a tile, by their first step.
+        Examples:
+            {step: c.end for step, c in graph.exits((9, 3)).items()}  # The junctions next to (9, 3)
+        """
+        return {step: self.corridor(junction, step) for step in self.neighbours.get(junction, [])}
+
+    def edges(self) -> Dict[Tile, List[Tuple[Tile, int]]]:
+        """
+        Purpose: Returns the junction graph as adjacency lists of (junction, corridor length).
+        Examples:
+            graph.edges()[(4, 1)] -> [((4, 3), 2), ((8, 3), 6), ((1, 3), 5)]  # maze.txt
+        """
+        return {junction: [(c.end, c.length) for c in self.exits(junction).values()] for junction in self.junctions}
+
+
+def junction_graph(maze: List[List[str]]) -> JunctionGraph:
+    """
+    Purpose: Returns the JunctionGraph of a maze, built once per wall-and-door layout for a
+             VersionedMaze (eating pellets does not change it) and shared by every game on it.
+    Examples:
+        junction_graph(sim.maze) is junction_graph(other_sim.maze) -> True  # Same layout
+    """
+    if not isinstance(maze, VersionedMaze):
+        return JunctionGraph(maze)
+    key = ("graph", maze.layout_id)
+    graph = decision_cache.get(key, maze)
+    if graph is MISSING:
+        graph = decision_cache.put(key, JunctionGraph(maze), maze)
+    return graph
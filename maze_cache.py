@@ -0,0 +1,130 @@
+""" Compiled maze cache shared by every launch and worker process. """
+import hashlib
+import os
+import struct
+from typing import Dict, Optional, Tuple
+from maze_loader import PackedMaze, load_maze
+
+CACHE_DIR = ".maze_cache"
+CACHE_MAGIC = b'PMZ1'
+
+# magic, source mtime_ns, source size, source sha256, pacman x, pacman y, width, height, ghost count
+_HEADER = struct.Struct('<4sqq32siiiiI')
+_GHOST = struct.Struct('<Hii')
+
+
+def source_digest(file_path: str) -> bytes:
+    """
+    Purpose: Returns the SHA-256 digest of a file's contents, read in fixed-size chunks.
+    Examples:
+        source_digest("maze.txt")  # -> 32 raw bytes
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def cache_path_for(file_path: str, cache_dir: str = CACHE_DIR) -> str:
+    """
+    Purpose: Returns the location of the compiled cache entry for a maze source file.
+             Entries are named by a hash of the absolute source path.
+    Examples:
+        cache_path_for("maze.txt")  # -> ".maze_cache/3f1c...e2.pmz"
+    """
+    name = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{name}.pmz")
+
+
+def encode_compiled_maze(stat: os.stat_result, digest: bytes, pacman_pos: Optional[Tuple[int, int]],
+                         ghost_positions: Dict[str, Tuple[int, int]], packed: PackedMaze) -> bytes:
+    """
+    Purpose: Serializes a parsed maze into the compiled binary form: a fixed header keyed by
+             the source mtime, size and hash, followed by the ghost spawns and the raw cells.
+    Examples:
+        data = encode_compiled_maze(os.stat("maze.txt"), source_digest("maze.txt"), (9, 11), {"G1": (8, 9)}, packed)
+    """
+    px, py = pacman_pos if pacman_pos is not None else (-1, -1)
+    parts = [_HEADER.pack(CACHE_MAGIC, stat.st_mtime_ns, stat.st_size, digest, px, py,
+                          packed.width, packed.height, len(ghost_positions))]
+    for ghost_id, (gx, gy) in ghost_positions.items():
+        encoded_id = ghost_id.encode('utf-8')
+        parts.append(_GHOST.pack(len(encoded_id), gx, gy))
+        parts.append(encoded_id)
+    parts.append(bytes(packed.cells))
+    return b''.join(parts)
+
+
+def decode_compiled_maze(data: bytes) -> Tuple[Optional[Tuple[int, int]], Dict[str, Tuple[int, int]], PackedMaze]:
+    """
+    Purpose: Rebuilds the positions and PackedMaze from bytes written by encode_compiled_maze.
+    Examples:
+        pacman_pos, ghost_positions, packed = decode_compiled_maze(data)
+    """
+    _, _, _, _, px, py, width, height, ghost_count = _HEADER.unpack_from(data, 0)
+    offset = _HEADER.size
+    ghost_positions = {}
+    for _ in range(ghost_count):
+        id_length, gx, gy = _GHOST.unpack_from(data, offset)
+        offset += _GHOST.size
+        ghost_positions[data[offset:offset + id_length].decode('utf-8')] = (gx, gy)
+        offset += id_length
+    cells = bytearray(data[offset:offset + width * height])
+    if len(cells) != width * height:
+        raise ValueError("Compiled maze is truncated.")
+    pacman_pos = (px, py) if px >= 0 else None
+    return pacman_pos, ghost_positions, PackedMaze(width=width, height=height, cells=cells)
+
+
+def load_compiled_maze(file_path: str, cache_dir: str = CACHE_DIR) -> Tuple[Optional[Tuple[int, int]], Dict[str, Tuple[int, int]], PackedMaze]:
+    """
+    Purpose: Loads a maze (TXT or CSV) through the compiled cache. A cache entry whose recorded
+             mtime and size match the source is used without touching the source; if only the
+             mtime changed, the source hash decides. Otherwise the maze is parsed and a fresh
+             entry is written.
+    Examples:
+        pacman_pos, ghost_positions, packed = load_compiled_maze("maze.txt")
+        # The first call parses maze.txt; later calls read .maze_cache/<key>.pmz instead.
+    """
+    stat = os.stat(file_path)
+    cache_path = cache_path_for(file_path, cache_dir)
+    digest = None
+    try:
+        with open(cache_path, 'rb') as file:
+            data = file.read()
+        magic, mtime_ns, size, cached_digest = _HEADER.unpack_from(data, 0)[:4]
+        if magic == CACHE_MAGIC and size == stat.st_size:
+            if mtime_ns == stat.st_mtime_ns:
+                return decode_compiled_maze(data)
+            digest = source_digest(file_path)
+            if digest == cached_digest:
+                # Same contents under a new mtime: refresh the key so the next launch skips hashing
+                compiled = decode_compiled_maze(data)
+                write_cache_entry(cache_path, encode_compiled_maze(stat, digest, *compiled))
+                return compiled
+    except (OSError, struct.error, ValueError):
+        pass  # Missing or corrupt cache entries are simply rebuilt
+
+    pacman_pos, ghost_positions, packed = load_maze(file_path)
+    if digest is None:
+        digest = source_digest(file_path)
+    write_cache_entry(cache_path, encode_compiled_maze(stat, digest, pacman_pos, ghost_positions, packed))
+    return pacman_pos, ghost_positions, packed
+
+
+def write_cache_entry(cache_path: str, data: bytes) -> None:
+    """
+    Purpose: Writes a compiled cache entry atomically (temporary file, then rename) so that
+             concurrent workers never read a partial file. Failures are reported, not raised.
+    Examples:
+        write_cache_entry(".maze_cache/3f1c...e2.pmz", data)
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"Error writing maze cache: {e}")
@@ -0,0 +1,217 @@
+""" Seeded procedural maze generator for stress tests and benchmark fixtures. """
+import argparse
+import random
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+MIN_SIZE = 15
+MAX_SIZE = 2000
+
+
+@dataclass
+class GeneratedMaze:
+    """ A generated maze together with its spawn positions. """
+    rows: List[bytearray]
+    pacman_pos: Tuple[int, int]
+    ghost_positions: Dict[str, Tuple[int, int]]
+
+    def lines(self) -> Iterator[str]:
+        """
+        Purpose: Yields the maze in the maze.txt layout one line at a time (headers, a blank
+                 separator, then one line per row), so huge mazes can be streamed to a file.
+        Examples:
+            maze = generate_maze(20, 20, seed=1)
+            next(maze.lines()) -> "PacmanPos 9 12\\n"
+        """
+        yield f"PacmanPos {self.pacman_pos[0]} {self.pacman_pos[1]}\n"
+        for ghost_id, (gx, gy) in self.ghost_positions.items():
+            yield f"GhostPos {ghost_id} {gx} {gy}\n"
+        yield "\n"
+        for row in self.rows:
+            yield row.decode('ascii') + "\n"
+
+    def to_grid(self) -> List[List[str]]:
+        """
+        Purpose: Returns the maze in the List[List[str]] layout used by GameState.
+        Examples:
+            generate_maze(20, 20, seed=1).to_grid()[0][0] -> '#'
+        """
+        return [list(row.decode('ascii')) for row in self.rows]
+
+
+def carve_passages(rows: List[bytearray], rng: random.Random) -> None:
+    """
+    Purpose: Carves a spanning tree of corridors through the odd-coordinate lattice cells
+             with an iterative depth-first search, so every lattice cell is reachable.
+    Examples:
+        rows = [bytearray(b'#' * 5) for _ in range(5)]
+        carve_passages(rows, random.Random(0))  # rows[1][1] -> ord(' ')
+    """
+    height, width = len(rows), len(rows[0])
+    steps = [(2, 0), (-2, 0), (0, 2), (0, -2)]
+    rows[1][1] = ord(' ')
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        options = [(dx, dy) for dx, dy in steps
+                   if 0 < x + dx < width - 1 and 0 < y + dy < height - 1 and rows[y + dy][x + dx] == ord('#')]
+        if not options:
+            stack.pop()
+            continue
+        dx, dy = rng.choice(options)
+        rows[y + dy // 2][x + dx // 2] = ord(' ')
+        rows[y + dy][x + dx] = ord(' ')
+        stack.append((x + dx, y + dy))
+
+
+def add_loops(rows: List[bytearray], rng: random.Random, loop_density: float) -> None:
+    """
+    Purpose: Turns the tree into a Pac-Man style braid: every dead end is opened into a
+             neighbouring corridor, and any other wall separating two lattice cells is
+             removed with probability `loop_density`.
+    Examples:
+        add_loops(rows, random.Random(0), loop_density=0.1)
+    """
+    height, width = len(rows), len(rows[0])
+    wall, space = ord('#'), ord(' ')
+    sides = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    for y in range(1, height - 1, 2):
+        for x in range(1, width - 1, 2):
+            openable = [(dx, dy) for dx, dy in sides
+                        if rows[y + dy][x + dx] == wall and 0 < x + 2 * dx < width - 1 and 0 < y + 2 * dy < height - 1]
+            if not openable:
+                continue
+            open_sides = sum(1 for dx, dy in sides if rows[y + dy][x + dx] != wall)
+            if open_sides <= 1 or rng.random() < loop_density:
+                # Dead ends are always opened; other walls only at the loop density
+                dx, dy = rng.choice(openable)
+                rows[y + dy][x + dx] = space
+
+
+def place_ghost_house(rows: List[bytearray], ghost_count: int) -> Tuple[Tuple[int, int], Dict[str, Tuple[int, int]]]:
+    """
+    Purpose: Builds a walled ghost house with a 'D' door in the centre of the maze, clears a
+             corridor ring around it, and returns Pacman's spawn (below the house) and the
+             ghost spawns inside it.
+    Examples:
+        pacman_pos, ghost_positions = place_ghost_house(rows, 3)
+        # ghost_positions -> {"G1": (..), "G2": (..), "G3": (..)}
+    """
+    height, width = len(rows), len(rows[0])
+    house_width = min(max(7, (ghost_count + 2) // 3 + 2), width - 6)
+    house_height = 5
+    left = (width - house_width) // 2
+    top = (height - house_height) // 2
+    right, bottom = left + house_width - 1, top + house_height - 1
+
+    for y in range(top - 1, bottom + 2):
+        for x in range(left - 1, right + 2):
+            if x in (left - 1, right + 1) or y in (top - 1, bottom + 1):
+                rows[y][x] = ord(' ')  # Corridor ring around the house
+            elif x in (left, right) or y in (top, bottom):
+                rows[y][x] = ord('#')
+            else:
+                rows[y][x] = ord('H')  # House interior, kept free of dots
+    rows[top][(left + right) // 2] = ord('D')
+
+    interior = [(x, y) for y in range(top + 1, bottom) for x in range(left + 1, right)]
+    if ghost_count > len(interior):
+        raise ValueError(f"Ghost house too small for {ghost_count} ghosts.")
+    ghost_positions = {f"G{i + 1}": interior[i] for i in range(ghost_count)}
+    pacman_pos = ((left + right) // 2, bottom + 1)
+    return pacman_pos, ghost_positions
+
+
+def generate_maze(width: int, height: int, seed: int = 0, loop_density: float = 0.1,
+                  ghost_count: int = 3, power_pellets: int = 4) -> GeneratedMaze:
+    """
+    Purpose: Generates a valid, fully connected Pac-Man style maze from a seed. The maze has
+             a solid border, no dead ends, extra loops controlled by `loop_density`, a central
+             ghost house with a 'D' door holding `ghost_count` ghost spawns, and power pellets
+             ('o') starting in the corners. The same arguments always produce the same maze.
+    Examples:
+        maze = generate_maze(20, 20, seed=1)
+        maze = generate_maze(2000, 2000, seed=7, loop_density=0.3, ghost_count=50, power_pellets=64)
+    """
+    if not MIN_SIZE <= width <= MAX_SIZE or not MIN_SIZE <= height <= MAX_SIZE:
+        raise ValueError(f"Maze size must be between {MIN_SIZE} and {MAX_SIZE}, got {width}x{height}.")
+    if not 0 <= loop_density <= 1:
+        raise ValueError(f"Loop density must be between 0 and 1, got {loop_density}.")
+    rng = random.Random(seed)
+    rows = [bytearray(b'#' * width) for _ in range(height)]
+    carve_passages(rows, rng)
+    add_loops(rows, rng, loop_density)
+    pacman_pos, ghost_positions = place_ghost_house(rows, ghost_count)
+
+    # Fill every corridor with dots, then restore the empty house interior
+    for y, row in enumerate(rows):
+        rows[y] = bytearray(row.replace(b' ', b'.').replace(b'H', b' '))
+
+    # Power pellets go to the corridor cells nearest the corners, then at random
+    last_x = width - 2 if width % 2 == 1 else width - 3  # Last odd (lattice) column
+    last_y = height - 2 if height % 2 == 1 else height - 3
+    candidates = [(1, 1), (last_x, 1), (1, last_y), (last_x, last_y)]
+    placed = 0
+    for _ in range(power_pellets * 100):
+        if placed == power_pellets:
+            break
+        x, y = candidates.pop(0) if candidates else (rng.randrange(1, width - 1), rng.randrange(1, height - 1))
+        if rows[y][x] == ord('.') and (x, y) != pacman_pos:
+            rows[y][x] = ord('o')
+            placed += 1
+
+    return GeneratedMaze(rows=rows, pacman_pos=pacman_pos, ghost_positions=ghost_positions)
+
+
+def write_maze(file: TextIO, maze: GeneratedMaze) -> None:
+    """
+    Purpose: Streams a generated maze to an open text file in the maze.txt format.
+    Examples:
+        with open("maze_200.txt", "w") as file:
+            write_maze(file, generate_maze(200, 200, seed=3))
+    """
+    for line in maze.lines():
+        file.write(line)
+
+
+def write_fixture(file_path: str, width: int, height: int, seed: int = 0, **options: Any) -> str:
+    """
+    Purpose: Writes a generated maze to `file_path` for use as a benchmark or test fixture
+             and returns the path, so fixtures can be produced inline. `options` are passed
+             on to generate_maze.
+    Examples:
+        parse_game_state_from_txt(write_fixture("/tmp/maze_500.txt", 500, 500, seed=1))
+    """
+    with open(file_path, 'w') as file:
+        write_maze(file, generate_maze(width, height, seed, **options))
+    return file_path
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Purpose: Command-line entry point: writes a generated maze to a file or to stdout.
+    Examples:
+        python maze_generator.py 200x200 --seed 3 -o maze_200.txt
+        python maze_generator.py 2000x2000 --loops 0.3 --ghosts 40 > huge.txt
+    """
+    parser = argparse.ArgumentParser(description="Generate a Pac-Man maze in the maze.txt format.")
+    parser.add_argument("size", help="maze size as WIDTHxHEIGHT, e.g. 200x200")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--loops", type=float, default=0.1, help="loop density between 0 and 1")
+    parser.add_argument("--ghosts", type=int, default=3)
+    parser.add_argument("--pellets", type=int, default=4, help="number of power pellets")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    width, height = (int(part) for part in args.size.lower().split('x'))
+    maze = generate_maze(width, height, args.seed, args.loops, args.ghosts, args.pellets)
+    if args.output:
+        with open(args.output, 'w') as file:
+            write_maze(file, maze)
+    else:
+        write_maze(sys.stdout, maze)
+
+
+if __name__ == "__main__":
+    main()
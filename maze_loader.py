@@ -0,0 +1,206 @@
+""" Streaming maze loading and validation. """
+import csv
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# Every character a maze row may contain: wall, dot, power pellet, ghost door, empty.
+MAZE_ALPHABET = b'#.oD '
+
+
+class MazeFormatError(ValueError):
+    """ A maze file error that remembers the 1-based line and column it was found at. """
+    def __init__(self, message: str, line: int, column: int = 0):
+        location = f"line {line}" if column == 0 else f"line {line}, column {column}"
+        super().__init__(f"{location}: {message}")
+        self.line = line
+        self.column = column
+
+
+@dataclass
+class PackedMaze:
+    """ A maze stored row-major as one byte per cell. """
+    width: int
+    height: int
+    cells: bytearray
+
+    def cell(self, x: int, y: int) -> str:
+        """
+        Purpose: Returns the character stored at column x, row y.
+        Examples:
+            packed = PackedMaze(width=3, height=1, cells=bytearray(b'#.#'))
+            packed.cell(1, 0) -> '.'
+        """
+        return chr(self.cells[y * self.width + x])
+
+    def set_cell(self, x: int, y: int, value: str) -> None:
+        """
+        Purpose: Overwrites the character stored at column x, row y.
+        Examples:
+            packed = PackedMaze(width=3, height=1, cells=bytearray(b'#.#'))
+            packed.set_cell(1, 0, ' ')  # packed.cell(1, 0) -> ' '
+        """
+        self.cells[y * self.width + x] = ord(value)
+
+    def to_rows(self) -> List[List[str]]:
+        """
+        Purpose: Expands the packed grid into the List[List[str]] layout used by GameState.
+        Examples:
+            PackedMaze(width=2, height=2, cells=bytearray(b'#.o#')).to_rows()
+            # -> [["#", "."], ["o", "#"]]
+        """
+        text = self.cells.decode('ascii')
+        return [list(text[y * self.width:(y + 1) * self.width]) for y in range(self.height)]
+
+
+def parse_header_line(line: str, line_no: int, ghost_positions: Dict[str, Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+    """
+    Purpose: Parses one PacmanPos/GhostPos header line. Ghost positions are stored into
+             `ghost_positions`; a Pacman position is returned, otherwise None.
+    Examples:
+        ghosts = {}
+        parse_header_line("PacmanPos 1 1", 1, ghosts) -> (1, 1)
+        parse_header_line("GhostPos G1 2 2", 2, ghosts) -> None  # ghosts -> {"G1": (2, 2)}
+        parse_header_line("PacmanPos 1", 1, ghosts)  # Raises MazeFormatError
+    """
+    parts = line.split()
+    try:
+        if parts[0] == "PacmanPos" and len(parts) == 3:
+            return (int(parts[1]), int(parts[2]))
+        if parts[0] == "GhostPos" and len(parts) == 4:
+            ghost_positions[parts[1]] = (int(parts[2]), int(parts[3]))
+            return None
+    except ValueError:
+        pass
+    raise MazeFormatError(f"Invalid header line: {line.strip()}", line_no)
+
+
+def read_maze_header(file: BinaryIO) -> Tuple[Optional[Tuple[int, int]], Dict[str, Tuple[int, int]], int]:
+    """
+    Purpose: Reads header lines from a binary maze file up to and including the blank
+             separator line, leaving the file positioned at the first maze row.
+             Returns the Pacman position, ghost positions and the number of lines read.
+    Examples:
+        with open("maze.txt", "rb") as file:
+            pacman_pos, ghost_positions, line_no = read_maze_header(file)
+            # pacman_pos -> (9, 11), line_no -> 5
+    """
+    pacman_pos = None
+    ghost_positions: Dict[str, Tuple[int, int]] = {}
+    line_no = 0
+    for raw in iter(file.readline, b''):
+        line_no += 1
+        line = raw.decode('ascii', errors='replace')
+        if not line.strip():
+            break
+        position = parse_header_line(line, line_no, ghost_positions)
+        if position is not None:
+            pacman_pos = position
+    return pacman_pos, ghost_positions, line_no
+
+
+def check_maze_row(row: bytes, line_no: int, expected_width: int) -> None:
+    """
+    Purpose: Validates a single maze row against the cell alphabet and the expected width,
+             raising MazeFormatError with the offending line and column.
+    Examples:
+        check_maze_row(b'#.o#', 6, 4)  # No error
+        check_maze_row(b'#.x#', 6, 4)  # Raises MazeFormatError: line 6, column 3: ...
+        check_maze_row(b'#.#', 6, 4)   # Raises MazeFormatError: line 6: ...
+    """
+    if row.translate(None, MAZE_ALPHABET):
+        for column, value in enumerate(row, start=1):
+            if value not in MAZE_ALPHABET:
+                raise MazeFormatError(f"Invalid maze cell {chr(value)!r}.", line_no, column)
+    if len(row) != expected_width:
+        raise MazeFormatError(f"Maze row length {len(row)} doesn't match expected {expected_width}.", line_no)
+
+
+def iter_maze_rows(file: BinaryIO, line_no: int = 0) -> Iterator[bytes]:
+    """
+    Purpose: Streams validated maze rows from a binary file one line at a time. The width
+             of the first row fixes the expected width of every later row; whitespace-only
+             lines are skipped. `line_no` is the number of lines already consumed.
+    Examples:
+        with open("maze.txt", "rb") as file:
+            _, _, line_no = read_maze_header(file)
+            rows = list(iter_maze_rows(file, line_no))  # rows[0] -> b'###################'
+    """
+    expected_width = -1
+    for raw in file:
+        line_no += 1
+        row = raw.rstrip(b'\r\n')
+        if not row.strip():
+            continue
+        if expected_width < 0:
+            expected_width = len(row)
+        check_maze_row(row, line_no, expected_width)
+        yield row
+
+
+def load_packed_maze(file_path: str) -> Tuple[Optional[Tuple[int, int]], Dict[str, Tuple[int, int]], PackedMaze]:
+    """
+    Purpose: Loads a maze file in a single streaming pass straight into a PackedMaze,
+             without ever holding the file or a list-of-lists grid in memory.
+    Examples:
+        pacman_pos, ghost_positions, packed = load_packed_maze("maze.txt")
+        # packed.width -> 19, packed.height -> 21
+    """
+    cells = bytearray()
+    height = 0
+    with open(file_path, 'rb') as file:
+        pacman_pos, ghost_positions, line_no = read_maze_header(file)
+        for row in iter_maze_rows(file, line_no):
+            cells += row
+            height += 1
+    if height == 0:
+        raise ValueError("Maze is empty.")
+    return pacman_pos, ghost_positions, PackedMaze(width=len(cells) // height, height=height, cells=cells)
+
+
+def load_csv_maze(file_path: str) -> Tuple[Optional[Tuple[int, int]], Dict[str, Tuple[int, int]], PackedMaze]:
+    """
+    Purpose: Loads a comma-separated maze (one cell per field, PacmanPos/GhostPos header
+             rows first) in a single streaming pass into a PackedMaze.
+    Examples:
+        pacman_pos, ghost_positions, packed = load_csv_maze("CSV/maze.csv")
+        # pacman_pos -> (17, 19), packed.width -> 19
+    """
+    pacman_pos = None
+    ghost_positions: Dict[str, Tuple[int, int]] = {}
+    cells = bytearray()
+    height = 0
+    expected_width = -1
+    with open(file_path, 'r', newline='') as file:
+        for line_no, parts in enumerate(csv.reader(file), start=1):
+            if not parts:
+                continue  # Skip empty lines
+            if height == 0 and parts[0] in ("PacmanPos", "GhostPos"):
+                position = parse_header_line(" ".join(parts), line_no, ghost_positions)
+                if position is not None:
+                    pacman_pos = position
+                continue
+            for column, part in enumerate(parts, start=1):
+                if len(part) != 1:
+                    raise MazeFormatError(f"Invalid maze cell {part!r}.", line_no, column)
+            row = "".join(parts).encode('ascii', errors='replace')
+            if expected_width < 0:
+                expected_width = len(row)
+            check_maze_row(row, line_no, expected_width)
+            cells += row
+            height += 1
+    if height == 0:
+        raise ValueError("Maze is empty.")
+    return pacman_pos, ghost_positions, PackedMaze(width=expected_width, height=height, cells=cells)
+
+
+def load_maze(file_path: str) -> Tuple[Optional[Tuple[int, int]], Dict[str, Tuple[int, int]], PackedMaze]:
+    """
+    Purpose: Loads a maze in either supported encoding, choosing the parser from the file
+             extension: `.csv` for comma-separated mazes, anything else for the TXT layout.
+    Examples:
+        load_maze("maze.txt")      # Space-separated headers, one character per cell
+        load_maze("CSV/maze.csv")  # Comma-separated headers and cells
+    """
+    if file_path.lower().endswith('.csv'):
+        return load_csv_maze(file_path)
+    return load_packed_maze(file_path)
@@ -1,21 +1,32 @@
 """Manages Player state."""
+import csv
+import os
 import sys
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
 from character import Character
+from entity_store import EntityStore, FIXED_SHIFT, snap_to_unit, store_field, to_fixed
 
-@dataclass
 class Pacman(Character):
-    lives: int
-    boosted: bool
-    score: int
-    direction_command: int
-    boost_timer: int
+    __slots__ = ('lives', 'boosted', 'score', 'direction_command')
+
+    boost_timer = store_field('timer')
+
+    def __init__(self, x: int, y: int, size: int, speed: float, counter: int, direction: int, turns: List[bool],
+                 lives: int, boosted: bool, score: int, direction_command: Optional[int], boost_timer: int,
+                 store: Optional[EntityStore] = None):
+        super().__init__(x, y, size, speed, counter, direction, turns, store)
+        self.lives = lives
+        self.boosted = boosted
+        self.score = score
+        self.direction_command = direction_command
+        self.boost_timer = boost_timer
 
     def move_player(self, direction_command, turns, unit_width, unit_height, maze):
         """
         Purpose: Moves Pac-Man continuously on the grid while ensuring valid turns based on user input 
                  (via direction_command). Also handles snapping Pac-Man to the center of a tile when necessary.
+                 Works on the fixed-point coordinates in the store, so runs are exactly reproducible.
         Examples:
             pacman = Pacman(x=50, y=50, size=20, speed=5.0, direction=0, ...)
             maze = [
@@ -27,53 +38,77 @@ class Pacman(Character):
                                unit_width=20, unit_height=20, maze=maze)
             # Pac-Man moves right by its speed value if there are no walls in the way.
         """
+        store, index = self.store, self.index
+        unit_x, unit_y = unit_width << FIXED_SHIFT, unit_height << FIXED_SHIFT
+        x, y = store.fx[index], store.fy[index]
+        direction = store.direction[index]
+
         # Snap Pac-Man to the grid if near the center of a tile
-        if self.direction == 0 or self.direction == 1:  # Horizontal movement
-            self.y = round(self.y / unit_height) * unit_height
-        elif self.direction == 2 or self.direction == 3:  # Vertical movement
-            self.x = round(self.x / unit_width) * unit_width
+        if direction == 0 or direction == 1:  # Horizontal movement
+            y = snap_to_unit(y, unit_y)
+        elif direction == 2 or direction == 3:  # Vertical movement
+            x = snap_to_unit(x, unit_x)
 
         # Update direction if a valid turn is commanded
         if direction_command is not None and turns[direction_command]:
-            self.direction = direction_command
+            direction = store.direction[index] = direction_command
 
         # Calculate the next position
-        next_x, next_y = self.x, self.y
-        if self.direction == 0:  # Moving right
-            next_x += self.speed
-        elif self.direction == 1:  # Moving left
-            next_x -= self.speed
-        elif self.direction == 2:  # Moving up
-            next_y -= self.speed
-        elif self.direction == 3:  # Moving down
-            next_y += self.speed
+        step = to_fixed(store.speed[index])
+        next_x, next_y = x, y
+        if direction == 0:  # Moving right
+            next_x += step
+        elif direction == 1:  # Moving left
+            next_x -= step
+        elif direction == 2:  # Moving up
+            next_y -= step
+        elif direction == 3:  # Moving down
+            next_y += step
 
-        # Perform collision detection
-        if not self.is_wall(next_x, next_y, unit_width, unit_height, maze):
-            # Update position if no wall
-            self.x, self.y = next_x, next_y
+        # Perform collision detection on the tile under the centre of Pac-Man's hitbox
+        half_size = store.size[index] << (FIXED_SHIFT - 1)
+        grid_x = (next_x + half_size) // unit_x
+        grid_y = (next_y + half_size) // unit_y
+        if 0 <= grid_y < len(maze) and 0 <= grid_x < len(maze[0]) and maze[grid_y][grid_x] not in '#D':
+            x, y = next_x, next_y  # Update position if no wall
+        store.fx[index], store.fy[index] = x, y
 
-    def is_wall(self, x, y, unit_width, unit_height, maze):
-        """
-        Purpose: Checks if Pac-Man's next position collides with a wall ('#') or a restricted 
-                 area ('D') in the maze.
-        Examples:
-            maze = [
-                ["#", ".", "#"],
-                [".", " ", "."],
-                ["#", "D", "#"]
-            ]
-            pacman = Pacman(x=50, y=50, size=20, ...)
-            pacman.is_wall(x=30, y=30, unit_width=20, unit_height=20, maze=maze) -> False
-            pacman.is_wall(x=10, y=10, unit_width=20, unit_height=20, maze=maze) -> True
-        """
-        # Calculate grid position based on the center of Pac-Man's hitbox
-        grid_x = int((x + self.size / 2) / unit_width)
-        grid_y = int((y + self.size / 2) / unit_height)
 
-        # Ensure grid indices are within bounds
-        if 0 <= grid_y < len(maze) and 0 <= grid_x < len(maze[0]):
-            cell = maze[grid_y][grid_x]
-            return cell == '#' or cell == 'D'  # Treat 'D' as a wall for Pac-Man
-        return True  # Treat out-of-bounds as walls
+@dataclass
+class PacmanConfig:
+    """ Spawn stats for Pacman, as stored in CSV/pacman.csv. """
+    size: int = 40
+    speed: float = 2
+    counter: int = 0
+    lives: int = 3
+    boosted: bool = False
+    direction: int = 0
+
 
+def load_pacman_config(file_path: str) -> PacmanConfig:
+    """
+    Purpose: Loads Pacman spawn stats from a CSV file with a header row and one value row.
+             Pixel x/y columns are ignored, since the spawn tile comes from the maze.
+             If the file does not exist, the default stats are returned.
+    Examples:
+        load_pacman_config("CSV/pacman.csv")
+        # -> PacmanConfig(size=40, speed=2, counter=0, lives=3, boosted=False, direction=0)
+    """
+    if not os.path.exists(file_path):
+        return PacmanConfig()
+    with open(file_path, 'r', newline='') as file:
+        reader = csv.reader(file, skipinitialspace=True)
+        header = [name.strip() for name in next(reader)]
+        values = dict(zip(header, next(reader)))
+    try:
+        speed = float(values.get('speed', 2))
+        return PacmanConfig(
+            size=int(values.get('size', 40)),
+            speed=int(speed) if speed.is_integer() else speed,  # Whole speeds keep pixel positions integral
+            counter=int(values.get('counter', 0)),
+            lives=int(values.get('lives', 3)),
+            boosted=str(values.get('boosted', 'False')).strip() == 'True',
+            direction=int(values.get('direction', 0))
+        )
+    except ValueError as e:
+        raise ValueError(f"Invalid Pacman config in {file_path}: {e}") from e
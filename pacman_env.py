@@ -0,0 +1,194 @@
+""" Gym-style reinforcement-learning environments around the headless simulation. """
+import random
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from game import load_game_state
+from simulation import Simulation
+
+# Observation planes, one channel each, indexed [channel, row, column]
+CHANNELS = ("walls", "dots", "power_pellets", "pacman", "ghosts", "scared_ghosts")
+WALLS, DOTS, POWER_PELLETS, PACMAN, GHOSTS, SCARED_GHOSTS = range(len(CHANNELS))
+
+# Actions 0-3 are Pacman's direction commands (right, left, up, down); 4 means no input
+ACTIONS = (0, 1, 2, 3, None)
+
+
+class PacmanEnv:
+    """
+    Purpose: A reset/step environment for training Pacman agents against the ghost strategies.
+             Each step repeats the action for `frame_skip` simulation frames; the reward is the
+             score gained (minus `life_penalty` per life lost). Observations are written in place
+             into one preallocated (channels, rows, columns) array, which is returned without
+             copying: it is only valid until the next step, so copy it to keep it. The ghosts'
+             random choices come from the environment's own random.Random(seed), so
+             environments are reproducible and independent of each other and of the random module.
+    Examples:
+        env = PacmanEnv("maze.txt", seed=0)
+        obs, info = env.reset()
+        obs, reward, terminated, truncated, info = env.step(1)  # Move left
+        obs.shape -> (6, 21, 19)
+    """
+    def __init__(self, maze_path: str = "maze.txt", frame_skip: int = 4, max_steps: int = 10000,
+                 life_penalty: float = 0.0, seed: Optional[int] = None, unit_size: int = 40,
+                 dtype: Any = np.float32, observation: Optional[np.ndarray] = None):
+        self.maze_path = maze_path
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.life_penalty = life_penalty
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.unit_size = unit_size  # Tile size in pixels; Pacman and the ghosts are 40 pixels wide
+        self.deltaT = 1 / 60
+        maze = load_game_state(maze_path).maze
+        self.shape = (len(CHANNELS), len(maze), len(maze[0]))
+        if observation is None:
+            observation = np.zeros(self.shape, dtype=dtype)
+        elif observation.shape != self.shape:
+            raise ValueError(f"Observation buffer shape {observation.shape} doesn't match {self.shape}.")
+        self.observation = observation
+        self.sim: Optional[Simulation] = None
+        self.steps = 0
+        # Cells marked in the character planes last step, so they can be cleared without a full wipe
+        self.marked = np.zeros((0, 2), dtype=np.intp)
+        self.marked_count = 0
+
+    @property
+    def action_count(self) -> int:
+        return len(ACTIONS)
+
+    @property
+    def game(self) -> Simulation:
+        """ The current game's simulation; reset starts the first one. """
+        if self.sim is None:
+            raise RuntimeError("Call reset before stepping the environment.")
+        return self.sim
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Purpose: Starts a new game and returns the first observation and info.
+        Examples:
+            obs, info = env.reset(seed=3)
+        """
+        if seed is not None:
+            self.seed = seed
+            self.rng = random.Random(seed)
+        sim = self.sim = Simulation(load_game_state(self.maze_path), self.unit_size, self.unit_size, rng=self.rng)
+        self.steps = 0
+
+        # Static and pellet planes are rebuilt once per game, then updated incrementally
+        cells = np.frombuffer("".join("".join(row) for row in sim.maze).encode('ascii'),
+                              dtype=np.uint8).reshape(self.shape[1:])
+        obs = self.observation
+        obs[WALLS] = cells == ord('#')
+        obs[DOTS] = cells == ord('.')
+        obs[POWER_PELLETS] = cells == ord('o')
+        obs[PACMAN:] = 0
+        self.marked = np.zeros((len(sim.entities), 2), dtype=np.intp)
+        self.marked_count = 0
+        self.write_characters()
+        return obs, self.info()
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict[str, Any]]:
+        """
+        Purpose: Applies an action for `frame_skip` frames and returns
+                 (observation, reward, terminated, truncated, info).
+        Examples:
+            obs, reward, terminated, truncated, info = env.step(0)
+        """
+        sim = self.game
+        direction_command = ACTIONS[action]
+        score, lives = sim.pacman.score, sim.pacman.lives
+        obs = self.observation
+        for _ in range(self.frame_skip):
+            sim.step(direction_command, self.deltaT)
+            for x, y in sim.changed_cells:
+                obs[DOTS, y, x] = 0
+                obs[POWER_PELLETS, y, x] = 0
+            if sim.over:
+                break
+        self.steps += 1
+        self.write_characters()
+        reward = float(sim.pacman.score - score) - self.life_penalty * (lives - sim.pacman.lives)
+        return obs, reward, sim.over, not sim.over and self.steps >= self.max_steps, self.info()
+
+    def write_characters(self) -> None:
+        """
+        Purpose: Clears last step's Pacman/ghost cells and marks the current ones.
+        Examples:
+            env.write_characters()
+        """
+        sim, obs, marked = self.game, self.observation, self.marked
+        for i in range(self.marked_count):
+            obs[PACMAN:, marked[i, 1], marked[i, 0]] = 0
+        count = 0
+        unit_width, unit_height = sim.unit_width, sim.unit_height
+        rows, columns = self.shape[1:]
+
+        def mark(character: Any, channel: int) -> None:
+            nonlocal count
+            x = min(max(int((character.x + character.size / 2) // unit_width), 0), columns - 1)
+            y = min(max(int((character.y + character.size / 2) // unit_height), 0), rows - 1)
+            obs[channel, y, x] = 1
+            marked[count, 0], marked[count, 1] = x, y
+            count += 1
+
+        mark(sim.pacman, PACMAN)
+        for ghost in sim.ghosts:
+            if ghost.dead:
+                continue
+            scared = sim.pacman.boosted and not sim.eaten_ghosts[ghost.id]
+            mark(ghost, SCARED_GHOSTS if scared else GHOSTS)
+        self.marked_count = count
+
+    def info(self) -> Dict[str, Any]:
+        sim = self.game
+        return {"score": sim.pacman.score, "lives": sim.pacman.lives, "frame": sim.frame}
+
+
+class VectorPacmanEnv:
+    """
+    Purpose: Runs `count` environments in lockstep. All observations live in one preallocated
+             (count, channels, rows, columns) array that each environment writes its slice of;
+             rewards and done flags are preallocated arrays too. Finished environments reset
+             automatically, and their final info is kept in `final_infos`.
+    Examples:
+        envs = VectorPacmanEnv(8, "maze.txt", seed=0)
+        obs = envs.reset()
+        obs, rewards, terminated, truncated = envs.step(np.random.randint(0, 5, size=8))
+    """
+    def __init__(self, count: int, maze_path: str = "maze.txt", seed: Optional[int] = None, **options: Any):
+        first = PacmanEnv(maze_path, seed=seed, **options)
+        self.observations = np.zeros((count,) + first.shape, dtype=first.observation.dtype)
+        first.observation = self.observations[0]
+        self.envs = [first] + [
+            PacmanEnv(maze_path, seed=None if seed is None else seed + 100003 * i,
+                      observation=self.observations[i], **options)
+            for i in range(1, count)
+        ]
+        self.rewards = np.zeros(count, dtype=np.float32)
+        self.terminated = np.zeros(count, dtype=bool)
+        self.truncated = np.zeros(count, dtype=bool)
+        self.final_infos: List[Optional[Dict[str, Any]]] = [None] * count
+
+    def reset(self) -> np.ndarray:
+        for env in self.envs:
+            env.reset()
+        return self.observations
+
+    def step(self, actions: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Purpose: Steps every environment with its action and returns the shared observation,
+                 reward, terminated and truncated arrays (all reused between calls).
+        Examples:
+            obs, rewards, terminated, truncated = envs.step([0] * len(envs.envs))
+        """
+        for i, env in enumerate(self.envs):
+            _, reward, terminated, truncated, info = env.step(int(actions[i]))
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            self.final_infos[i] = None
+            if terminated or truncated:
+                self.final_infos[i] = info
+                env.reset()
+        return self.observations, self.rewards, self.terminated, self.truncated
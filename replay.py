@@ -0,0 +1,245 @@
+""" Replay files: compressed keyframe blocks with a footer index for constant-time seeking. """
+import argparse
+import mmap
+import struct
+import zlib
+from typing import Any, Callable, Iterator, List, Optional
+from simulation import Simulation
+from state_codec import (DeltaEncoder, MirrorState, decode_message, encode_keyframe, frame_message,
+                         iter_framed)
+
+# Layout: header | block 0 | block 1 | ... | footer | trailer
+# Each block is a u32 length and a zlib stream of framed messages: one keyframe followed by the
+# deltas of the next `keyframe_interval - 1` frames. The footer holds the frame count, block
+# count and the byte offset of every block; the trailer points at the footer.
+REPLAY_MAGIC = b'PRPL'
+INDEX_MAGIC = b'PRPI'
+REPLAY_VERSION = 1
+
+_HEADER = struct.Struct('<4sHHf')
+_BLOCK = struct.Struct('<I')
+_FOOTER = struct.Struct('<II')
+_OFFSET = struct.Struct('<Q')
+_TRAILER = struct.Struct('<Q4s')
+
+
+class ReplayWriter:
+    """
+    Purpose: Records a simulation frame by frame into a replay file. Call `record` once after
+             creating the simulation and once after every step, then `close`.
+    Examples:
+        with ReplayWriter("run.prpl", keyframe_interval=300) as writer:
+            writer.record(sim)
+            while not sim.over:
+                sim.step(None, 1 / 60)
+                writer.record(sim)
+    """
+    def __init__(self, file_path: str, keyframe_interval: int = 300, fps: float = 60.0):
+        if not 1 <= keyframe_interval <= 0xFFFF:
+            raise ValueError(f"Keyframe interval must be between 1 and 65535, not {keyframe_interval}.")
+        self.file = open(file_path, 'wb')
+        self.keyframe_interval = keyframe_interval
+        self.frame_count = 0
+        self.block_offsets: List[int] = []
+        self.block: List[bytes] = []
+        self.encoder: Optional[DeltaEncoder] = None
+        self.file.write(_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, keyframe_interval, fps))
+
+    def __enter__(self) -> 'ReplayWriter':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def record(self, sim: Simulation) -> None:
+        """
+        Purpose: Appends the current state of `sim` as the next frame.
+        Examples:
+            writer.record(sim)
+        """
+        encoder = self.encoder
+        if encoder is None or self.frame_count % self.keyframe_interval == 0:
+            self.flush_block()
+            self.block.append(frame_message(encode_keyframe(sim)))
+            self.encoder = DeltaEncoder(sim)
+        else:
+            self.block.append(frame_message(encoder.encode(sim)))
+        self.frame_count += 1
+
+    def flush_block(self) -> None:
+        """
+        Purpose: Compresses the pending block and writes it, remembering its offset for the index.
+        Examples:
+            writer.flush_block()
+        """
+        if not self.block:
+            return
+        compressed = zlib.compress(b''.join(self.block), 6)
+        self.block_offsets.append(self.file.tell())
+        self.file.write(_BLOCK.pack(len(compressed)))
+        self.file.write(compressed)
+        self.block = []
+
+    def close(self) -> None:
+        """
+        Purpose: Writes the last block, the footer index and the trailer, then closes the file.
+        Examples:
+            writer.close()
+        """
+        if self.file.closed:
+            return
+        self.flush_block()
+        footer_offset = self.file.tell()
+        self.file.write(_FOOTER.pack(self.frame_count, len(self.block_offsets)))
+        for offset in self.block_offsets:
+            self.file.write(_OFFSET.pack(offset))
+        self.file.write(_TRAILER.pack(footer_offset, INDEX_MAGIC))
+        self.file.close()
+
+
+class ReplayReader:
+    """
+    Purpose: Opens a replay through mmap and reconstructs the state at any frame. Seeking reads
+             the footer index, decompresses a single block and applies at most
+             `keyframe_interval - 1` deltas, so its cost does not depend on the replay length.
+    Examples:
+        with ReplayReader("run.prpl") as replay:
+            len(replay)                  # -> number of recorded frames
+            replay.state_at(5000).score  # -> score at frame 5000
+    """
+    def __init__(self, file_path: str):
+        self.file = open(file_path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # An empty file cannot be mapped
+            self.file.close()
+            raise ValueError(f"{file_path} is not a version {REPLAY_VERSION} replay file.")
+        try:
+            self.read_index(file_path)
+        except (ValueError, struct.error) as e:
+            self.close()  # Do not leak the file and mapping of a file that is not a replay
+            if isinstance(e, struct.error):
+                raise ValueError(f"{file_path} is truncated.") from e
+            raise
+
+    def read_index(self, file_path: str) -> None:
+        """ Reads the header and the footer index, checking both magic numbers. """
+        magic, version, self.keyframe_interval, self.fps = _HEADER.unpack_from(self.data, 0)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{file_path} is not a version {REPLAY_VERSION} replay file.")
+        footer_offset, index_magic = _TRAILER.unpack_from(self.data, len(self.data) - _TRAILER.size)
+        if index_magic != INDEX_MAGIC:
+            raise ValueError(f"{file_path} has no replay index (was the writer closed?).")
+        self.frame_count, block_count = _FOOTER.unpack_from(self.data, footer_offset)
+        offsets_start = footer_offset + _FOOTER.size
+        self.block_offsets = [_OFFSET.unpack_from(self.data, offsets_start + i * _OFFSET.size)[0]
+                              for i in range(block_count)]
+
+    def __enter__(self) -> 'ReplayReader':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def close(self) -> None:
+        self.data.close()
+        self.file.close()
+
+    def block_messages(self, block: int) -> List[bytes]:
+        """
+        Purpose: Decompresses one block and returns its message payloads.
+        Examples:
+            replay.block_messages(0)[0][0] -> MSG_KEYFRAME
+        """
+        offset = self.block_offsets[block]
+        (length,) = _BLOCK.unpack_from(self.data, offset)
+        start = offset + _BLOCK.size
+        return list(iter_framed(zlib.decompress(self.data[start:start + length])))
+
+    def state_at(self, frame: int) -> MirrorState:
+        """
+        Purpose: Returns the reconstructed state at `frame` (0-based; negative counts from the end).
+        Examples:
+            replay.state_at(0)   # First recorded frame
+            replay.state_at(-1)  # Final frame
+        """
+        if frame < 0:
+            frame += self.frame_count
+        if not 0 <= frame < self.frame_count:
+            raise IndexError(f"Frame {frame} outside replay of {self.frame_count} frames.")
+        block, position = divmod(frame, self.keyframe_interval)
+        state = MirrorState()
+        for payload in self.block_messages(block)[:position + 1]:
+            state.apply(decode_message(payload))
+        return state
+
+    def states(self, start: int = 0) -> Iterator[MirrorState]:
+        """
+        Purpose: Yields the state of every frame from `start` onwards, decompressing one block at
+                 a time. The same MirrorState object is updated and yielded for each frame.
+        Examples:
+            for state in replay.states():
+                print(state.score)
+        """
+        if start >= self.frame_count:
+            return
+        state = self.state_at(start)
+        yield state
+        block, position = divmod(start, self.keyframe_interval)
+        messages = self.block_messages(block)[position + 1:]
+        while True:
+            for payload in messages:
+                state.apply(decode_message(payload))
+                yield state
+            block += 1
+            if block >= len(self.block_offsets):
+                return
+            messages = self.block_messages(block)
+
+
+def record_simulation(sim: Simulation, file_path: str, frames: int,
+                      controller: Optional[Callable[[Simulation], Optional[int]]] = None,
+                      keyframe_interval: int = 300, fps: float = 60.0) -> int:
+    """
+    Purpose: Runs a simulation headlessly for up to `frames` steps (or until the game is over),
+             recording every frame. `controller` chooses Pacman's direction each step.
+             Returns the number of frames recorded.
+    Examples:
+        record_simulation(Simulation(load_game_state("maze.txt")), "run.prpl", frames=60 * 60)
+    """
+    with ReplayWriter(file_path, keyframe_interval, fps) as writer:
+        writer.record(sim)
+        for _ in range(frames):
+            if sim.over:
+                break
+            sim.step(controller(sim) if controller is not None else None, 1 / fps)
+            writer.record(sim)
+        return writer.frame_count
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Purpose: Command-line entry point to inspect a replay or print the state at a frame.
+    Examples:
+        python replay.py run.prpl
+        python replay.py run.prpl --frame 5000
+    """
+    parser = argparse.ArgumentParser(description="Inspect a Pacman replay file.")
+    parser.add_argument("replay")
+    parser.add_argument("--frame", type=int)
+    args = parser.parse_args(argv)
+    with ReplayReader(args.replay) as replay:
+        print(f"{len(replay)} frames at {replay.fps:g} fps, keyframe every {replay.keyframe_interval} frames, "
+              f"{len(replay.block_offsets)} blocks")
+        if args.frame is not None:
+            state = replay.state_at(args.frame)
+            print(f"Frame {state.frame}: score {state.score}, lives {state.lives}, pacman at {state.entities[0][:2]}")
+            for row in state.maze:
+                print("".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+""" In-memory rewind history: a ring buffer of per-tick deltas with periodic keyframes. """
+import struct
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from entity_store import EntityStore
+from simulation import Simulation
+
+# EntityStore arrays captured every tick, in a fixed order so deltas can refer to them by number
+COLUMNS = ('fx', 'fy', 'size', 'speed', 'counter', 'direction', 'timer', 'alive', 'target_x', 'target_y', 'turns')
+
+# Delta layout: header | entity changes | cell changes
+# header: frame, score, lives, direction command (-1 for none), status flags, eaten-ghost bits,
+#         number of entity changes, number of cell changes
+# entity change: column number, flat index into the column, new value (in the column's type)
+# cell change: x, y, new cell character
+_DELTA = struct.Struct('<IibbBHHH')
+_CHANGES = tuple(struct.Struct('<BH' + getattr(EntityStore(), name).typecode) for name in COLUMNS)
+_CELL = struct.Struct('<HHB')
+BOOSTED, WON, LOST = 1, 2, 4
+REWIND_SECONDS = 5.0  # How far the rewind key goes back
+
+
+class Keyframe(NamedTuple):
+    """ A full copy of the state of one frame. """
+    frame: int
+    columns: Tuple[array, ...]
+    maze: Tuple[str, ...]
+    totals: Tuple[int, int, int, int, int]  # score, lives, direction command, status, eaten bits
+
+
+class RewindBuffer:
+    """
+    Purpose: Keeps the last `seconds` of a simulation's history. Each recorded tick is stored
+             as a small delta (entity fields that changed, maze cells eaten, score, lives and
+             status), with a full keyframe every `keyframe_interval` ticks. Restoring a frame
+             copies the keyframe before it and applies at most `keyframe_interval - 1` deltas.
+             Ghost strategies keep their own state, so after a rewind they re-plan from where
+             the ghosts stand.
+    Examples:
+        history = RewindBuffer(sim)
+        history.record(sim)
+        while not sim.over:
+            sim.step(None, 1 / 60)
+            history.record(sim)
+        history.rewind(sim, 5.0)  # Back five seconds; later history is discarded
+    """
+    def __init__(self, sim: Simulation, seconds: float = 180.0, fps: float = 60.0, keyframe_interval: int = 30):
+        self.fps = fps
+        self.capacity = max(1, round(seconds * fps))
+        self.keyframe_interval = keyframe_interval
+        self.deltas: List[Optional[bytes]] = [None] * self.capacity  # Slot frame % capacity
+        self.keyframes: Dict[int, Keyframe] = {}
+        self.ghost_ids = [ghost.id for ghost in sim.ghosts]
+        self.columns = [getattr(sim.entities, name) for name in COLUMNS]  # Restores write in place
+        self.newest = -1
+        self.last_columns: List[array] = []
+        self.delta_bytes = 0
+
+    def __len__(self) -> int:
+        return self.newest - self.oldest + 1 if self.keyframes else 0
+
+    @property
+    def oldest(self) -> int:
+        """ The oldest frame that can still be restored. """
+        return next(iter(self.keyframes)) if self.keyframes else -1  # Keyframes are kept in frame order
+
+    @property
+    def nbytes(self) -> int:
+        """ Approximate payload size of the history in bytes. """
+        keyframe_bytes = sum(sum(len(column) * column.itemsize for column in keyframe.columns) +
+                             sum(len(row) for row in keyframe.maze) for keyframe in self.keyframes.values())
+        return self.delta_bytes + keyframe_bytes
+
+    def totals(self, sim: Simulation) -> Tuple[int, int, int, int, int]:
+        pacman = sim.pacman
+        status = (BOOSTED if pacman.boosted else 0) | (WON if sim.won else 0) | (LOST if sim.lost else 0)
+        eaten = 0
+        for bit, g_id in enumerate(self.ghost_ids):
+            if sim.eaten_ghosts[g_id]:
+                eaten |= 1 << bit
+        command = -1 if pacman.direction_command is None else pacman.direction_command
+        return pacman.score, pacman.lives, command, status, eaten
+
+    def record(self, sim: Simulation) -> None:
+        """
+        Purpose: Adds the simulation's current frame. Call it once at the start and after every
+                 step; a frame that does not follow the last one recorded starts a keyframe.
+        Examples:
+            sim.step(command, 1 / 60)
+            history.record(sim)
+        """
+        frame, columns = sim.frame, self.columns
+        if frame != self.newest + 1 or frame % self.keyframe_interval == 0 or not self.keyframes:
+            if frame != self.newest + 1:  # Not a continuation: start the history afresh
+                self.keyframes.clear()
+                self.deltas = [None] * self.capacity
+                self.delta_bytes = 0
+            self.keyframes[frame] = Keyframe(frame, tuple(array(c.typecode, c) for c in columns),
+                                             tuple("".join(row) for row in sim.maze), self.totals(sim))
+            self.last_columns = [array(c.typecode, c) for c in columns]
+            delta = None
+        else:
+            parts = []
+            for number, (column, last) in enumerate(zip(columns, self.last_columns)):
+                if column != last:  # One C-level comparison rules out unchanged columns
+                    pack = _CHANGES[number].pack
+                    for index, value in enumerate(column):
+                        if value != last[index]:
+                            parts.append(pack(number, index, value))
+                            last[index] = value
+            cells = [_CELL.pack(x, y, ord(sim.maze[y][x])) for x, y in sim.changed_cells]
+            delta = b''.join([_DELTA.pack(frame, *self.totals(sim), len(parts), len(cells))] + parts + cells)
+            self.delta_bytes += len(delta)
+
+        slot = frame % self.capacity
+        overwritten = self.deltas[slot]
+        if overwritten is not None:
+            self.delta_bytes -= len(overwritten)
+        self.deltas[slot] = delta
+        self.newest = frame
+        # Keyframes whose following deltas have been overwritten can no longer be used
+        expired = frame - self.capacity + 1
+        while len(self.keyframes) > 1 and next(iter(self.keyframes)) < expired:
+            del self.keyframes[next(iter(self.keyframes))]
+
+    def restore(self, sim: Simulation, frame: int) -> None:
+        """
+        Purpose: Puts the simulation back into the state it had at `frame`. The maze is updated
+                 cell by cell through VersionedMaze.set_cell so memoized decisions stay valid.
+        Examples:
+            history.restore(sim, history.oldest)
+        """
+        if not self.oldest <= frame <= self.newest:
+            raise IndexError(f"Frame {frame} is not in the rewind history ({self.oldest}-{self.newest}).")
+        start = frame - frame % self.keyframe_interval
+        if start not in self.keyframes:  # Before the first scheduled keyframe of the history
+            start = max(k for k in self.keyframes if k <= frame)
+        keyframe = self.keyframes[start]
+        columns = self.columns
+        for column, saved in zip(columns, keyframe.columns):
+            column[:] = saved  # In place: the characters and pixel views share these arrays
+        rows = [list(row) for row in keyframe.maze]
+        totals: Sequence[int] = keyframe.totals
+        for f in range(start + 1, frame + 1):
+            delta = self.deltas[f % self.capacity]
+            assert delta is not None, "every frame after a keyframe has a delta"
+            _, *totals, changes, cells = _DELTA.unpack_from(delta, 0)
+            offset = _DELTA.size
+            for _ in range(changes):
+                layout = _CHANGES[delta[offset]]
+                _, index, value = layout.unpack_from(delta, offset)
+                columns[delta[offset]][index] = value
+                offset += layout.size
+            for _ in range(cells):
+                x, y, cell = _CELL.unpack_from(delta, offset)
+                rows[y][x] = chr(cell)
+                offset += _CELL.size
+
+        for y, row in enumerate(rows):
+            if row != sim.maze[y]:
+                for x, cell in enumerate(row):
+                    sim.maze.set_cell(x, y, cell)
+        pacman = sim.pacman
+        pacman.score, pacman.lives, command, status, eaten = totals
+        pacman.direction_command = None if command < 0 else command
+        pacman.boosted = bool(status & BOOSTED)
+        sim.won, sim.lost = bool(status & WON), bool(status & LOST)
+        sim.eaten_ghosts.eaten_ghosts = {g_id: bool(eaten & (1 << bit)) for bit, g_id in enumerate(self.ghost_ids)}
+        sim.frame = frame
+        sim.changed_cells.clear()
+        sim.routes.clear()  # Ghosts re-plan from their restored targets
+        sim.waiting.clear()
+        sim.state.pacman_pos = (int(pacman.x // sim.unit_width), int(pacman.y // sim.unit_height))
+        for ghost in sim.ghosts:
+            sim.state.ghost_positions[ghost.id] = (int(ghost.x // sim.unit_width), int(ghost.y // sim.unit_height))
+
+    def rewind(self, sim: Simulation, seconds: float) -> int:
+        """
+        Purpose: Restores the state from `seconds` ago (or the oldest kept), discards the history
+                 after it so play continues from there, and returns the restored frame.
+        Examples:
+            history.rewind(sim, 5.0) -> 1200
+        """
+        frame = max(self.oldest, self.newest - round(seconds * self.fps))
+        self.restore(sim, frame)
+        for later in [k for k in self.keyframes if k > frame]:
+            del self.keyframes[later]
+        for f in range(frame + 1, self.newest + 1):
+            slot = f % self.capacity
+            discarded = self.deltas[slot]
+            if discarded is not None:
+                self.delta_bytes -= len(discarded)
+                self.deltas[slot] = None
+        self.newest = frame
+        self.last_columns = [array(c.typecode, c) for c in self.columns]
+        return frame
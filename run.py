@@ -1,44 +1,94 @@
 """ Responsible for running the game. """
+import argparse
+import time
 import pygame
 from dataclasses import dataclass
 from copy import deepcopy
+from functools import partial
 from typing import List, Tuple, Optional, Dict
 from ghost import *
-from pacman import Pacman
+from pacman import Pacman, load_pacman_config
 from game import *
 from keys import pressed_keys, directions
 from board import *
-
-def main():
+from events import *
+from simulation import Simulation
+from campaign import Campaign
+from governor import QualityGovernor, WALL_OUTLINES, ANIMATION, DISTANT_AI, OVERLAYS
+from autopilot import Autopilot
+from alloc_tracker import AllocationTracker
+from rewind import RewindBuffer, REWIND_SECONDS
+from autosave import AUTOSAVE_FILE, Autosaver, apply_checkpoint
+from sim_thread import SimulationRunner, SimulationThread
+from render_target import RenderTarget, display_format, parse_size
+
+game_state: GameState  # The current level's state, set by main
+
+def main(level_paths: Optional[List[str]] = None, autopilot: Optional[Autopilot] = None,
+         tracker: Optional[AllocationTracker] = None, resume: bool = False, threaded: bool = False,
+         render_size: Optional[Tuple[int, int]] = None, scaled: bool = False) -> None:
     """
     Purpose: The main function initializes the game environment, sets up game objects 
-             (Pacman, ghosts, maze), and prepares the game loop.
+             (Pacman, ghosts, maze), and prepares the game loop. `level_paths` is the
+             campaign's ordered list of maze files; winning a level moves straight on to the
+             next one, which has been prepared in the background while the level was played.
+             With an `autopilot`, Pacman is steered by the bot unless a key is pressed.
+             With a `tracker`, allocations and GC pauses are attributed to the input,
+             simulation, draw and present phases of each frame and reported at exit.
+             The run is autosaved every few seconds; with `resume`, it continues from the
+             last autosave (or the one before it, if a crash damaged the latest).
+             Each frame is drawn from an immutable snapshot of the simulation; with
+             `threaded`, the simulation ticks at a fixed rate on its own thread, so slow
+             frames delay neither input nor the ghosts.
+             Frames are drawn at `render_size` (the window size by default) and scaled up to
+             the window when presented; with `scaled`, SDL does the scaling (pygame.SCALED).
     Examples:
         main()
         # Initializes the Pacman game, sets up the game window, reads the maze layout 
         # from "maze.txt", and prepares Pacman and ghost objects for gameplay.
+        main(["maze.txt", "levels/2.txt"])  # Two-level campaign
+        main(autopilot=Autopilot(budget=0.012))  # Unattended soak test
+        main(tracker=AllocationTracker())  # Per-frame allocation report
+        main(resume=True)  # Continue after a crash or quit
+        main(threaded=True)  # Simulation on its own thread
+        main(render_size=(380, 450))  # Half-resolution rendering, shown at 2x
     """
     pygame.init()  # Initialize the Pygame library
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))  # Set up the game window
+    target = RenderTarget((WIDTH, HEIGHT), render_size, scaled)  # Set up the game window
+    screen = target.surface  # Frames are drawn here, at the render size
     pygame.display.set_caption("Pacman Game")  # Set the game window title
     clock = pygame.time.Clock()  # Create a clock object to control the frame rate
-    font = pygame.font.Font('freesansbold.ttf', 20)  # Load a font for rendering text
+    size = target.size
+    scale_x, scale_y = size[0] / WIDTH, size[1] / HEIGHT  # Render pixels per simulation pixel
+    font = pygame.font.Font('freesansbold.ttf', max(8, round(20 * scale_y)))  # Load a font for rendering text
 
     global game_state
-    # Parse the game state from the maze file
+    checkpoint = None
+    if resume:
+        try:
+            checkpoint = read_checkpoint(AUTOSAVE_FILE)
+        except ValueError as e:
+            print(f"Could not resume: {e}")
+
+    # Parse and validate the first level; the next level is prepared on a background thread
+    campaign = Campaign(level_paths if level_paths else ["maze.txt"], size=size)
     try:
-        game_state = parse_game_state_from_txt("maze.txt")  # Load the maze and positions
+        level = campaign.start(checkpoint.level if checkpoint is not None else 0)  # Load the maze and positions (TXT or CSV)
+        pacman_config = load_pacman_config("CSV/pacman.csv")  # Load Pacman spawn stats
     except ValueError as e:
         print(f"Error parsing game state: {e}")  # Print error if parsing fails
+        campaign.close()
         pygame.quit()  # Quit Pygame
         return
+    game_state = level.game_state
+    if checkpoint is not None and not apply_checkpoint(game_state, checkpoint):
+        print(f"Could not resume: the autosave does not match {level.path}")
+        checkpoint = None
 
-    # Extract maze dimensions and calculate unit size
+    # Extract the maze and unit size
     maze = game_state.maze
-    num_rows = len(maze)
-    num_cols = len(maze[0]) if num_rows > 0 else 0
-    unit_height = (HEIGHT - 50) // num_rows  # Adjust for UI elements
-    unit_width = WIDTH // num_cols
+    unit_height = level.unit_height
+    unit_width = level.unit_width
     
     # High score file path
     high_score_file = "high_score.txt"
@@ -64,23 +114,7 @@ def main():
         unit_width=unit_width,  # Unit width for maze cells
         font=font  # Font for rendering UI
     )
-
-    # Initialize Pacman using its starting position from the game state
-    px, py = game_state.pacman_pos
-    pacman = Pacman(
-        x=px * unit_width,  # Convert maze position to screen coordinates
-        y=py * unit_height,
-        size=40,  # Size of Pacman
-        speed=2,  # Speed of Pacman in tiles per second
-        counter=0,  # Animation frame counter
-        lives=3,  # Starting number of lives
-        boosted=False,  # Boosted state flag
-        direction=0,  # Initial direction (0 = right)
-        turns=[False, False, False, False],  # Valid turns
-        score=0,  # Initial score
-        direction_command=0,  # Initial movement direction
-        boost_timer=0  # Timer for boosted state
-    )
+    game.level = level.index
 
     # Load ghost images or create placeholder images if loading fails
     try:
@@ -100,41 +134,55 @@ def main():
         ghost_images["G1"].fill('red')  # Red placeholder for G1
         ghost_images["G2"].fill('blue')  # Blue placeholder for G2
         ghost_images["G3"].fill('yellow')  # Yellow placeholder for G3
-
-    # Initialize ghosts and assign them strategies
-    ghosts = []
-    ghost_strategies = {}
-
-    for g_id, (gx, gy) in game_state.ghost_positions.items():
-        # Create a ghost object with its position and attributes
-        ghost_obj = Ghost(
-            x=gx * unit_width,  # Convert maze position to screen coordinates
-            y=gy * unit_height,
-            size=40,  # Size of ghost
-            speed=1,  # Speed in tiles per second
-            counter=0,  # Animation frame counter
-            dead=False,  # Initial state is alive
-            direction=0,  # Initial direction (0 = right)
-            img=ghost_images.get(g_id, pygame.Surface((40, 40))),  # Image for the ghost
-            id=g_id,  # Ghost ID (e.g., "G1", "G2")
-            turns=[False, False, False, False],  # Valid turns
-            in_box=False  # Flag for starting in a box
-        )
-        ghost_obj.target_tile = (gx, gy)  # Initial target tile is its starting position
-        ghosts.append(ghost_obj)
-
-        # Assign strategies based on ghost ID
-        if g_id == "G1":
-            ghost_strategies[g_id] = RandomGhostStrategy()  # G1 uses random movement
-        elif g_id == "G2":
-            ghost_strategies[g_id] = ChasingGhostStrategy()  # G2 chases Pacman
-        elif g_id == "G3":
-            ghost_strategies[g_id] = PalletHoveringGhostStrategy()  # G3 hovers near pellets
-        else:
-            ghost_strategies[g_id] = RandomGhostStrategy()  # Default to random strategy
-
-    # Initialize a tracker for eaten ghosts
-    eaten_ghosts = EatenGhostList({ghost.id: False for ghost in ghosts})
+    for g_id in game_state.ghost_positions:
+        ghost_images.setdefault(g_id, pygame.Surface((40, 40)))  # Blank image for extra ghosts
+
+    # Ghosts are drawn from copies sized for the render target, in the display's pixel format
+    ghost_size = max(1, round(40 * scale_x))
+    ghost_sprites = {g_id: display_format(pygame.transform.scale(img, (ghost_size, ghost_size)), alpha=True)
+                     for g_id, img in ghost_images.items()}
+
+    # Game events are queued during a frame and dispatched once at its end; log output is
+    # written by a background listener so a slow stdout never stalls the frame loop
+    logger, log_listener = start_log_listener()
+    bus = EventBus()
+    event_log = RingBufferLogger(capacity=256, logger=logger)
+    stats = GameStatistics()
+    bus.subscribe(event_log)
+    bus.subscribe(stats)
+    bus.subscribe(SoundEffects({}))  # No sound assets yet; map event kinds to files here
+
+    # The simulation owns Pacman, the ghosts and their strategies; this loop handles
+    # input and drawing. G1 moves randomly, G2 chases Pacman and G3 hovers near pellets.
+    sim = Simulation(game_state, unit_width, unit_height, pacman_config=pacman_config,
+                     ghost_images=ghost_images, bus=bus, move_table=level.move_table)
+    pacman = sim.pacman
+    ghosts = sim.ghosts
+    if checkpoint is not None:
+        pacman.score = game.score = checkpoint.score
+        if checkpoint.lives is not None:
+            pacman.lives = checkpoint.lives
+    history = RewindBuffer(sim)  # Backspace rewinds play by REWIND_SECONDS
+    history.record(sim)
+
+    # Checkpoints are snapshotted here and written by a background thread
+    autosaver = Autosaver(AUTOSAVE_FILE)
+
+    def snapshot() -> Checkpoint:
+        game.score = pacman.score
+        return game.checkpoint(game_state, pacman.lives)
+
+    # The runner steps the simulation (on its own thread if threaded) and publishes a
+    # snapshot of every frame; the loop below only reads input and draws snapshots
+    def start_runner(sim: Simulation, history: RewindBuffer) -> SimulationRunner:
+        hooks = [history.record, lambda sim: autosaver.maybe_submit(snapshot)]
+        if not threaded:
+            return SimulationRunner(sim, game.fps, autopilot, hooks)
+        runner = SimulationThread(sim, game.fps, autopilot, hooks)
+        runner.start()
+        return runner
+
+    runner = start_runner(sim, history)
 
     # Map direction strings to integer codes
     direction_map = {
@@ -144,157 +192,160 @@ def main():
         "DOWN": 3  # Down direction code
     }
 
-    # Debugging: Print starting positions
-    # Print initial positions of Pacman and ghosts for debugging purposes
-    print(f"Pacman is at: ({pacman.x}, {pacman.y})")
+    # Debugging: Log starting positions
+    logger.info(f"Pacman is at: ({pacman.x}, {pacman.y})")
     for ghost in ghosts:
-        print(f"Ghost {ghost.id} is at: ({ghost.x}, {ghost.y})")
+        logger.info(f"Ghost {ghost.id} is at: ({ghost.x}, {ghost.y})")
+
+    # The governor sheds detail in stages when frames take longer than the FPS budget allows
+    governor = QualityGovernor(game.fps)
+    background = display_format(level.background)  # Pre-rendered walls, re-rendered plain when outlines are shed
+    walls_rounded = True
+    show_overlay = False  # F3 toggles the diagnostics overlay
+    tracker = tracker if tracker is not None else AllocationTracker()  # Phases are no-ops unless started
 
     # Main game loop
     while game.running:
         game.tick()  # Update the game clock and regulate FPS
+        work_start = time.perf_counter()  # Frame work starts after the frame-rate sleep
         game.screen.fill(game.background)  # Clear the screen with the background color
 
-        # Check for user events like quitting the game
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:  # Exit game if the quit event is triggered
-                game.running = False
-
-        # Capture the current state of keyboard keys
-        keys_state = pygame.key.get_pressed()
-        pressed = pressed_keys(keys_state)  # Get list of pressed keys
-        dirs = directions(game.keymap, pressed)  # Map pressed keys to directions
-
-        # Update Pacman's direction based on input, if valid
-        if dirs:
-            chosen_dir = dirs[0]
-            pacman.direction_command = direction_map.get(chosen_dir, pacman.direction)
+        with tracker.phase("input"):
+            # Check for user events like quitting the game
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:  # Exit game if the quit event is triggered
+                    game.running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    show_overlay = not show_overlay
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_BACKSPACE:
+                    runner.call(partial(history.rewind, seconds=REWIND_SECONDS))
+
+            # Capture the current state of keyboard keys
+            keys_state = pygame.key.get_pressed()
+            pressed = pressed_keys(keys_state)  # Get list of pressed keys
+            dirs = directions(game.keymap, pressed)  # Map pressed keys to directions
+
+            # Pick Pacman's direction command from input; None if no keys are pressed
+            # (the autopilot, if any, plans for ticks without one)
+            runner.set_input(direction_map.get(dirs[0], pacman.direction) if dirs else None)
+
+        # Advance the game by one frame (movement, pellets, ghosts, collisions, win/lose), or
+        # take the latest frame the simulation thread has published
+        sim.distant_ai_interval = 4 if governor.sheds(DISTANT_AI) else 1
+        if isinstance(runner, SimulationThread):
+            if runner.error is not None:
+                raise runner.error
+            view = runner.buffer.latest
         else:
-            pacman.direction_command = None  # Stop movement if no keys are pressed
-
-        # Increment animation counter for smoother animations
-        pacman.counter = (pacman.counter + 1) % 40
-
-        # Handle boosted state logic
-        if pacman.boosted:
-            if pacman.boost_timer < 600:  # Boost lasts for 600 frames
-                pacman.boost_timer += 1
-            else:  # Reset boost state after timeout
-                pacman.boosted = False
-                pacman.boost_timer = 0
-                eaten_ghosts.eaten_ghosts = {ghost.id: False for ghost in ghosts}
-
-        # Draw the maze, score, and lives
-        draw_board(game.screen, maze, pacman.score, game.font, pacman.lives, high_score)
-        # Draw Pacman with updated animation and position
-        draw_player(game.screen, pacman.x, pacman.y, pacman.size, pacman.direction, pacman.counter)
-
-        # Calculate Pacman's current grid position
-        cx, cy = round(pacman.x / unit_width), round(pacman.y / unit_height)
-
-        # Determine valid moves from Pacman's current position
-        valid_moves = get_valid_moves(maze, (cx, cy))
-        pacman.turns = [False, False, False, False]  # Reset possible turns
-
-        if (cx + 1, cy) in valid_moves:  # Right
-            pacman.turns[0] = True
-        if (cx - 1, cy) in valid_moves:  # Left
-            pacman.turns[1] = True
-        if (cx, cy - 1) in valid_moves:  # Up
-            pacman.turns[2] = True
-        if (cx, cy + 1) in valid_moves:  # Down
-            pacman.turns[3] = True
-
-        # Move Pacman based on the current direction command and valid moves
-        pacman.move_player(pacman.direction_command, pacman.turns, unit_width, unit_height, maze)
-
-        # Update Pacman's position in the game state
-        game_state.pacman_pos = (pacman.x // unit_width, pacman.y // unit_height)
-
-        # Check collisions and update the maze (e.g., eat dots or power-ups)
-        check_collisions_and_update_maze(pacman, maze)
-        
+            with tracker.phase("simulation"):
+                view = runner.tick(game.deltaT)
+
         # Update the high score if Pacman's score exceeds it
-        if pacman.score > high_score:
-            high_score = pacman.score
+        if view.score > high_score:
+            high_score = view.score
             save_high_score(high_score_file, high_score)
 
-        # Update ghost positions based on their target tiles
-        for ghost in ghosts:
-            g_tile_x = ghost.x // unit_width  # Current grid x-position
-            g_tile_y = ghost.y // unit_height  # Current grid y-position
-            game_state.ghost_positions[ghost.id] = (g_tile_x, g_tile_y)
-
-        for ghost in ghosts:
-            ghost_id_str = ghost.id
-            # Check if ghost reached its target tile
-            if (abs(ghost.x - ghost.target_tile[0] * unit_width) < 1 and
-                abs(ghost.y - ghost.target_tile[1] * unit_height) < 1):
-                # Get the next target tile using the assigned strategy
-                new_pos = ghost_strategies[ghost_id_str].get_next_position(game_state, ghost_id_str)
-                if new_pos:
-                    ghost.target_tile = new_pos
-
-            # Move the ghost incrementally toward its target tile
-            reached = move_ghost_towards_tile(ghost, ghost.target_tile, unit_width, unit_height, game.deltaT)
-            # Draw the ghost with its updated state
-            g_rect = ghost.draw_ghost(game.screen, pacman.boosted, eaten_ghosts.eaten_ghosts, unit_width, unit_height)
-
-        # Handle collisions between Pacman and ghosts
-        player_hit_box = pygame.Rect(pacman.x, pacman.y, pacman.size, pacman.size)
-        
-        for ghost in ghosts:
-            g_rect = pygame.Rect(ghost.x, ghost.y, ghost.size, ghost.size)
-
-            if not pacman.boosted:
-                if player_hit_box.colliderect(g_rect) and not ghost.dead:
-                    # Pacman loses a life if colliding with a live ghost while not boosted
-                    if pacman.lives > 0:
-                        pacman.lives -= 1
-                        pacman.x = game_state.pacman_pos[0] * unit_width
-                        pacman.y = game_state.pacman_pos[1] * unit_height
-                        for g in ghosts:
-                            g.x = game_state.ghost_positions[g.id][0] * unit_width
-                            g.y = game_state.ghost_positions[g.id][1] * unit_height
-                            g.dead = False
-            else:
-                if player_hit_box.colliderect(g_rect) and not ghost.dead and not eaten_ghosts[ghost.id]:
-                    ghost.dead = True
-                    ghost.speed = 0  # Stop ghost movement
-                    eaten_ghosts[ghost.id] = True
-                    ghost.respawn_timer = 180  # Set respawn delay (e.g., 3 seconds at 60 FPS)
-
-                    # Reset position to initial spawn coordinates
-                    spawn_x, spawn_y = game_state.ghost_positions[ghost.id]
-                    ghost.x = spawn_x * unit_width
-                    ghost.y = spawn_y * unit_height
-                    print(f"Respawning ghost {ghost.id} to ({spawn_x}, {spawn_y})")
-
-        for ghost in ghosts:
-            if ghost.dead and ghost.respawn_timer > 0:
-                ghost.respawn_timer -= 1  # Countdown the respawn timer
-                if ghost.respawn_timer == 0:
-                    ghost.dead = False  # Bring the ghost back to life
-                    ghost.speed = 1  # Restore ghost speed
-                    print(f"Ghost {ghost.id} is back in play!")
-
-
-        # Check if all pellets are eaten (win condition)
-        if not any('o' in row or '.' in row for row in maze):
+        with tracker.phase("draw"):
+            # Draw the maze, score and lives, then Pacman and the ghosts
+            if walls_rounded == governor.sheds(WALL_OUTLINES):
+                walls_rounded = not walls_rounded
+                background = display_format(level.background if walls_rounded else
+                                            render_background(maze, game.background, False, size))
+            draw_board(game.screen, view.maze, view.score, game.font, view.lives, high_score, background, size=size)
+            # Reduced animation shows two of Pacman's four frames
+            x, y, pacman_size, direction, counter = view.pacman
+            counter = counter // 20 * 20 if governor.sheds(ANIMATION) else counter
+            draw_player(game.screen, x * scale_x, y * scale_y, max(1, round(pacman_size * scale_x)), direction, counter)
+            for g_id, x, y, dead in view.ghosts:
+                draw_ghost_image(game.screen, ghost_sprites[g_id], x * scale_x, y * scale_y, dead, view.boosted,
+                                 g_id in view.eaten)
+
+        # Move on to the next level of the campaign, keeping the score and lives
+        if view.won and campaign.has_next:
+            if isinstance(runner, SimulationThread):
+                runner.stop()
+            try:
+                level = campaign.advance()
+            except ValueError as e:
+                print(f"Error parsing game state: {e}")
+                game.running = False
+                continue
+            game_state, maze = level.game_state, level.game_state.maze
+            background = display_format(level.background if walls_rounded else
+                                        render_background(maze, game.background, False, size))
+            unit_width, unit_height = level.unit_width, level.unit_height
+            game.level, game.unit_width, game.unit_height = level.index, unit_width, unit_height
+            for g_id in game_state.ghost_positions:
+                if g_id not in ghost_images:
+                    ghost_images[g_id] = pygame.Surface((40, 40))
+                    ghost_sprites[g_id] = display_format(pygame.Surface((ghost_size, ghost_size)))
+            score, lives = pacman.score, pacman.lives
+            sim = Simulation(game_state, unit_width, unit_height, pacman_config=pacman_config,
+                             ghost_images=ghost_images, bus=bus, move_table=level.move_table)
+            pacman, ghosts = sim.pacman, sim.ghosts
+            pacman.score, pacman.lives = score, lives
+            history = RewindBuffer(sim)
+            history.record(sim)
+            runner = start_runner(sim, history)
+            logger.info(f"Level {level.index + 1} of {len(campaign.level_paths)}: {level.path}")
+
+        # Check if all pellets are eaten on the last level (win condition)
+        elif view.won:
             save_high_score(high_score_file, high_score)  # Save the high score before displaying the win message
-            display_message(screen, font, "YOU WIN!!!")  # Display win message
+            display_message(screen, font, "YOU WIN!!!", target.present)  # Display win message
             game.running = False
 
         # Check if Pacman is out of lives (lose condition)
-        if pacman.lives == 0:
+        elif view.lost:
             save_high_score(high_score_file, high_score)  # Save the high score before displaying the lose message
-            display_message(screen, font, "YOU LOSE!!!")  # Display lose message
+            display_message(screen, font, "YOU LOSE!!!", target.present)  # Display lose message
             game.running = False
 
-        pygame.display.flip()  # Update the display with the latest frame
+        if show_overlay and not governor.sheds(OVERLAYS):
+            game.screen.blit(text_cache.render(font, governor.describe(), 'yellow'), (10, 10))
+
+        governor.record(time.perf_counter() - work_start)
+        with tracker.phase("present"):
+            target.present()  # Scale the frame up to the window and show it
+        tracker.end_frame()
+
+    if isinstance(runner, SimulationThread):
+        runner.stop()
+        logger.info(f"Simulation thread: {runner.stats.ticks} ticks, {runner.stats.late_ticks} late, "
+                    f"input latency {runner.mean_latency * 1000:.1f} ms mean, {runner.max_latency * 1000:.1f} ms max")
+    if autopilot is not None:
+        logger.info(f"Autopilot: {autopilot.describe()}")
+    if tracker.running:
+        tracker.stop()
+        logger.info(f"Allocations per frame:\n{tracker.report()}")
+    if sim.over:
+        autosaver.close()
+        remove_checkpoint(AUTOSAVE_FILE)  # The run is finished; nothing to resume
+    else:
+        autosaver.close(snapshot())  # Quit mid-run: save where the player left off
+    campaign.close()  # Stop the level loader thread
+    log_listener.stop()  # Flush queued log output
 
 pygame.quit()  # Quit Pygame after exiting the game loop
 
 # Run the main function if the script is executed directly
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Play Pacman.")
+    parser.add_argument("levels", nargs="*", help="Campaign maze files, in order (default maze.txt)")
+    parser.add_argument("--autopilot", action="store_true", help="Let the MCTS bot play")
+    parser.add_argument("--budget", type=float, default=12.0, help="Autopilot thinking time per move, in ms")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Report allocations and GC pauses per frame phase at exit (slows the game)")
+    parser.add_argument("--resume", action="store_true", help="Continue the run saved in " + AUTOSAVE_FILE)
+    parser.add_argument("--threaded", action="store_true",
+                        help="Run the simulation on its own thread at a fixed rate, independent of drawing")
+    parser.add_argument("--render-size", type=parse_size, metavar="WxH",
+                        help=f"Draw frames at this resolution and scale them to the window (default {WIDTH}x{HEIGHT})")
+    parser.add_argument("--scaled", action="store_true",
+                        help="Let SDL scale the render size to the window (pygame.SCALED) instead of one scaling blit")
+    args = parser.parse_args()
+    tracker = AllocationTracker()
+    if args.profile_memory:
+        tracker.start()
+    main(args.levels, Autopilot(budget=args.budget / 1000) if args.autopilot else None, tracker, args.resume, args.threaded,
+         args.render_size, args.scaled)
\ No newline at end of file
@@ -0,0 +1,291 @@
+""" Streaming statistics over completed runs, in bounded memory and mergeable across workers. """
+import heapq
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Generic, Hashable, List, NamedTuple, Optional, Tuple, TypeVar
+from events import GHOST_EATEN, LIFE_LOST, GameStatistics
+from simulation import Simulation
+
+METRICS = ("score", "duration", "lives_lost", "ghosts_eaten")
+Item = TypeVar("Item", bound=Hashable)
+
+
+class RunOutcome(NamedTuple):
+    """ How one completed run went. """
+    run_id: str
+    score: int
+    duration: float  # Game time in seconds
+    lives_lost: int
+    ghosts_eaten: int
+    strategies: Tuple[str, ...]  # Ghost strategy class names, sorted: the run's strategy mix
+
+
+def outcome_of(run_id: str, sim: Simulation, events: GameStatistics, fps: float = 60.0) -> RunOutcome:
+    """
+    Purpose: Describes a run from its simulation and the GameStatistics subscribed to its bus.
+    Examples:
+        outcome_of("s1", sim, stats)  # -> RunOutcome("s1", 160, 9.5, 3, 1, ('ChasingGhostStrategy', ...))
+    """
+    strategies = tuple(sorted(type(strategy).__name__ for strategy in sim.strategies.values()))
+    return RunOutcome(run_id, sim.pacman.score, sim.frame / fps, events.counts[LIFE_LOST],
+                      events.counts[GHOST_EATEN], strategies)
+
+
+@dataclass
+class Moments:
+    """
+    Purpose: Count, mean, variance, minimum and maximum of a stream, updated one value at a time
+             (Welford) and merged exactly (Chan et al.), in constant memory.
+    Examples:
+        moments = Moments()
+        for x in [2, 4, 4, 4, 5, 5, 7, 9]:
+            moments.add(x)
+        moments.mean, moments.variance -> (5.0, 4.0)
+    """
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0  # Sum of squared differences from the mean
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.minimum = min(self.minimum, x)
+        self.maximum = max(self.maximum, x)
+
+    def merge(self, other: "Moments") -> None:
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self) -> float:
+        """ Population variance. """
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """
+    Purpose: Estimates quantiles of a stream of non-negative values to within
+             `relative_accuracy` of the true value (a DDSketch). Values are counted in
+             logarithmically sized buckets, so memory depends on the range of the values, not
+             on how many there are, and is capped at `max_buckets` by folding the lowest buckets
+             together. Sketches with the same accuracy merge exactly by adding bucket counts.
+    Examples:
+        sketch = QuantileSketch()
+        for x in range(1, 1001):
+            sketch.add(x)
+        sketch.quantile(0.5)  # -> about 500, within 1%
+    """
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 1024):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must be between 0 and 1.")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, int] = {}  # Bucket index -> count; bucket i holds (gamma^(i-1), gamma^i]
+        self.zeros = 0  # Values too small for a bucket, reported as 0
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, x: float, count: int = 1) -> None:
+        if x < 0:
+            raise ValueError(f"QuantileSketch only takes non-negative values, not {x}.")
+        self.count += count
+        self.minimum = min(self.minimum, x)
+        self.maximum = max(self.maximum, x)
+        if x < 1e-9:
+            self.zeros += count
+            return
+        index = math.ceil(math.log(x) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self.collapse()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches with the same relative accuracy can be merged.")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        if len(self.buckets) > self.max_buckets:
+            self.collapse()
+
+    def collapse(self) -> None:
+        """ Folds the lowest buckets into one, so only `max_buckets` remain. """
+        indexes = sorted(self.buckets)
+        excess = indexes[:len(indexes) - self.max_buckets + 1]
+        self.buckets[excess[-1]] = sum(self.buckets.pop(index) for index in excess)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Purpose: Returns an estimate of the `q` quantile (0 to 1), or None if nothing was added.
+        Examples:
+            sketch.quantile(0.99)
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                value = 2 * self.gamma ** index / (self.gamma + 1)  # Middle of the bucket, in relative terms
+                return min(max(value, self.minimum), self.maximum)
+        return self.maximum
+
+
+class TopK:
+    """
+    Purpose: Keeps the `k` largest values of a stream with their keys (a min-heap of size k).
+             Merging two keeps the k largest of both, which is exact.
+    Examples:
+        best = TopK(2)
+        for key, value in [("a", 5), ("b", 9), ("c", 7)]:
+            best.add(value, key)
+        best.items() -> [(9, "b"), (7, "c")]
+    """
+    def __init__(self, k: int = 10):
+        self.k = k
+        self.heap: List[Tuple[float, str]] = []
+
+    def add(self, value: float, key: str) -> None:
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (value, key))
+        elif (value, key) > self.heap[0]:
+            heapq.heapreplace(self.heap, (value, key))
+
+    def merge(self, other: "TopK") -> None:
+        for value, key in other.heap:
+            self.add(value, key)
+
+    def items(self) -> List[Tuple[float, str]]:
+        """ The kept values and keys, largest first. """
+        return sorted(self.heap, reverse=True)
+
+
+class FrequentItems(Generic[Item]):
+    """
+    Purpose: Counts the most frequent items of a stream in at most `capacity` counters (Space
+             Saving): a new item takes over the smallest counter, so counts may be
+             overestimated by at most the smallest count, but any item more frequent than
+             1 / capacity of the stream is always kept. Merging adds counters and keeps the
+             largest `capacity`.
+    Examples:
+        mixes = FrequentItems(capacity=2)
+        for item in "aabac":
+            mixes.add(item)
+        mixes.most_common(1) -> [("a", 3)]
+    """
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self.counts: Dict[Item, int] = {}
+
+    def add(self, item: Item, count: int = 1) -> None:
+        counts = self.counts
+        if item in counts or len(counts) < self.capacity:
+            counts[item] = counts.get(item, 0) + count
+            return
+        smallest = min(counts, key=lambda kept: counts[kept])
+        counts[item] = counts.pop(smallest) + count
+
+    def merge(self, other: "FrequentItems[Item]") -> None:
+        combined = Counter(self.counts)
+        combined.update(other.counts)
+        self.counts = dict(combined.most_common(self.capacity))
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Item, int]]:
+        return Counter(self.counts).most_common(n)
+
+
+class RunStats:
+    """
+    Purpose: Aggregates completed runs one at a time, keeping for each of METRICS its moments
+             and a quantile sketch, plus the `top` highest-scoring runs and the most frequent
+             strategy mixes and strategies. Memory is bounded however many runs are added,
+             and aggregates built by separate workers merge into one that answers the same
+             queries, unlike highest_score, which walks every saved game.
+    Examples:
+        stats = RunStats()
+        stats.add(outcome_of(name, sim, events))
+        stats.merge(other_worker_stats)
+        stats.quantile("score", 0.9), stats.moments["duration"].mean
+        print(stats.describe())
+    """
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 1024, top: int = 10, mixes: int = 32):
+        self.moments = {metric: Moments() for metric in METRICS}
+        self.sketches = {metric: QuantileSketch(relative_accuracy, max_buckets) for metric in METRICS}
+        self.best = TopK(top)
+        self.mixes: FrequentItems[Tuple[str, ...]] = FrequentItems(mixes)
+        self.strategies: FrequentItems[str] = FrequentItems(mixes)
+
+    @property
+    def count(self) -> int:
+        return self.moments["score"].count
+
+    def add(self, outcome: RunOutcome) -> None:
+        for metric in METRICS:
+            value = getattr(outcome, metric)
+            self.moments[metric].add(value)
+            self.sketches[metric].add(value)
+        self.best.add(outcome.score, outcome.run_id)
+        self.mixes.add(outcome.strategies)
+        for strategy in set(outcome.strategies):
+            self.strategies.add(strategy)
+
+    def merge(self, other: "RunStats") -> "RunStats":
+        """
+        Purpose: Adds another aggregate's runs to this one and returns it.
+        Examples:
+            total = reduce(RunStats.merge, per_worker, RunStats())
+        """
+        for metric in METRICS:
+            self.moments[metric].merge(other.moments[metric])
+            self.sketches[metric].merge(other.sketches[metric])
+        self.best.merge(other.best)
+        self.mixes.merge(other.mixes)
+        self.strategies.merge(other.strategies)
+        return self
+
+    def quantile(self, metric: str, q: float) -> Optional[float]:
+        return self.sketches[metric].quantile(q)
+
+    def describe(self) -> str:
+        """
+        Purpose: Returns a plain-text summary, one line per metric, then the best runs and mixes.
+        Examples:
+            stats.describe()
+            # "score: n=400 mean 152.3 sd 40.1 min 12 p50 150 p90 201 p99 240 max 251\\n..."
+        """
+        lines = []
+        for metric in METRICS:
+            moments = self.moments[metric]
+            if not moments.count:
+                continue
+            p50, p90, p99 = (self.quantile(metric, q) for q in (0.5, 0.9, 0.99))
+            lines.append(f"{metric}: n={moments.count} mean {moments.mean:.1f} sd {moments.stdev:.1f} "
+                         f"min {moments.minimum:g} p50 {p50:.4g} p90 {p90:.4g} p99 {p99:.4g} max {moments.maximum:g}")
+        lines.append("best: " + ", ".join(f"{key} {value:g}" for value, key in self.best.items()))
+        lines.append("mixes: " + ", ".join(f"{'+'.join(mix)} x{count}" for mix, count in self.mixes.most_common(3)))
+        return "\n".join(lines)
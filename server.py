@@ -0,0 +1,284 @@
+""" Asyncio game server that streams delta-compressed game state to spectators and players. """
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from game import load_game_state
+from session_host import HostedSession, SessionHost
+from simulation import Simulation
+from state_codec import *
+
+
+async def read_message(reader: asyncio.StreamReader) -> bytes:
+    """
+    Purpose: Reads one length-prefixed payload; raises asyncio.IncompleteReadError at EOF.
+    Examples:
+        payload = await read_message(reader)
+        payload[0]  # -> message type
+    """
+    (length,) = LENGTH_PREFIX.unpack(await reader.readexactly(LENGTH_PREFIX.size))
+    return await reader.readexactly(length)
+
+
+class GameSession(HostedSession):
+    """
+    Purpose: One hosted game: its simulation, the latest player input and the connected
+             subscribers. Each tick's delta is encoded once and shared by all subscribers.
+    Examples:
+        session = GameSession("lobby", Simulation(load_game_state("maze.txt")))
+    """
+    def __init__(self, name: str, sim: Simulation, max_buffer: int = 1 << 18):
+        super().__init__(name, sim)
+        self.encoder = DeltaEncoder(sim)
+        self.max_buffer = max_buffer
+        self.subscribers: Dict[asyncio.StreamWriter, bool] = {}  # writer -> has a keyframe
+
+    def tick(self, deltaT: float) -> None:
+        """
+        Purpose: Steps the simulation once and broadcasts the tick's delta to the subscribers.
+        Examples:
+            session.tick(1 / 60)
+        """
+        super().tick(deltaT)
+        self.broadcast(frame_message(self.encoder.encode(self.sim)), self.max_buffer)
+
+    def subscribe(self, writer: asyncio.StreamWriter) -> None:
+        """
+        Purpose: Adds a subscriber and sends it a keyframe of the current state straight away,
+                 so clients joining a finished game, which no longer ticks, still get its state.
+                 Deltas from the next tick apply on top of it.
+        Examples:
+            session.subscribe(writer)
+        """
+        writer.write(frame_message(encode_keyframe(self.sim)))
+        self.subscribers[writer] = True
+
+    def broadcast(self, delta: bytes, max_buffer: int) -> None:
+        """
+        Purpose: Sends a tick's delta to every subscriber without awaiting. Subscribers whose
+                 socket buffer exceeds `max_buffer` bytes skip deltas and are resynchronised
+                 with a keyframe once they have drained.
+        Examples:
+            session.broadcast(frame_message(session.encoder.encode(session.sim)), max_buffer=1 << 18)
+        """
+        keyframe = None
+        for writer, synced in list(self.subscribers.items()):
+            if writer.is_closing():
+                del self.subscribers[writer]
+                continue
+            if writer.transport.get_write_buffer_size() > max_buffer:
+                self.subscribers[writer] = False  # Lagging: drop deltas until drained
+                continue
+            if synced:
+                writer.write(delta)
+            else:
+                if keyframe is None:
+                    keyframe = frame_message(encode_keyframe(self.sim))
+                writer.write(keyframe)
+                self.subscribers[writer] = True
+
+
+class GameServer:
+    """
+    Purpose: Hosts named game sessions over TCP. Clients send a hello naming a session and a
+             role; spectators only receive state, players also send inputs. Sessions are ticked
+             at `fps` by one SessionHost and stream deltas to their subscribers.
+    Examples:
+        server = GameServer("maze.txt")
+        await server.start("127.0.0.1", 8765)
+    """
+    def __init__(self, maze_path: str = "maze.txt", fps: float = 60.0, max_buffer: int = 1 << 18):
+        self.maze_path = maze_path
+        self.fps = fps
+        self.max_buffer = max_buffer
+        self.host = SessionHost(fps)
+        self.sessions: Dict[str, GameSession] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.host_task: Optional[asyncio.Task] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Purpose: Starts listening and returns the bound port (useful with port 0 in tests).
+        Examples:
+            port = await server.start()
+        """
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.host_task = asyncio.get_running_loop().create_task(self.host.run(stop_when_idle=False))
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """
+        Purpose: Stops ticking sessions and closes the listening socket and client connections.
+        Examples:
+            await server.stop()
+        """
+        if self.host_task is not None:
+            self.host_task.cancel()
+        for session in self.sessions.values():
+            for writer in session.subscribers:
+                writer.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def get_session(self, name: str) -> GameSession:
+        """
+        Purpose: Returns the named session, creating it and adding it to the host if needed.
+                 Finished games stay listed (subscribers keep their final state) but no longer tick.
+        Examples:
+            server.get_session("lobby")
+        """
+        if name not in self.sessions:
+            session = GameSession(name, Simulation(load_game_state(self.maze_path)), self.max_buffer)
+            self.host.add(session)
+            self.sessions[name] = session
+        return self.sessions[name]
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Purpose: Serves one connection: reads the hello, subscribes the client to its session,
+                 then applies player inputs until the client disconnects.
+        Examples:
+            asyncio.start_server(server.handle_client, host, port)
+        """
+        session = None
+        try:
+            hello = decode_message(await read_message(reader))
+            if hello["type"] != MSG_HELLO:
+                return
+            session = self.get_session(hello["session"])
+            session.subscribe(writer)
+            while True:
+                message = decode_message(await read_message(reader))
+                if message["type"] == MSG_INPUT and hello["role"] == ROLE_PLAYER:
+                    session.direction_command = message["direction"]
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass  # Server shutting down; finish normally so the stream callback stays quiet
+        finally:
+            if session is not None:
+                session.subscribers.pop(writer, None)
+            writer.close()
+
+
+class GameClient:
+    """
+    Purpose: Connects to a GameServer session, keeps a MirrorState up to date and, as a player,
+             sends direction inputs.
+    Examples:
+        client = await GameClient.connect("127.0.0.1", port, "lobby", ROLE_PLAYER)
+        await client.send_input(0)
+        await client.receive()  # Applies the next keyframe or delta to client.mirror
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.mirror = MirrorState()
+        self.bytes_received = 0
+        self.messages_received = 0
+
+    @classmethod
+    async def connect(cls, host: str, port: int, session: str, role: int = ROLE_SPECTATOR) -> 'GameClient':
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(frame_message(encode_hello(session, role)))
+        await writer.drain()
+        return cls(reader, writer)
+
+    async def send_input(self, direction_command: Optional[int]) -> None:
+        self.writer.write(frame_message(encode_input(direction_command)))
+        await self.writer.drain()
+
+    async def receive(self, decode: bool = True) -> Dict[str, Any]:
+        """
+        Purpose: Reads the next message and, if `decode` is set, applies it to the mirror.
+                 Load tests pass decode=False to measure transport throughput only.
+        Examples:
+            message = await client.receive()
+        """
+        payload = await read_message(self.reader)
+        self.bytes_received += len(payload) + LENGTH_PREFIX.size
+        self.messages_received += 1
+        if not decode:
+            return {"type": payload[0]}
+        message = decode_message(payload)
+        self.mirror.apply(message)
+        return message
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def load_test(host: str, port: int, session: str = "load", clients: int = 1000,
+                    seconds: float = 5.0, decode: bool = False) -> Dict[str, float]:
+    """
+    Purpose: Connects `clients` spectators to one session, receives for `seconds` and reports
+             totals and rates. Thousands of clients need a raised open-file limit (ulimit -n).
+    Examples:
+        stats = await load_test("127.0.0.1", port, clients=2000, seconds=10)
+        stats["messages_per_second"]
+    """
+    connected = await asyncio.gather(*(GameClient.connect(host, port, session) for _ in range(clients)))
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+
+    async def consume(client: GameClient) -> None:
+        try:
+            while time.perf_counter() < deadline:
+                await asyncio.wait_for(client.receive(decode), timeout=max(0.01, deadline - time.perf_counter()))
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    await asyncio.gather(*(consume(client) for client in connected))
+    elapsed = time.perf_counter() - start
+    for client in connected:
+        await client.close()
+    messages = sum(client.messages_received for client in connected)
+    received = sum(client.bytes_received for client in connected)
+    return {
+        "clients": clients,
+        "seconds": elapsed,
+        "messages": messages,
+        "bytes": received,
+        "messages_per_second": messages / elapsed,
+        "bytes_per_message": received / messages if messages else 0.0,
+    }
+
+
+async def serve_forever(host: str, port: int, maze_path: str, fps: float) -> None:
+    server = GameServer(maze_path, fps)
+    bound = await server.start(host, port)
+    print(f"Serving {maze_path} on {host}:{bound}")
+    await asyncio.Event().wait()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Purpose: Command-line entry point for running the server or a load test against it.
+    Examples:
+        python server.py serve --port 8765
+        python server.py loadtest --port 8765 --clients 2000 --seconds 10
+    """
+    parser = argparse.ArgumentParser(description="Pacman spectator/multiplayer server.")
+    parser.add_argument("mode", choices=["serve", "loadtest"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--maze", default="maze.txt")
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--session", default="load")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if args.mode == "serve":
+        asyncio.run(serve_forever(args.host, args.port, args.maze, args.fps))
+    else:
+        print(asyncio.run(load_test(args.host, args.port, args.session, args.clients, args.seconds)))
+
+
+if __name__ == "__main__":
+    main()
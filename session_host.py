@@ -0,0 +1,342 @@
+""" Hosts many headless game sessions per process on one asyncio event loop. """
+import argparse
+import asyncio
+import functools
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from events import GameStatistics
+from game import GameState, load_game_state
+from run_stats import RunOutcome, RunStats, outcome_of
+from shared_maze import SharedMaze, SharedMazeSpec
+from simulation import Simulation
+
+Controller = Callable[[Simulation], Optional[int]]  # Picks a direction command each tick, like Autopilot
+
+
+class TimerWheel:
+    """
+    Purpose: A hashed timing wheel of `slots` buckets, one per tick. Scheduling and collecting
+             due items cost O(1) per item no matter how many are pending; items due more than
+             a full turn ahead wait in their bucket until their tick comes round.
+    Examples:
+        wheel = TimerWheel(8)
+        wheel.schedule(2, "a")
+        wheel.advance() -> []
+        wheel.advance() -> ["a"]
+    """
+    def __init__(self, slots: int = 256):
+        self.slots: List[List[Tuple[int, Any]]] = [[] for _ in range(slots)]
+        self.now = 0  # Ticks advanced so far
+        self.pending = 0
+
+    def schedule(self, delay: int, item: Any) -> None:
+        """
+        Purpose: Makes `item` due `delay` ticks from now (at least one).
+        Examples:
+            wheel.schedule(1, session)  # Due on the next advance
+        """
+        due = self.now + max(1, delay)
+        self.slots[due % len(self.slots)].append((due, item))
+        self.pending += 1
+
+    def advance(self) -> List[Any]:
+        """
+        Purpose: Moves to the next tick and returns the items due on it, in scheduling order.
+        Examples:
+            for session in wheel.advance():
+                ...
+        """
+        self.now += 1
+        index = self.now % len(self.slots)
+        bucket = self.slots[index]
+        if not bucket:
+            return []
+        due = [item for tick, item in bucket if tick == self.now]
+        if len(due) == len(bucket):
+            self.slots[index] = []
+        else:
+            self.slots[index] = [entry for entry in bucket if entry[0] != self.now]
+        self.pending -= len(due)
+        return due
+
+
+@dataclass
+class SessionStats:
+    """ Tick latency of one session: how late each tick started and how long it ran. """
+    ticks: int = 0
+    late_ticks: int = 0  # Ticks that started a whole period or more after they were due
+    total_lateness: float = 0.0
+    max_lateness: float = 0.0
+    total_step: float = 0.0
+    max_step: float = 0.0
+
+    def record(self, lateness: float, step: float, period: float) -> None:
+        self.ticks += 1
+        if lateness >= period:
+            self.late_ticks += 1
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        self.total_step += step
+        self.max_step = max(self.max_step, step)
+
+    @property
+    def mean_lateness(self) -> float:
+        return self.total_lateness / self.ticks if self.ticks else 0.0
+
+    @property
+    def mean_step(self) -> float:
+        return self.total_step / self.ticks if self.ticks else 0.0
+
+
+class HostedSession:
+    """
+    Purpose: One game hosted by a SessionHost. All of its state lives on the object (there are
+             no module-level globals), so any number can share a process. Each tick uses the
+             `controller`'s command if there is one, otherwise the latest `direction_command`.
+             `period` is the number of host ticks between the session's own ticks. Each host
+             tick advances `speed` game frames; a session ticking more than one frame at a
+             time is fast-forwarded (Simulation.fast_forward) on the command it was given.
+    Examples:
+        session = HostedSession("lobby", Simulation(load_game_state("maze.txt")))
+        session.tick(1 / 60)
+        HostedSession("soak", sim, controller=Autopilot(), speed=50)  # 50x real time
+    """
+    def __init__(self, name: str, sim: Simulation, controller: Optional[Controller] = None, period: int = 1,
+                 speed: int = 1):
+        self.name = name
+        self.sim = sim
+        self.controller = controller
+        self.period = period
+        self.speed = speed
+        self.direction_command: Optional[int] = None
+        self.stats = SessionStats()
+        self.events = GameStatistics()  # Lives lost and ghosts eaten, for the run's outcome
+        sim.bus.subscribe(self.events)
+        self.closed = False
+
+    def tick(self, deltaT: float) -> None:
+        command = self.controller(self.sim) if self.controller is not None else self.direction_command
+        frames = self.period * self.speed
+        if frames == 1:
+            self.sim.step(command, deltaT)
+        else:
+            self.sim.fast_forward(frames, command, deltaT / self.period)  # deltaT spans `period` frames
+
+
+class SessionHost:
+    """
+    Purpose: Ticks every hosted session from a single driver coroutine. Sessions wait on a
+             TimerWheel rather than sleeping on their own, so the event loop only wakes once
+             per tick however many sessions there are. The driver yields to the loop every
+             `batch` sessions so network I/O keeps flowing, and records each session's
+             lateness and step time. Finished sessions move to `finished`.
+    Examples:
+        host = SessionHost(fps=60)
+        host.add(HostedSession("a", Simulation(load_game_state("maze.txt"))))
+        asyncio.run(host.run(seconds=5))
+        host.finished["a"].stats.mean_lateness
+    """
+    def __init__(self, fps: float = 60.0, slots: int = 256, batch: int = 32):
+        self.fps = fps
+        self.period = 1 / fps
+        self.batch = batch
+        self.wheel = TimerWheel(slots)
+        self.sessions: Dict[str, HostedSession] = {}
+        self.finished: Dict[str, HostedSession] = {}
+        self.wakeup = asyncio.Event()
+
+    def add(self, session: HostedSession) -> HostedSession:
+        """
+        Purpose: Starts hosting `session`; its first tick is on the host's next tick.
+        Examples:
+            host.add(HostedSession("b", sim, controller=Autopilot()))
+        """
+        if session.name in self.sessions:
+            raise ValueError(f"Session {session.name!r} is already hosted")
+        self.sessions[session.name] = session
+        self.wheel.schedule(1, session)
+        self.wakeup.set()
+        return session
+
+    def remove(self, name: str) -> Optional[HostedSession]:
+        """
+        Purpose: Stops hosting a session; it is dropped from the wheel when its tick comes up.
+        Examples:
+            host.remove("b")
+        """
+        session = self.sessions.pop(name, None)
+        if session is not None:
+            session.closed = True
+        return session
+
+    def all_stats(self) -> Dict[str, SessionStats]:
+        """
+        Purpose: Returns the latency stats of every session, running or finished, by name.
+        Examples:
+            host.all_stats()["a"].max_lateness
+        """
+        stats = {name: session.stats for name, session in self.finished.items()}
+        stats.update((name, session.stats) for name, session in self.sessions.items())
+        return stats
+
+    async def run(self, seconds: Optional[float] = None, stop_when_idle: bool = True) -> None:
+        """
+        Purpose: Drives the sessions for `seconds` of host ticks (forever if None). With nothing
+                 left to run it returns, or waits for `add` when `stop_when_idle` is False.
+                 A host that falls behind runs its ticks back to back instead of skipping any.
+        Examples:
+            await host.run(seconds=10)
+            asyncio.create_task(host.run(stop_when_idle=False))  # Server mode
+        """
+        loop = asyncio.get_running_loop()
+        last_tick = None if seconds is None else self.wheel.now + round(seconds * self.fps)
+        started = loop.time() - self.wheel.now * self.period
+        while last_tick is None or self.wheel.now < last_tick:
+            if not self.wheel.pending:
+                if stop_when_idle:
+                    return
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                started = loop.time() - self.wheel.now * self.period  # Restart the clock
+                continue
+            due_time = started + (self.wheel.now + 1) * self.period
+            delay = due_time - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            for count, session in enumerate(self.wheel.advance(), 1):
+                if session.closed:
+                    continue
+                start = loop.time()
+                session.tick(session.period * self.period)
+                end = loop.time()
+                session.stats.record(start - due_time, end - start, self.period)
+                if session.sim.over:
+                    del self.sessions[session.name]
+                    self.finished[session.name] = session
+                else:
+                    self.wheel.schedule(session.period, session)
+                if count % self.batch == 0:
+                    await asyncio.sleep(0)
+
+
+def shard_of(name: str, workers: int) -> int:
+    """
+    Purpose: Picks the worker process for a session. The hash is stable across processes and
+             runs (unlike hash()), so a session name always lands on the same shard.
+    Examples:
+        shard_of("lobby", 4) -> 2
+    """
+    return zlib.crc32(name.encode()) % workers
+
+
+def host_shard(maze: Union[str, SharedMazeSpec], names: List[str], seconds: float, fps: float,
+               speed: int = 1) -> Dict[str, Dict[str, Any]]:
+    """
+    Purpose: Worker process entry point: hosts the named sessions for `seconds` at `speed`
+             frames per tick and returns each session's stats and final score as plain
+             dictionaries. `maze` is a maze file, or the spec of a SharedMaze to attach to
+             instead of parsing one, whose tables then answer the ghosts' path searches.
+    Examples:
+        host_shard("maze.txt", ["a", "b"], 5, 60)["a"]["ticks"]
+        host_shard(shared.spec, ["a", "b"], 5, 60)
+    """
+    shared: Optional[SharedMaze] = None
+    if isinstance(maze, SharedMazeSpec):
+        shared = SharedMaze.attach(maze)
+        shared.install()
+        new_game: Callable[[], GameState] = shared.game_state
+        move_table = shared.move_table()
+    else:
+        new_game = functools.partial(load_game_state, maze)
+        move_table = None
+    host = SessionHost(fps)
+    for name in names:
+        host.add(HostedSession(name, Simulation(new_game(), move_table=move_table), speed=speed))
+    try:
+        asyncio.run(host.run(seconds))
+    finally:
+        if shared is not None:
+            shared.close()
+    results = {}
+    for name, session in list(host.finished.items()) + list(host.sessions.items()):
+        outcome = outcome_of(name, session.sim, session.events, fps)
+        results[name] = dict(asdict(session.stats), score=session.sim.pacman.score, over=session.sim.over,
+                             frames=session.sim.frame, duration=outcome.duration, lives_lost=outcome.lives_lost,
+                             ghosts_eaten=outcome.ghosts_eaten, strategies=outcome.strategies)
+    return results
+
+
+def shard_run_stats(results: Dict[str, Dict[str, Any]]) -> RunStats:
+    """
+    Purpose: Aggregates the finished sessions of one shard's results into a RunStats, which
+             merges with the other shards' into statistics over every finished run.
+    Examples:
+        total = RunStats()
+        for results in run_sharded("maze.txt", names, workers=4):
+            total.merge(shard_run_stats(results))
+    """
+    stats = RunStats()
+    for name, result in results.items():
+        if result["over"]:
+            stats.add(RunOutcome(name, result["score"], result["duration"], result["lives_lost"],
+                                 result["ghosts_eaten"], tuple(result["strategies"])))
+    return stats
+
+
+def run_sharded(maze_path: str, names: List[str], workers: int = 4, seconds: float = 5.0,
+                fps: float = 60.0, speed: int = 1) -> List[Dict[str, Dict[str, Any]]]:
+    """
+    Purpose: Shards sessions across `workers` processes, each running its own SessionHost, and
+             returns the per-session results of every shard. The maze is compiled once into a
+             SharedMaze that every worker attaches to, and freed when the shards are done.
+    Examples:
+        shards = run_sharded("maze.txt", [f"s{i}" for i in range(400)], workers=4, seconds=5)
+    """
+    shards: List[List[str]] = [[] for _ in range(workers)]
+    for name in names:
+        shards[shard_of(name, workers)].append(name)
+    shared = SharedMaze.publish(maze_path)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(host_shard, shared.spec, shard, seconds, fps, speed) for shard in shards if shard]
+            return [future.result() for future in futures]
+    finally:
+        shared.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Purpose: Command-line entry point: hosts many idle sessions and prints tick latency by shard.
+    Examples:
+        python session_host.py --sessions 400 --workers 4 --seconds 5
+        python session_host.py --sessions 50 --speed 20  # Soak test at 20x real time
+    """
+    parser = argparse.ArgumentParser(description="Host many headless Pacman sessions.")
+    parser.add_argument("--maze", default="maze.txt")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--speed", type=int, default=1, help="Game frames per tick (fast-forward)")
+    args = parser.parse_args(argv)
+
+    names = [f"session-{i}" for i in range(args.sessions)]
+    finished = RunStats()
+    for shard, results in enumerate(run_sharded(args.maze, names, args.workers, args.seconds, args.fps, args.speed)):
+        finished.merge(shard_run_stats(results))
+        ticks = sum(result["ticks"] for result in results.values())
+        mean = sum(result["total_lateness"] for result in results.values()) / ticks if ticks else 0.0
+        worst = max(results.items(), key=lambda item: item[1]["max_lateness"])
+        late = sum(result["late_ticks"] for result in results.values())
+        frames = sum(result["frames"] for result in results.values())
+        print(f"shard {shard}: {len(results)} sessions, {ticks} ticks, {frames} frames, "
+              f"mean lateness {mean * 1000:.2f} ms, {late} late ticks, "
+              f"worst {worst[0]} {worst[1]['max_lateness'] * 1000:.2f} ms")
+    if finished.count:
+        print(f"finished runs:\n{finished.describe()}")
+
+
+if __name__ == "__main__":
+    main()
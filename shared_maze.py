@@ -0,0 +1,219 @@
+""" A compiled maze and its distance tables, published once in shared memory for worker processes. """
+from multiprocessing import shared_memory
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from board import VersionedMaze, get_valid_moves
+from game import GameState, load_game_state
+import ghost
+
+Tile = Tuple[int, int]
+UNREACHABLE = np.iinfo(np.uint16).max  # Distance between tiles with no path
+
+
+class SharedMazeSpec(NamedTuple):
+    """ What a worker needs to attach to a published maze; small and picklable. """
+    name: str  # Shared memory block name
+    arrays: Tuple[Tuple[str, str, Tuple[int, ...], int], ...]  # Array name, dtype, shape, byte offset
+    pacman_pos: Tile
+    ghost_positions: Tuple[Tuple[str, Tile], ...]
+
+
+def compile_tables(maze: List[List[str]]) -> Dict[str, np.ndarray]:
+    """
+    Purpose: Compiles a maze into flat arrays:
+             cells (height x width character codes), walls (1 for '#'),
+             neighbours (get_valid_moves of every cell, by cell number y * width + x, padded with -1),
+             tile_ids (number of each open tile, -1 for walls), tiles (x, y of each open tile),
+             distance (steps between every pair of open tiles, UNREACHABLE without a path) and
+             next_hop (open tile number of the first step from one tile towards another).
+             Ties between equally short paths are broken the way bfs_shortest_path breaks them.
+    Examples:
+        tables = compile_tables([list("###"), list("#.."), list("###")])
+        tables["distance"][0, 1] -> 1
+    """
+    height, width = len(maze), len(maze[0])
+    codes = [[ord(cell) for cell in row] for row in maze]
+    if any(code > 255 for row in codes for code in row):
+        raise ValueError("Maze cells must be single-byte characters.")
+    cells = np.array(codes, dtype=np.uint8)
+    walls = (cells == ord('#')).astype(np.uint8)
+
+    neighbours = np.full((height * width, 4), -1, dtype=np.int32)
+    for y in range(height):
+        for x in range(width):
+            for i, (nx, ny) in enumerate(get_valid_moves(maze, (x, y))):
+                neighbours[y * width + x, i] = ny * width + nx
+
+    tiles = np.argwhere(walls == 0)[:, ::-1].astype(np.int32)  # (x, y), in row order
+    count = len(tiles)
+    if count >= np.iinfo(np.int16).max:
+        raise ValueError(f"Maze has {count} open tiles, too many for the distance tables.")
+    tile_ids = np.full((height, width), -1, dtype=np.int32)
+    tile_ids[tiles[:, 1], tiles[:, 0]] = np.arange(count)
+    moves = [[int(tile_ids.flat[cell]) for cell in neighbours[y * width + x] if cell >= 0] for x, y in tiles]
+
+    distance = np.full((count, count), UNREACHABLE, dtype=np.uint16)
+    next_hop = np.full((count, count), -1, dtype=np.int16)
+    for start in range(count):
+        # Breadth-first from `start`, remembering which first step reached each tile first
+        steps, hops = distance[start], next_hop[start]
+        steps[start], hops[start] = 0, start
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            for following in moves[current]:
+                if steps[following] == UNREACHABLE:
+                    steps[following] = steps[current] + 1
+                    hops[following] = following if current == start else hops[current]
+                    queue.append(following)
+    return {"cells": cells, "walls": walls, "neighbours": neighbours, "tile_ids": tile_ids, "tiles": tiles,
+            "distance": distance, "next_hop": next_hop}
+
+
+class SharedMaze:
+    """
+    Purpose: A maze compiled once (compile_tables) into one multiprocessing.shared_memory
+             block. The publishing process owns the block; workers attach to it by its `spec`
+             and read the tables through read-only NumPy views, so the tables cost the same
+             memory however many workers there are, and a worker builds its game states from
+             the shared cells instead of parsing the maze file. `install` makes the ghosts'
+             shortest paths come from the shared next-hop table instead of a per-process BFS.
+    Examples:
+        shared = SharedMaze.publish("maze.txt")  # In the parent
+        worker = SharedMaze.attach(shared.spec)  # In each worker
+        worker.install()
+        sim = Simulation(worker.game_state(), move_table=worker.move_table())
+        worker.close()
+        shared.close()  # Frees the block once the workers are done
+    """
+    def __init__(self, spec: SharedMazeSpec, memory: shared_memory.SharedMemory, owner: bool):
+        self.spec = spec
+        self.memory = memory
+        self.owner = owner
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, dtype, shape, offset in spec.arrays:
+            view = np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+            view.flags.writeable = False
+            self.arrays[name] = view
+        self.cells, self.walls = self.arrays["cells"], self.arrays["walls"]
+        self.neighbours, self.tile_ids, self.tiles = self.arrays["neighbours"], self.arrays["tile_ids"], self.arrays["tiles"]
+        self.distance, self.next_hop = self.arrays["distance"], self.arrays["next_hop"]
+        self.height, self.width = self.cells.shape
+        self.rows = [[chr(code) for code in row] for row in self.cells.tolist()]
+        self.layout_id: Optional[int] = None  # Set by install
+
+    @classmethod
+    def publish(cls, file_path: str) -> "SharedMaze":
+        """
+        Purpose: Loads and compiles a maze file and copies its tables into a new shared memory
+                 block owned by the calling process.
+        Examples:
+            shared = SharedMaze.publish("maze.txt")
+        """
+        game_state = load_game_state(file_path)
+        tables = compile_tables(game_state.maze)
+        arrays, size = [], 0
+        for name, table in tables.items():
+            size = (size + 7) // 8 * 8  # Keep every array 8-byte aligned
+            arrays.append((name, table.dtype.str, table.shape, size))
+            size += table.nbytes
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for (name, dtype, shape, offset), table in zip(arrays, tables.values()):
+            np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)[...] = table
+        spec = SharedMazeSpec(memory.name, tuple(arrays), game_state.pacman_pos,
+                              tuple(game_state.ghost_positions.items()))
+        return cls(spec, memory, owner=True)
+
+    @classmethod
+    def attach(cls, spec: SharedMazeSpec) -> "SharedMaze":
+        """
+        Purpose: Attaches to a maze published by another process, without copying or parsing.
+        Examples:
+            worker = SharedMaze.attach(spec)
+        """
+        return cls(spec, shared_memory.SharedMemory(name=spec.name), owner=False)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def game_state(self) -> GameState:
+        """
+        Purpose: Returns a fresh game state at the maze's starting positions, with its own
+                 copy of the cells so games can eat pellets independently.
+        Examples:
+            shared.game_state().maze[11][9] -> ' '
+        """
+        return GameState(self.spec.pacman_pos, dict(self.spec.ghost_positions), [list(row) for row in self.rows])
+
+    def valid_moves(self, tile: Tile) -> List[Tile]:
+        """
+        Purpose: get_valid_moves from the shared adjacency, for any cell inside the maze.
+        Examples:
+            shared.valid_moves((9, 11)) -> [(10, 11), (8, 11)]  # maze.txt
+        """
+        x, y = tile
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return get_valid_moves(self.rows, tile)
+        width = self.width
+        return [(cell % width, cell // width) for cell in self.neighbours[y * width + x].tolist() if cell >= 0]
+
+    def move_table(self) -> Dict[Tile, List[Tile]]:
+        """ build_move_table from the shared adjacency, for Simulation's `move_table`. """
+        return {(x, y): self.valid_moves((x, y)) for y in range(self.height) for x in range(self.width)}
+
+    def tile_id(self, tile: Tile) -> int:
+        x, y = tile
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.tile_ids[y, x])
+        return -1
+
+    def steps_between(self, start: Tile, goal: Tile) -> Optional[int]:
+        """
+        Purpose: Returns the length of the shortest path between two tiles, or None if either is
+                 a wall or no path joins them.
+        Examples:
+            shared.steps_between((1, 1), (4, 1)) -> 3
+        """
+        a, b = self.tile_id(start), self.tile_id(goal)
+        if a < 0 or b < 0 or self.distance[a, b] == UNREACHABLE:
+            return None
+        return int(self.distance[a, b])
+
+    def shortest_path(self, start: Tile, goal: Tile) -> Optional[List[Tile]]:
+        """
+        Purpose: Returns the same path as bfs_shortest_path, by following the next-hop table.
+        Examples:
+            shared.shortest_path((1, 1), (3, 1)) -> [(1, 1), (2, 1), (3, 1)]
+        """
+        a, b = self.tile_id(start), self.tile_id(goal)
+        if a < 0 or b < 0 or self.distance[a, b] == UNREACHABLE:
+            return None
+        path = [start]
+        next_hop, tiles = self.next_hop, self.tiles
+        while a != b:
+            a = int(next_hop[a, b])
+            path.append((int(tiles[a, 0]), int(tiles[a, 1])))
+        return path
+
+    def install(self) -> None:
+        """
+        Purpose: Makes memo_shortest_path use these tables for every maze with this layout of
+                 walls and doors. A door that opens or closes changes the layout, and paths on it
+                 are searched and memoized as before.
+        Examples:
+            worker.install()
+        """
+        self.layout_id = VersionedMaze(self.rows).layout_id
+        ghost.path_tables[self.layout_id] = self
+
+    def close(self) -> None:
+        """ Uninstalls the tables and detaches; the owner also frees the shared block. """
+        if self.layout_id is not None and ghost.path_tables.get(self.layout_id) is self:
+            del ghost.path_tables[self.layout_id]
+        self.arrays.clear()
+        del self.cells, self.walls, self.neighbours, self.tile_ids, self.tiles, self.distance, self.next_hop
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
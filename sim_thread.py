@@ -0,0 +1,225 @@
+""" Runs the simulation on its own thread and hands immutable frame snapshots to the renderer. """
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, FrozenSet, Iterable, NamedTuple, Optional, Tuple
+from session_host import Controller, SessionStats
+from simulation import Simulation
+
+Hook = Callable[[Simulation], Any]  # Runs on the simulation's thread, e.g. RewindBuffer.record; results are ignored
+
+
+class FrameSnapshot(NamedTuple):
+    """ Everything the renderer needs from one simulation frame; never changed after publishing. """
+    frame: int
+    maze: Tuple[str, ...]  # Rows as strings; shared with the previous snapshot while the maze is unchanged
+    maze_generation: int
+    pacman: Tuple[float, float, int, int, int]  # x, y, size, direction, animation counter
+    ghosts: Tuple[Tuple[str, float, float, bool], ...]  # id, x, y, dead
+    eaten: FrozenSet[str]  # Ghosts eaten during the current boost
+    score: int
+    lives: int
+    boosted: bool
+    won: bool
+    lost: bool
+    published: float  # time.perf_counter() when the snapshot was taken
+
+
+def take_snapshot(sim: Simulation, previous: Optional[FrameSnapshot] = None) -> FrameSnapshot:
+    """
+    Purpose: Copies the renderable state of `sim` into a FrameSnapshot. The maze rows are only
+             copied when the maze's generation has moved on since `previous`.
+    Examples:
+        snapshot = take_snapshot(sim)
+        snapshot.maze[1][1] -> '.'
+    """
+    maze, pacman = sim.maze, sim.pacman
+    if previous is not None and previous.maze_generation == maze.generation and len(previous.maze) == len(maze):
+        rows = previous.maze
+    else:
+        rows = tuple("".join(row) for row in maze)
+    eaten = sim.eaten_ghosts.eaten_ghosts
+    return FrameSnapshot(
+        frame=sim.frame,
+        maze=rows,
+        maze_generation=maze.generation,
+        pacman=(pacman.x, pacman.y, pacman.size, pacman.direction, pacman.counter),
+        ghosts=tuple((ghost.id, ghost.x, ghost.y, ghost.dead) for ghost in sim.ghosts),
+        eaten=frozenset(g_id for g_id, was_eaten in eaten.items() if was_eaten),
+        score=pacman.score,
+        lives=pacman.lives,
+        boosted=pacman.boosted,
+        won=sim.won,
+        lost=sim.lost,
+        published=time.perf_counter(),
+    )
+
+
+class SnapshotBuffer:
+    """
+    Purpose: Hands snapshots from the simulation thread to the render thread. Snapshots are
+             immutable, so the writer never waits for the reader: publishing swaps one
+             (previous, latest) pair in a single reference assignment, and the reader always
+             sees a complete pair. The previous snapshot is kept for interpolation.
+    Examples:
+        buffer = SnapshotBuffer(take_snapshot(sim))
+        buffer.publish(take_snapshot(sim, buffer.latest))
+        buffer.latest.frame -> 1
+    """
+    def __init__(self, first: FrameSnapshot):
+        self.pair: Tuple[FrameSnapshot, FrameSnapshot] = (first, first)
+        self.published = 1
+        self.changed = threading.Condition()
+
+    @property
+    def latest(self) -> FrameSnapshot:
+        return self.pair[1]
+
+    @property
+    def previous(self) -> FrameSnapshot:
+        return self.pair[0]
+
+    def publish(self, snapshot: FrameSnapshot) -> None:
+        self.pair = (self.pair[1], snapshot)
+        self.published += 1
+        with self.changed:
+            self.changed.notify_all()
+
+    def wait_after(self, frame: int, timeout: Optional[float] = None) -> FrameSnapshot:
+        """
+        Purpose: Blocks until a snapshot later than `frame` is published (or `timeout` passes),
+                 then returns the latest snapshot.
+        Examples:
+            buffer.wait_after(buffer.latest.frame, timeout=0.1)
+        """
+        with self.changed:
+            self.changed.wait_for(lambda: self.pair[1].frame != frame, timeout)
+        return self.pair[1]
+
+
+class SimulationRunner:
+    """
+    Purpose: Advances a simulation one tick at a time and publishes a snapshot after each
+             tick. Input arrives through `set_input` and work that must not race with a tick
+             (a rewind, say) through `call`; both are picked up at the start of the next tick.
+             Each tick uses the latest input, or the `controller`'s command if there is none,
+             then runs the `hooks` (history, autosave). Called directly it runs on the caller's
+             thread; SimulationThread runs it on its own.
+    Examples:
+        runner = SimulationRunner(sim, hooks=[history.record])
+        runner.set_input(0)
+        runner.tick(1 / 60)
+        runner.buffer.latest.frame -> 1
+    """
+    def __init__(self, sim: Simulation, fps: float = 60.0, controller: Optional[Controller] = None,
+                 hooks: Iterable[Hook] = ()):
+        self.sim = sim
+        self.period = 1 / fps
+        self.controller = controller
+        self.hooks = list(hooks)
+        self.input: Tuple[Optional[int], int, float] = (None, 0, 0.0)  # command, sequence number, time given
+        self.applied = 0  # Sequence number of the last input a tick used
+        self.calls: Deque[Hook] = deque()
+        self.buffer = SnapshotBuffer(take_snapshot(sim))
+        self.stats = SessionStats()
+        self.inputs = 0
+        self.total_latency = 0.0  # From set_input to the snapshot showing its effect
+        self.max_latency = 0.0
+
+    def set_input(self, command: Optional[int]) -> None:
+        """
+        Purpose: Makes `command` (or None for no key) the input of the following ticks.
+                 Safe to call from any thread.
+        Examples:
+            runner.set_input(2)  # Up
+        """
+        previous, sequence, given = self.input
+        if command != previous:
+            self.input = (command, sequence + 1, time.perf_counter())
+
+    def call(self, work: Hook) -> None:
+        """
+        Purpose: Runs `work(sim)` on the simulation's thread before its next tick.
+        Examples:
+            runner.call(lambda sim: history.rewind(sim, REWIND_SECONDS))
+        """
+        self.calls.append(work)
+
+    def tick(self, deltaT: Optional[float] = None) -> FrameSnapshot:
+        sim = self.sim
+        while self.calls:
+            self.calls.popleft()(sim)
+        command, sequence, given = self.input
+        if command is None and self.controller is not None:
+            command = self.controller(sim)
+        sim.step(command, self.period if deltaT is None else deltaT)
+        for hook in self.hooks:
+            hook(sim)
+        snapshot = take_snapshot(sim, self.buffer.latest)
+        self.buffer.publish(snapshot)
+        if sequence != self.applied:
+            self.applied = sequence
+            latency = snapshot.published - given
+            self.inputs += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+        return snapshot
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.inputs if self.inputs else 0.0
+
+
+class SimulationThread(SimulationRunner):
+    """
+    Purpose: A SimulationRunner that ticks at a fixed `fps` on a daemon thread, so the
+             simulation rate and input latency do not depend on how long frames take to draw.
+             A thread that falls behind runs up to `max_catch_up` ticks back to back, then
+             drops the rest of the backlog. It stops by itself once the game is over; an
+             exception raised by a tick is kept in `error` and stops the thread.
+    Examples:
+        runner = SimulationThread(sim, fps=60, hooks=[history.record])
+        runner.start()
+        ...  # Render runner.buffer.latest each frame
+        runner.stop()
+    """
+    def __init__(self, sim: Simulation, fps: float = 60.0, controller: Optional[Controller] = None,
+                 hooks: Iterable[Hook] = (), max_catch_up: int = 5):
+        super().__init__(sim, fps, controller, hooks)
+        self.max_catch_up = max_catch_up
+        self.stopping = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """ Asks the thread to stop after its current tick and waits for it. """
+        self.stopping.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self.thread.is_alive()
+
+    def run(self) -> None:
+        period = self.period
+        due = time.perf_counter() + period
+        try:
+            while not self.stopping.is_set() and not self.sim.over:
+                delay = due - time.perf_counter()
+                if delay > 0 and self.stopping.wait(delay):
+                    return
+                for _ in range(self.max_catch_up):
+                    start = time.perf_counter()
+                    self.tick()
+                    self.stats.record(start - due, time.perf_counter() - start, period)
+                    due += period
+                    if self.sim.over or time.perf_counter() < due:
+                        break
+                else:
+                    due = time.perf_counter() + period  # Too far behind: skip the backlog
+        except BaseException as e:
+            self.error = e
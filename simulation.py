@@ -0,0 +1,456 @@
+""" Headless game simulation: the per-frame rules of the game without any drawing. """
+import random
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from board import VersionedMaze, get_valid_moves
+from entity_store import EntityStore, FIXED_SHIFT, snap_to_unit, to_fixed
+from events import EventBus, PELLET_EATEN, POWER_UP, GHOST_EATEN, LIFE_LOST, RESPAWN, WIN, LOSE
+from game import GameState, HEIGHT, WIDTH, check_collisions_and_update_maze
+from ghost import (Ghost, EatenGhostList, GhostStrategy, RandomGhostStrategy, ChasingGhostStrategy,
+                   PalletHoveringGhostStrategy)
+from junction_graph import junction_graph
+from pacman import Pacman, PacmanConfig
+
+BOOST_FRAMES = 600  # Boost lasts for 600 frames
+RESPAWN_FRAMES = 180  # Eaten ghosts respawn after 3 seconds at 60 FPS
+GHOST_SPEED = 1  # Ghost speed in tiles per second
+DISTANT_GHOST_TILES = 8  # Ghosts further than this (Manhattan distance) from Pacman count as distant
+DIRECTION_STEPS = ((1, 0), (-1, 0), (0, -1), (0, 1))  # Tile offsets of right, left, up, down
+
+
+def default_strategy(ghost_id: str, rng: Optional[random.Random] = None) -> GhostStrategy:
+    """
+    Purpose: Returns the strategy a ghost uses by default, based on its ID. Strategies that
+             make random choices take them from `rng` (the random module if None).
+    Examples:
+        default_strategy("G2")  # -> ChasingGhostStrategy()
+        default_strategy("G7")  # -> RandomGhostStrategy()
+    """
+    if ghost_id == "G2":
+        return ChasingGhostStrategy()  # G2 chases Pacman
+    if ghost_id == "G3":
+        return PalletHoveringGhostStrategy(rng=rng)  # G3 hovers near pellets
+    return RandomGhostStrategy(rng=rng)  # G1 and any others move randomly
+
+
+def first_change(key: Callable[[int], int], start: int, velocity: int, limit: int) -> int:
+    """
+    Purpose: For a coordinate moving `velocity` units per frame from `start`, returns the first
+             frame (1 to `limit`) on which key(coordinate) differs from key(start), or limit + 1
+             if it never does. `key` must be monotonic along the motion, as tile lookups are,
+             so the frame can be found by binary search instead of frame by frame.
+    Examples:
+        first_change(lambda p: p // 40, 0, 3, 100) -> 14  # 42 is the first position past the tile
+    """
+    before = key(start)
+    if key(start + limit * velocity) == before:
+        return limit + 1
+    low, high = 1, limit
+    while low < high:
+        middle = (low + high) // 2
+        if key(start + middle * velocity) == before:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def window_unit_size(maze: List[List[str]]) -> Tuple[int, int]:
+    """
+    Purpose: Returns the (unit_width, unit_height) tile size that fits the maze in the game window.
+    Examples:
+        window_unit_size(parse_game_state_from_txt("maze.txt").maze) -> (40, 40)
+    """
+    num_rows = len(maze)
+    num_cols = len(maze[0]) if num_rows > 0 else 0
+    return WIDTH // num_cols, (HEIGHT - 50) // num_rows  # Subtracting space for UI
+
+
+class Simulation:
+    """
+    Purpose: Owns one game's characters, maze and rules and advances them one frame at a time.
+             The pygame loop in run.main, servers and bots all drive the game through `step`.
+             Default ghost strategies take their random choices from `rng` if one is given.
+    Examples:
+        sim = Simulation(parse_game_state_from_txt("maze.txt"))
+        sim.step(direction_command=0, deltaT=1 / 60)  # Pacman tries to move right
+        sim.pacman.score, sim.pacman.lives, sim.over
+    """
+    def __init__(self, game_state: GameState, unit_width: Optional[int] = None, unit_height: Optional[int] = None,
+                 pacman_config: Optional[PacmanConfig] = None, strategies: Optional[Dict[str, GhostStrategy]] = None,
+                 ghost_images: Optional[Dict[str, Any]] = None, bus: Optional[EventBus] = None,
+                 move_table: Optional[Dict[Tuple[int, int], List[Tuple[int, int]]]] = None,
+                 rng: Optional[random.Random] = None):
+        if unit_width is None or unit_height is None:
+            unit_width, unit_height = window_unit_size(game_state.maze)
+        config = pacman_config if pacman_config is not None else PacmanConfig()
+        if not isinstance(game_state.maze, VersionedMaze):
+            game_state.maze = VersionedMaze(game_state.maze)  # Lets strategies memoize decisions
+        self.state = game_state
+        self.maze = game_state.maze
+        self.unit_width = unit_width
+        self.unit_height = unit_height
+        self.bus = bus if bus is not None else EventBus()
+        self.move_table = move_table  # Optional build_move_table result for the maze
+        self.distant_ai_interval = 1  # Distant ghosts only re-plan every this many frames
+        self.entities = EntityStore()
+        self.frame = 0
+        self.won = False
+        self.lost = False
+        self.changed_cells: List[Tuple[int, int]] = []  # Maze cells changed during the last step
+        self.routes: Dict[str, List[Tuple[int, int]]] = {}  # Corridor waypoints each ghost has left, last first
+        self.waiting: Set[str] = set()  # Ghosts whose last decision kept them on their tile
+        self.decisions = 0  # Strategy calls so far
+
+        px, py = game_state.pacman_pos
+        self.pacman = Pacman(
+            x=px * unit_width, y=py * unit_height, size=config.size, speed=config.speed,
+            counter=config.counter, direction=config.direction, turns=[False, False, False, False],
+            lives=config.lives, boosted=config.boosted, score=0, direction_command=0, boost_timer=0,
+            store=self.entities
+        )
+
+        ghost_images = ghost_images if ghost_images is not None else {}
+        self.ghosts: List[Ghost] = []
+        self.strategies: Dict[str, GhostStrategy] = {}
+        for g_id, (gx, gy) in game_state.ghost_positions.items():
+            ghost = Ghost(
+                x=gx * unit_width, y=gy * unit_height, size=40, speed=GHOST_SPEED, counter=0,
+                direction=0, turns=[False, False, False, False], dead=False,
+                img=ghost_images.get(g_id), id=g_id, in_box=False, store=self.entities
+            )
+            ghost.target_tile = (gx, gy)  # Initial target tile is its starting position
+            self.ghosts.append(ghost)
+            self.strategies[g_id] = strategies[g_id] if strategies and g_id in strategies else default_strategy(g_id, rng)
+
+        self.ghost_indices = [ghost.index for ghost in self.ghosts]
+        self.ghosts_by_index = {ghost.index: ghost for ghost in self.ghosts}
+        self.eaten_ghosts = EatenGhostList({ghost.id: False for ghost in self.ghosts})
+
+    @property
+    def over(self) -> bool:
+        return self.won or self.lost
+
+    def step(self, direction_command: Optional[int], deltaT: float) -> None:
+        """
+        Purpose: Advances the game by one frame: moves Pacman according to `direction_command`
+                 (0 right, 1 left, 2 up, 3 down, None for no input), eats pellets, moves the
+                 ghosts `deltaT` seconds, resolves collisions and checks for a win or loss.
+                 Events are published to and dispatched on `bus` once per step.
+        Examples:
+            sim.step(None, 1 / 60)  # Pacman keeps its current heading
+        """
+        pacman, maze = self.pacman, self.maze
+        unit_width, unit_height = self.unit_width, self.unit_height
+        self.changed_cells.clear()
+        pacman.direction_command = direction_command
+
+        # Increment animation counter for smoother animations
+        pacman.counter = (pacman.counter + 1) % 40
+
+        # Handle boosted state logic
+        if pacman.boosted:
+            if pacman.boost_timer < BOOST_FRAMES:
+                pacman.boost_timer += 1
+            else:  # Reset boost state after timeout
+                pacman.boosted = False
+                pacman.boost_timer = 0
+                self.eaten_ghosts.eaten_ghosts = {ghost.id: False for ghost in self.ghosts}
+
+        # Update possible turns in place from Pacman's current grid position
+        self.update_turns(round(pacman.x / unit_width), round(pacman.y / unit_height))
+
+        # Move Pacman and update its position in the game state
+        pacman.move_player(pacman.direction_command, pacman.turns, unit_width, unit_height, maze)
+        self.state.pacman_pos = (int(pacman.x // unit_width), int(pacman.y // unit_height))
+
+        # Check collisions and update the maze (e.g., eat dots or power-ups)
+        eaten = check_collisions_and_update_maze(pacman, maze, unit_width, unit_height)
+        if eaten is not None:
+            eaten_cell = (int((pacman.x + pacman.size // 2) // unit_width),
+                          int((pacman.y + pacman.size // 2) // unit_height))
+            self.changed_cells.append(eaten_cell)
+            self.bus.publish(PELLET_EATEN if eaten == '.' else POWER_UP, pos=eaten_cell, score=pacman.score)
+
+        self.update_ghosts(deltaT)
+        self.resolve_ghost_collisions()
+
+        # Count down respawn timers; revived ghosts come back to life at their normal speed
+        for index in self.entities.tick_respawn_timers(self.ghost_indices, revive_speed=GHOST_SPEED):
+            self.bus.publish(RESPAWN, ghost_id=self.ghosts_by_index[index].id)
+
+        # Check if all pellets are eaten (win condition) or Pacman is out of lives (lose condition)
+        if not self.lost and not any('o' in row or '.' in row for row in maze):
+            self.won = True
+            self.bus.publish(WIN, score=pacman.score)
+        if not self.won and not self.lost and pacman.lives == 0:
+            self.lost = True
+            self.bus.publish(LOSE, score=pacman.score)
+
+        self.frame += 1
+        self.bus.dispatch()  # Deliver this frame's events to subscribers in one batch
+
+    def update_turns(self, cx: int, cy: int) -> None:
+        """ Sets Pacman's four turn flags from the open neighbours of tile (cx, cy). """
+        if self.move_table is not None:
+            valid_moves = self.move_table.get((cx, cy), [])
+        else:
+            valid_moves = get_valid_moves(self.maze, (cx, cy))
+        turns = self.pacman.turns
+        for direction, (dx, dy) in enumerate(DIRECTION_STEPS):
+            turns[direction] = (cx + dx, cy + dy) in valid_moves
+
+    def fast_forward(self, frames: int, direction_command: Optional[int], deltaT: float) -> int:
+        """
+        Purpose: Advances up to `frames` frames with one held `direction_command`, ending in
+                 exactly the state that many calls to `step` would reach. Stretches of frames in
+                 which nothing happens but straight-line movement (see quiet_frames) are jumped
+                 over in one go; every other frame is stepped normally, so walls, pellets,
+                 turns, ghost decisions and Pacman-ghost contact are never skipped however
+                 large the jump. Stops early when the game is over; returns the frames advanced.
+        Examples:
+            sim.fast_forward(600, None, 1 / 60)  # Ten seconds of play
+        """
+        done = 0
+        while done < frames and not self.over:
+            quiet = self.quiet_frames(direction_command, deltaT, frames - done) if frames - done > 1 else 0
+            if quiet:
+                self.coast(quiet, direction_command, deltaT)
+                done += quiet
+            else:
+                self.step(direction_command, deltaT)
+                done += 1
+        return done
+
+    def pacman_motion(self, direction_command: Optional[int]) -> Optional[Tuple[int, int, int]]:
+        """
+        Purpose: Returns Pacman's (axis, velocity, unit) for the next frames in fixed-point units:
+                 axis 0 for x, 1 for y, velocity 0 when a wall blocks it. Returns None if the
+                 next frame may do more than move it: line it up with the grid, turn it or
+                 eat the pellet under it.
+        Examples:
+            sim.pacman_motion(None) -> (0, 512, 10240)  # Moving right at 2 pixels per frame
+        """
+        store, index = self.entities, self.pacman.index
+        unit_x, unit_y = self.unit_width << FIXED_SHIFT, self.unit_height << FIXED_SHIFT
+        x, y, direction = store.fx[index], store.fy[index], store.direction[index]
+        if (direction < 2 and y != snap_to_unit(y, unit_y)) or (direction >= 2 and x != snap_to_unit(x, unit_x)):
+            return None
+        if direction_command is not None and direction_command != direction:
+            cx, cy = snap_to_unit(x, unit_x) // unit_x, snap_to_unit(y, unit_y) // unit_y
+            dx, dy = DIRECTION_STEPS[direction_command]
+            moves = self.move_table.get((cx, cy), []) if self.move_table is not None else get_valid_moves(self.maze, (cx, cy))
+            if (cx + dx, cy + dy) in moves:
+                return None
+        half_size = store.size[index] << (FIXED_SHIFT - 1)
+        maze = self.maze
+        cx, cy = (x + half_size) // unit_x, (y + half_size) // unit_y
+        if 0 <= cy < len(maze) and 0 <= cx < len(maze[0]) and maze[cy][cx] in '.o':
+            return None
+        dx, dy = DIRECTION_STEPS[direction]
+        step = to_fixed(store.speed[index])
+        grid_x, grid_y = (x + dx * step + half_size) // unit_x, (y + dy * step + half_size) // unit_y
+        if not (0 <= grid_y < len(maze) and 0 <= grid_x < len(maze[0])) or maze[grid_y][grid_x] in '#D':
+            step = 0
+        return (0, dx * step, unit_x) if dx else (1, dy * step, unit_y)
+
+    def quiet_frames(self, direction_command: Optional[int], deltaT: float, limit: int) -> int:
+        """
+        Purpose: Returns how many of the next frames (at most `limit`) are certain to be plain
+                 motion: Pacman keeps its heading within one tile's turns and one centre tile,
+                 every ghost moves along one axis without reaching its target (or waits on a
+                 stateless strategy while Pacman stays on his tile), no boost or respawn timer
+                 runs out, and Pacman cannot touch a live ghost. Contact is swept:
+                 a ghost is only passed over while its gap to Pacman is more than the distance
+                 both can close in the frames skipped. 0 means the next frame needs a full step.
+        Examples:
+            sim.quiet_frames(None, 1 / 60, 100) -> 6
+        """
+        pacman, store = self.pacman, self.entities
+        motion = self.pacman_motion(direction_command)
+        if motion is None:
+            return 0
+        if pacman.boosted:
+            limit = min(limit, BOOST_FRAMES - pacman.boost_timer)
+        axis, velocity, unit = motion
+        if velocity:
+            start = (store.fx, store.fy)[axis][pacman.index]
+            half_size = store.size[pacman.index] << (FIXED_SHIFT - 1)
+            # The frame that moves the hitbox centre to a new tile may eat or hit a wall; the one
+            # after Pacman's nearest tile changes works out new turns
+            limit = min(limit, first_change(lambda p: (p + half_size) // unit, start, velocity, limit) - 1)
+            limit = min(limit, first_change(lambda p: snap_to_unit(p, unit) // unit, start, velocity, limit))
+            if self.waiting:  # Waiting ghosts re-plan once the tile in the game state changes
+                limit = min(limit, first_change(lambda p: p // unit, start, velocity, limit) - 1)
+
+        unit_x, unit_y = self.unit_width << FIXED_SHIFT, self.unit_height << FIXED_SHIFT
+        scale = unit_x * deltaT
+        px, py, p_size = int(pacman.x), int(pacman.y), pacman.size
+        for ghost in self.ghosts:
+            index = ghost.index
+            step = int(store.speed[index] * scale)
+            if store.at_target(index, self.unit_width, self.unit_height):
+                if ghost.id not in self.waiting or not self.strategies[ghost.id].stateless:
+                    return 0  # Decides this frame
+            elif step:
+                target_x = store.target_x[index] * unit_x
+                if store.fx[index] != target_x:
+                    distance = abs(target_x - store.fx[index])
+                else:
+                    distance = abs(store.target_y[index] * unit_y - store.fy[index])
+                limit = min(limit, -(-distance // step))  # The last of these frames lands on the target axis
+            if not store.alive[index]:
+                if store.timer[index] > 0:
+                    limit = min(limit, store.timer[index] - 1)
+                continue
+            gx, gy, g_size = int(ghost.x), int(ghost.y), ghost.size
+            gap = max(gx - (px + p_size), px - (gx + g_size), gy - (py + p_size), py - (gy + g_size))
+            closing = abs(velocity) + step  # Fixed-point units per frame, at most
+            if gap < 1:
+                return 0
+            if closing:
+                limit = min(limit, ((gap - 1) << FIXED_SHIFT) // closing)
+        return max(0, limit)
+
+    def coast(self, frames: int, direction_command: Optional[int], deltaT: float) -> None:
+        """
+        Purpose: Applies `frames` frames that quiet_frames has vouched for in closed form:
+                 straight-line movement, animation and timers, and the tiles recorded in
+                 the game state, as `frames` calls to `step` would have left them.
+        Examples:
+            sim.coast(sim.quiet_frames(None, 1 / 60, 100), None, 1 / 60)
+        """
+        pacman, store, state = self.pacman, self.entities, self.state
+        unit_width, unit_height = self.unit_width, self.unit_height
+        unit_x, unit_y = unit_width << FIXED_SHIFT, unit_height << FIXED_SHIFT
+        motion = self.pacman_motion(direction_command)
+        if motion is None:
+            raise ValueError("coast needs frames that quiet_frames has vouched for.")
+        axis, velocity, _ = motion
+        self.changed_cells.clear()
+        pacman.direction_command = direction_command
+        pacman.counter = (pacman.counter + frames) % 40
+        if pacman.boosted:
+            pacman.boost_timer += frames
+        self.update_turns(round(pacman.x / unit_width), round(pacman.y / unit_height))
+        (store.fx, store.fy)[axis][pacman.index] += frames * velocity
+        state.pacman_pos = (int(pacman.x // unit_width), int(pacman.y // unit_height))
+
+        scale = unit_x * deltaT
+        for ghost in self.ghosts:
+            index = ghost.index
+            step = int(store.speed[index] * scale)
+            target_x = store.target_x[index] * unit_x
+            if store.fx[index] != target_x:
+                column, target = store.fx, target_x
+            else:
+                column, target = store.fy, store.target_y[index] * unit_y
+            start = column[index]
+            if start < target:
+                column[index] = min(start + (frames - 1) * step, target)
+            else:
+                column[index] = max(start - (frames - 1) * step, target)
+            # The game state holds each ghost's tile from before the last frame's move
+            state.ghost_positions[ghost.id] = (int(ghost.x // unit_width), int(ghost.y // unit_height))
+            column[index] = min(start + frames * step, target) if start < target else max(start - frames * step, target)
+            if not store.alive[index] and store.timer[index] > 0:
+                store.timer[index] -= frames
+        self.frame += frames
+        self.bus.frame += frames  # Coasted frames publish no events, but later events are stamped as if stepped
+
+    def update_ghosts(self, deltaT: float) -> None:
+        """
+        Purpose: Records each ghost's tile in the game state and moves all ghosts in one batched
+                 pass. Ghosts only ask their strategy for a move at junctions of the maze's
+                 JunctionGraph: a step into a corridor sends the ghost along the whole corridor,
+                 one straight run at a time, to the next junction. With `distant_ai_interval`
+                 above 1, ghosts far from Pacman wait at their tile until their turn to re-plan
+                 comes round.
+        Examples:
+            sim.update_ghosts(1 / 60)
+        """
+        unit_width, unit_height = self.unit_width, self.unit_height
+        for ghost in self.ghosts:
+            self.state.ghost_positions[ghost.id] = (int(ghost.x // unit_width), int(ghost.y // unit_height))
+
+        interval = self.distant_ai_interval
+        px, py = self.state.pacman_pos
+        for ghost in self.ghosts:
+            # Check if ghost is exactly on its target tile
+            if not self.entities.at_target(ghost.index, unit_width, unit_height):
+                continue
+            route = self.routes.get(ghost.id)
+            if route:
+                ghost.target_tile = route.pop()  # Next straight run of the corridor
+                continue
+            gx, gy = self.state.ghost_positions[ghost.id]
+            if interval > 1 and (self.frame + ghost.index) % interval:
+                if abs(gx - px) + abs(gy - py) > DISTANT_GHOST_TILES:
+                    continue  # Throttled: skip planning for this distant ghost this frame
+            self.decisions += 1
+            new_pos = self.strategies[ghost.id].get_next_position(self.state, ghost.id)
+            if new_pos:
+                self.follow(ghost, (gx, gy), new_pos)
+            if not new_pos or new_pos == (gx, gy):
+                self.waiting.add(ghost.id)
+            else:
+                self.waiting.discard(ghost.id)
+
+        self.entities.move_towards_targets(self.ghost_indices, unit_width, unit_height, deltaT)
+
+    def follow(self, ghost: Ghost, tile: Tuple[int, int], new_pos: Tuple[int, int]) -> None:
+        """
+        Purpose: Targets the tile a strategy picked. A step to a neighbouring tile is followed
+                 along its corridor: the ghost targets the end of the first straight run and
+                 keeps the remaining waypoints in `routes`.
+        Examples:
+            sim.follow(ghost, (4, 1), (5, 1))  # Along row 1 to the next junction
+        """
+        graph = junction_graph(self.maze)
+        if new_pos in graph.neighbours.get(tile, ()):
+            waypoints = graph.corridor(tile, new_pos).waypoints
+            ghost.target_tile = waypoints[0]
+            self.routes[ghost.id] = list(reversed(waypoints[1:]))
+        else:
+            ghost.target_tile = new_pos
+            self.routes.pop(ghost.id, None)
+
+    def resolve_ghost_collisions(self) -> None:
+        """
+        Purpose: Handles Pacman touching ghosts: a live ghost costs a life unless Pacman is
+                 boosted, in which case the ghost is eaten and sent back to its spawn.
+        Examples:
+            sim.resolve_ghost_collisions()
+        """
+        pacman, state = self.pacman, self.state
+        unit_width, unit_height = self.unit_width, self.unit_height
+        # Same test as pygame.Rect.colliderect on truncated coordinates, without a Rect per ghost
+        px, py, p_size = int(pacman.x), int(pacman.y), pacman.size
+
+        for ghost in self.ghosts:
+            if ghost.dead:
+                continue
+            gx, gy, g_size = int(ghost.x), int(ghost.y), ghost.size
+            if not (px < gx + g_size and gx < px + p_size and py < gy + g_size and gy < py + p_size):
+                continue
+            if not pacman.boosted:
+                # Pacman loses a life if colliding with a live ghost while not boosted
+                if pacman.lives > 0:
+                    pacman.lives -= 1
+                    self.bus.publish(LIFE_LOST, ghost_id=ghost.id, lives=pacman.lives)
+                    pacman.x = state.pacman_pos[0] * unit_width
+                    pacman.y = state.pacman_pos[1] * unit_height
+                    for g in self.ghosts:
+                        g.x = state.ghost_positions[g.id][0] * unit_width
+                        g.y = state.ghost_positions[g.id][1] * unit_height
+                        g.dead = False
+            elif not self.eaten_ghosts[ghost.id]:
+                ghost.dead = True
+                ghost.speed = 0  # Stop ghost movement
+                self.eaten_ghosts[ghost.id] = True
+                ghost.respawn_timer = RESPAWN_FRAMES
+
+                # Reset position to initial spawn coordinates
+                spawn_x, spawn_y = state.ghost_positions[ghost.id]
+                ghost.x = spawn_x * unit_width
+                ghost.y = spawn_y * unit_height
+                self.bus.publish(GHOST_EATEN, ghost_id=ghost.id, spawn=(spawn_x, spawn_y))
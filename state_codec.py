@@ -0,0 +1,253 @@
+""" Binary wire format for game state: full keyframes and per-tick deltas. """
+import struct
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from simulation import Simulation
+
+# Every message is framed as a little-endian u32 payload length followed by the payload,
+# whose first byte is the message type.
+MSG_HELLO = 1     # client -> server: role (u8), session name
+MSG_INPUT = 2     # client -> server: direction command (i8, -1 for none)
+MSG_KEYFRAME = 3  # server -> client: full state
+MSG_DELTA = 4     # server -> client: changes since the previous tick
+
+ROLE_SPECTATOR = 0
+ROLE_PLAYER = 1
+
+STATUS_BOOSTED, STATUS_WON, STATUS_LOST = 1, 2, 4
+
+LENGTH_PREFIX = struct.Struct('<I')
+_HELLO = struct.Struct('<BBH')
+_INPUT = struct.Struct('<Bb')
+_KEYFRAME = struct.Struct('<BIiBBHHH')
+_DELTA = struct.Struct('<BIB')
+_TOTALS = struct.Struct('<iBB')
+_ENTITY = struct.Struct('<ffB')
+_MOVED = struct.Struct('<HffB')
+_CELL = struct.Struct('<HHB')
+_COUNT = struct.Struct('<H')
+_CELL_COUNT = struct.Struct('<I')
+
+
+def frame_message(payload: bytes) -> bytes:
+    """
+    Purpose: Prefixes a payload with its length for the stream.
+    Examples:
+        frame_message(b'\\x02\\x00') -> b'\\x02\\x00\\x00\\x00\\x02\\x00'
+    """
+    return LENGTH_PREFIX.pack(len(payload)) + payload
+
+
+def iter_framed(data: bytes) -> Iterator[bytes]:
+    """
+    Purpose: Splits a buffer of consecutive length-prefixed messages into their payloads.
+    Examples:
+        list(iter_framed(frame_message(b'a') + frame_message(b'bc'))) -> [b'a', b'bc']
+    """
+    offset = 0
+    while offset < len(data):
+        (length,) = LENGTH_PREFIX.unpack_from(data, offset)
+        offset += LENGTH_PREFIX.size
+        yield bytes(data[offset:offset + length])
+        offset += length
+
+
+def encode_hello(session: str, role: int) -> bytes:
+    """
+    Purpose: Builds the first message a client sends: which session to join and as what.
+    Examples:
+        encode_hello("lobby", ROLE_SPECTATOR)
+    """
+    name = session.encode('utf-8')
+    return _HELLO.pack(MSG_HELLO, role, len(name)) + name
+
+
+def encode_input(direction_command: Optional[int]) -> bytes:
+    """
+    Purpose: Builds a player input message (0 right, 1 left, 2 up, 3 down, None for no input).
+    Examples:
+        encode_input(2) -> b'\\x02\\x02'
+    """
+    return _INPUT.pack(MSG_INPUT, -1 if direction_command is None else direction_command)
+
+
+def entity_flags(sim: Simulation, index: int) -> int:
+    """
+    Purpose: Packs an entity's direction (bits 0-1) and dead flag (bit 2) into one byte.
+    Examples:
+        entity_flags(sim, 0) -> 0  # Pacman facing right
+    """
+    entities = sim.entities
+    return (entities.direction[index] & 3) | (0 if entities.alive[index] else 4)
+
+
+def status_flags(sim: Simulation) -> int:
+    """
+    Purpose: Packs the boosted/won/lost status of a simulation into one byte.
+    Examples:
+        status_flags(sim) -> 0  # Not boosted, still playing
+    """
+    return ((STATUS_BOOSTED if sim.pacman.boosted else 0) | (STATUS_WON if sim.won else 0) |
+            (STATUS_LOST if sim.lost else 0))
+
+
+def encode_keyframe(sim: Simulation) -> bytes:
+    """
+    Purpose: Encodes the complete state of a simulation: totals, every entity and the maze.
+             Sent when a client joins or has fallen too far behind to apply deltas.
+    Examples:
+        payload = encode_keyframe(sim)
+        decode_message(payload)["type"] -> MSG_KEYFRAME
+    """
+    maze = sim.maze
+    height, width = len(maze), len(maze[0])
+    count = len(sim.entities)
+    parts = [_KEYFRAME.pack(MSG_KEYFRAME, sim.frame, sim.pacman.score, sim.pacman.lives, status_flags(sim),
+                            width, height, count)]
+    for index in range(count):
+        parts.append(_ENTITY.pack(sim.entities.x[index], sim.entities.y[index], entity_flags(sim, index)))
+    parts.append(_COUNT.pack(len(sim.ghosts)))
+    for ghost in sim.ghosts:
+        name = ghost.id.encode('utf-8')
+        parts.append(_COUNT.pack(ghost.index) + bytes([len(name)]) + name)
+    parts.append("".join("".join(row) for row in maze).encode('ascii'))
+    return b''.join(parts)
+
+
+class DeltaEncoder:
+    """
+    Purpose: Remembers what was last sent for one simulation and encodes only what changed
+             since then: moved or changed entities, eaten maze cells and score/lives/status.
+    Examples:
+        encoder = DeltaEncoder(sim)
+        sim.step(0, 1 / 60)
+        payload = encoder.encode(sim)  # A few dozen bytes instead of the whole maze
+    """
+    def __init__(self, sim: Simulation):
+        self.x = array('f', sim.entities.x)
+        self.y = array('f', sim.entities.y)
+        self.flags = array('B', (entity_flags(sim, i) for i in range(len(sim.entities))))
+        self.totals = (sim.pacman.score, sim.pacman.lives, status_flags(sim))
+
+    def encode(self, sim: Simulation) -> bytes:
+        """
+        Purpose: Encodes the changes since the previous call (or construction) and updates the
+                 baseline. Maze changes come from `sim.changed_cells` of the last step.
+        Examples:
+            encoder.encode(sim)
+        """
+        xs, ys = sim.entities.x, sim.entities.y
+        moved = []
+        for index in range(len(self.x)):
+            # Compare at wire precision so unchanged positions are not resent
+            x, y = array('f', (xs[index], ys[index]))
+            flags = entity_flags(sim, index)
+            if x != self.x[index] or y != self.y[index] or flags != self.flags[index]:
+                self.x[index], self.y[index], self.flags[index] = x, y, flags
+                moved.append(_MOVED.pack(index, x, y, flags))
+
+        totals = (sim.pacman.score, sim.pacman.lives, status_flags(sim))
+        changed_totals = totals != self.totals
+        self.totals = totals
+
+        parts = [_DELTA.pack(MSG_DELTA, sim.frame, 1 if changed_totals else 0)]
+        if changed_totals:
+            parts.append(_TOTALS.pack(*totals))
+        parts.append(_COUNT.pack(len(moved)))
+        parts.extend(moved)
+        parts.append(_CELL_COUNT.pack(len(sim.changed_cells)))
+        for x, y in sim.changed_cells:
+            parts.append(_CELL.pack(x, y, ord(sim.maze[y][x])))
+        return b''.join(parts)
+
+
+def decode_message(payload: bytes) -> Dict[str, Any]:
+    """
+    Purpose: Decodes any message payload into a dictionary with a "type" key.
+    Examples:
+        decode_message(encode_input(3)) -> {"type": MSG_INPUT, "direction": 3}
+    """
+    kind = payload[0]
+    if kind == MSG_HELLO:
+        _, role, length = _HELLO.unpack_from(payload, 0)
+        return {"type": kind, "role": role,
+                "session": payload[_HELLO.size:_HELLO.size + length].decode('utf-8')}
+    if kind == MSG_INPUT:
+        direction = _INPUT.unpack_from(payload, 0)[1]
+        return {"type": kind, "direction": None if direction < 0 else direction}
+    if kind == MSG_KEYFRAME:
+        _, frame, score, lives, status, width, height, count = _KEYFRAME.unpack_from(payload, 0)
+        offset = _KEYFRAME.size
+        entities = []
+        for _ in range(count):
+            entities.append(_ENTITY.unpack_from(payload, offset))
+            offset += _ENTITY.size
+        (ghost_count,) = _COUNT.unpack_from(payload, offset)
+        offset += _COUNT.size
+        ghost_ids = {}
+        for _ in range(ghost_count):
+            (index,) = _COUNT.unpack_from(payload, offset)
+            length = payload[offset + _COUNT.size]
+            offset += _COUNT.size + 1
+            ghost_ids[index] = payload[offset:offset + length].decode('utf-8')
+            offset += length
+        cells = payload[offset:offset + width * height].decode('ascii')
+        maze = [list(cells[y * width:(y + 1) * width]) for y in range(height)]
+        return {"type": kind, "frame": frame, "score": score, "lives": lives, "status": status,
+                "entities": entities, "ghost_ids": ghost_ids, "maze": maze}
+    if kind == MSG_DELTA:
+        _, frame, has_totals = _DELTA.unpack_from(payload, 0)
+        offset = _DELTA.size
+        message: Dict[str, Any] = {"type": kind, "frame": frame}
+        if has_totals:
+            message["score"], message["lives"], message["status"] = _TOTALS.unpack_from(payload, offset)
+            offset += _TOTALS.size
+        (count,) = _COUNT.unpack_from(payload, offset)
+        offset += _COUNT.size
+        message["moved"] = [_MOVED.unpack_from(payload, offset + i * _MOVED.size) for i in range(count)]
+        offset += count * _MOVED.size
+        (cell_count,) = _CELL_COUNT.unpack_from(payload, offset)
+        offset += _CELL_COUNT.size
+        message["cells"] = [_CELL.unpack_from(payload, offset + i * _CELL.size) for i in range(cell_count)]
+        return message
+    raise ValueError(f"Unknown message type {kind}.")
+
+
+class MirrorState:
+    """
+    Purpose: A client-side copy of a session's state, rebuilt from a keyframe and kept current
+             by applying deltas.
+    Examples:
+        mirror = MirrorState()
+        mirror.apply(decode_message(payload))
+        mirror.entities[0]  # -> Pacman's (x, y, flags)
+    """
+    def __init__(self) -> None:
+        self.frame = -1
+        self.score = 0
+        self.lives = 0
+        self.status = 0
+        self.entities: List[Tuple[float, float, int]] = []
+        self.ghost_ids: Dict[int, str] = {}
+        self.maze: List[List[str]] = []
+
+    def apply(self, message: Dict[str, Any]) -> None:
+        """
+        Purpose: Applies a decoded keyframe or delta. Deltas before the first keyframe are ignored.
+        Examples:
+            mirror.apply({"type": MSG_DELTA, "frame": 5, "moved": [], "cells": []})
+        """
+        if message["type"] == MSG_KEYFRAME:
+            self.entities = list(message["entities"])
+            self.ghost_ids = message["ghost_ids"]
+            self.maze = message["maze"]
+        elif message["type"] != MSG_DELTA or self.frame < 0:
+            return
+        else:
+            for index, x, y, flags in message["moved"]:
+                self.entities[index] = (x, y, flags)
+            for x, y, cell in message["cells"]:
+                self.maze[y][x] = chr(cell)
+        self.frame = message["frame"]
+        if "score" in message:
+            self.score, self.lives, self.status = message["score"], message["lives"], message["status"]
@@ -1,5 +1,38 @@
 from cs110 import expect, summarize
+from typing import Any, List, Tuple
 from game import *
+from maze_loader import *
+from maze_cache import *
+from maze_generator import *
+from board import get_valid_moves, VersionedMaze
+from entity_store import *
+from pacman import Pacman
+from events import *
+from simulation import Simulation, first_change
+from server import *
+import asyncio
+from replay import *
+from pacman_env import *
+from hud import *
+from campaign import *
+from governor import *
+from ghost import GhostStrategy, PalletHoveringGhostStrategy, memo_shortest_path, pellet_changed
+from autopilot import *
+from decision_cache import *
+import ghost as ghost_module
+from alloc_tracker import *
+from session_host import *
+from heatmaps import *
+from rewind import *
+from autosave import *
+import threading
+import time
+import gc
+from sim_thread import *
+from junction_graph import *
+from render_target import *
+from shared_maze import *
+from run_stats import *
 
 #------------------------------------------------------------------------------#
 # Testing for gamestate.py
@@ -80,4 +113,1050 @@ expect(swap(list_one, 0, 1), [game2, game1, game3])
 # Test for selection sort list of games
 expect(selection_sort_games(list_two), [game1, game2, game3])
 
-summarize()
\ No newline at end of file
+#------------------------------------------------------------------------------#
+# Testing for maze_loader.py
+#------------------------------------------------------------------------------#
+
+# Streaming loader agrees with the list-based parser
+pacman_pos, ghost_positions, packed = load_packed_maze("maze.txt")
+txt_state = parse_game_state_from_txt("maze.txt")
+expect(pacman_pos, txt_state.pacman_pos)
+expect(ghost_positions, txt_state.ghost_positions)
+expect((packed.width, packed.height), (19, 21))
+expect(packed.to_rows(), txt_state.maze)
+expect(packed.cell(9, 8), 'D')
+
+# Row validation reports line and column
+try:
+    check_maze_row(b'#.x#', 7, 4)
+    expect("no error", "MazeFormatError")
+except MazeFormatError as e:
+    expect((e.line, e.column), (7, 3))
+
+try:
+    check_maze_row(b'#.#', 8, 4)
+    expect("no error", "MazeFormatError")
+except MazeFormatError as e:
+    expect((e.line, e.column), (8, 0))
+
+# CSV and TXT encodings load into the same packed form
+csv_pacman_pos, csv_ghost_positions, csv_packed = load_maze("CSV/maze.csv")
+expect(csv_pacman_pos, (17, 19))
+expect(csv_ghost_positions["G2"], (10, 10))
+expect((csv_packed.width, csv_packed.height), (19, 21))
+expect(load_maze("maze.txt")[2], packed)
+
+#------------------------------------------------------------------------------#
+# Testing for maze_cache.py
+#------------------------------------------------------------------------------#
+
+import random
+import tempfile
+cache_dir = tempfile.mkdtemp()
+expect(load_compiled_maze("maze.txt", cache_dir), (pacman_pos, ghost_positions, packed))
+expect(os.path.exists(cache_path_for("maze.txt", cache_dir)), True)
+# Second load is served from the compiled entry
+expect(load_compiled_maze("maze.txt", cache_dir), (pacman_pos, ghost_positions, packed))
+expect(load_game_state("CSV/maze.csv").pacman_pos, (17, 19))
+
+#------------------------------------------------------------------------------#
+# Testing for maze_generator.py
+#------------------------------------------------------------------------------#
+
+# Same seed, same maze
+expect(generate_maze(40, 30, seed=5).rows, generate_maze(40, 30, seed=5).rows)
+
+# Generated fixtures load through the regular parser
+fixture_path = write_fixture(os.path.join(cache_dir, "maze_60.txt"), 60, 45, seed=2, ghost_count=6)
+fixture_state = parse_game_state_from_txt(fixture_path)
+expect((len(fixture_state.maze[0]), len(fixture_state.maze)), (60, 45))
+expect(len(fixture_state.ghost_positions), 6)
+expect(sum(row.count('o') for row in fixture_state.maze), 4)
+expect(sum(row.count('D') for row in fixture_state.maze), 1)
+
+# Every pellet is reachable from Pacman's spawn
+reachable = {fixture_state.pacman_pos}
+frontier = [fixture_state.pacman_pos]
+while frontier:
+    for move in get_valid_moves(fixture_state.maze, frontier.pop()):
+        if move not in reachable and fixture_state.maze[move[1]][move[0]] != 'D':
+            reachable.add(move)
+            frontier.append(move)
+pellets = {(x, y) for y, row in enumerate(fixture_state.maze) for x, cell in enumerate(row) if cell in '.o'}
+expect(pellets <= reachable, True)
+
+#------------------------------------------------------------------------------#
+# Testing for entity_store.py
+#------------------------------------------------------------------------------#
+
+store = EntityStore()
+player = Pacman(x=40, y=80, size=40, speed=2, counter=0, direction=0, turns=[False] * 4,
+                lives=3, boosted=False, score=0, direction_command=None, boost_timer=0, store=store)
+expect((player.index, player.x, player.y, player.lives), (0, 40.0, 80.0, 3))
+expect((store.target_x[0], store.target_y[0], store.at_target(0, 40, 40)), (1, 2, True))  # The tile it is on
+target_store = EntityStore()
+expect(target_store.target_x[target_store.add(100, 0, 20, 1, 0, 0, [False] * 4, target=(3, 0))], 3)
+
+# Views write straight through to the store
+player.x += 2
+player.boost_timer = 5
+expect((store.x[0], store.timer[0]), (42.0, 5))
+
+# Turn flags are updated in place
+player.turns[2] = True
+expect(player.turns, [False, False, True, False])
+player.turns = [True, False, False, True]
+expect(list(store.turns[0:4]), [1, 0, 0, 1])
+
+# Batched movement towards target tiles
+mover = store.add(x=0, y=0, size=40, speed=1, counter=0, direction=0, turns=[])
+store.target_x[mover] = 2
+expect(store.move_towards_targets([mover], 40, 40, 0.5), [])
+expect(store.x[mover], 20.0)
+store.x[mover] = 79.5
+expect(store.move_towards_targets([mover], 40, 40, 0.5), [mover])
+expect(store.x[mover], 80.0)
+
+# Positions are fixed-point integers with pixel views
+expect((to_fixed(2), to_fixed(0.5), snap_to_unit(30, 40), snap_to_unit(20, 40), snap_to_unit(60, 40)), (512, 128, 40, 0, 80))
+expect((store.fx[mover], store.x[mover]), (80 * FIXED_ONE, 80.0))
+expect(store.at_target(mover, 40, 40), True)
+
+# Movement is corridor-aligned: horizontal first, then vertical, landing exactly on the tile
+store.target_x[mover], store.target_y[mover] = 3, 1
+store.move_towards_targets([mover], 40, 40, 0.75)
+expect((store.x[mover], store.y[mover]), (110.0, 0.0))
+store.move_towards_targets([mover], 40, 40, 0.75)
+expect((store.x[mover], store.y[mover]), (120.0, 0.0))
+expect(store.move_towards_targets([mover], 40, 40, 1.0), [mover])
+expect((store.fx[mover], store.fy[mover]), (120 * FIXED_ONE, 40 * FIXED_ONE))
+
+# Seeded runs are exactly reproducible
+def seeded_run(seed: int) -> List[int]:
+    random.seed(seed)
+    run_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+    for frame in range(600):
+        run_sim.step([1, 2, 0, 3][frame // 150], 1 / 60)
+    return list(run_sim.entities.fx) + list(run_sim.entities.fy) + [run_sim.pacman.score]
+
+expect(seeded_run(7), seeded_run(7))
+
+# Batched respawn timers
+store.alive[mover] = 0
+store.timer[mover] = 2
+store.speed[mover] = 0
+expect(store.tick_respawn_timers([mover], revive_speed=1), [])
+expect(store.tick_respawn_timers([mover], revive_speed=1), [mover])
+expect((store.alive[mover], store.speed[mover]), (1, 1.0))
+
+#------------------------------------------------------------------------------#
+# Testing for events.py
+#------------------------------------------------------------------------------#
+
+bus = EventBus()
+ring = RingBufferLogger(capacity=2)
+stats = GameStatistics()
+respawns: List[Event] = []
+bus.subscribe(ring)
+bus.subscribe(stats)
+bus.subscribe(respawns.append, [RESPAWN])
+
+# Events are held until the frame's dispatch
+bus.publish(PELLET_EATEN, pos=(1, 1), score=1)
+bus.publish(RESPAWN, ghost_id="G1")
+expect(stats.counts[PELLET_EATEN], 0)
+expect(bus.dispatch(), 2)
+expect(stats.counts[PELLET_EATEN], 1)
+expect([event.data for event in respawns], [{"ghost_id": "G1"}])
+
+# The ring buffer keeps only the newest lines
+bus.publish(WIN, score=10)
+bus.dispatch()
+expect(list(ring.lines), ["[0] respawn ghost_id=G1", "[1] win score=10"])
+
+# Pellets eaten are reported by the maze update
+eater = Pacman(x=0, y=0, size=40, speed=2, counter=0, direction=0, turns=[False] * 4,
+               lives=3, boosted=False, score=0, direction_command=None, boost_timer=0)
+expect(check_collisions_and_update_maze(eater, [['.', 'o'], ['#', '#']]), '.')
+expect(check_collisions_and_update_maze(eater, [[' ', 'o'], ['#', '#']]), None)
+
+#------------------------------------------------------------------------------#
+# Testing for simulation.py
+#------------------------------------------------------------------------------#
+
+sim = Simulation(parse_game_state_from_txt("maze.txt"))
+expect((sim.unit_width, sim.unit_height), (40, 40))
+expect((sim.pacman.x, sim.pacman.y), (360.0, 440.0))
+stepped_events: List[Event] = []
+sim.bus.subscribe(stepped_events.append)
+sim.step(1, 1 / 60)  # Move left along the corridor
+expect((sim.pacman.x, sim.pacman.direction, sim.frame), (358.0, 1, 1))
+expect(sim.pacman.score, 1)
+expect(sim.changed_cells, [(9, 11)])
+expect([(event.kind, event.data["pos"]) for event in stepped_events], [(PELLET_EATEN, (9, 11))])  # Not Pacman's corner tile (8, 11)
+
+# Fast-forward jumps over frames of plain movement but ends exactly where stepping does
+expect((first_change(lambda p: p // 40, 0, 3, 100), first_change(lambda p: p // 40, 0, 3, 10)), (14, 11))
+
+def played_out(seed: int, chunk: int, fast: bool) -> Tuple[Any, ...]:
+    random.seed(seed)
+    played = Simulation(parse_game_state_from_txt("maze.txt"))
+    played_events: List[Event] = []
+    played.bus.subscribe(played_events.append)
+    commands = [None, 1, 2, 0, 3, None, 0, 2]
+    while not played.over and played.frame < 3000:
+        command = commands[played.frame // chunk % len(commands)]
+        if fast:
+            played.fast_forward(min(chunk - played.frame % chunk, 3000 - played.frame), command, 1 / 60)
+        else:
+            played.step(command, 1 / 60)
+    return (played.frame, played.pacman.score, played.pacman.lives, list(played.entities.fx), list(played.entities.fy),
+            list(played.entities.timer), ["".join(row) for row in played.maze], dict(played.state.ghost_positions),
+            played.bus.frame, [(event.kind, event.frame) for event in played_events])
+
+expect(played_out(3, 240, True), played_out(3, 240, False))  # Lives lost to ghosts on the same frames
+expect(played_out(5, 37, True), played_out(5, 37, False))
+skipper = Simulation(parse_game_state_from_txt("maze.txt"))
+skipper.step(None, 1 / 60)
+expect((skipper.pacman_motion(None), skipper.pacman_motion(1)), ((0, 512, 10240), None))  # Right, or turn back
+expect(skipper.quiet_frames(None, 1 / 60, 100) < 20, True)  # Never past the next tile
+expect(skipper.fast_forward(10000, None, 1 / 60) < 10000, True)  # Stops when the game is over
+expect(skipper.over, True)
+
+#------------------------------------------------------------------------------#
+# Testing for server.py
+#------------------------------------------------------------------------------#
+
+# Wire format round trips
+expect(decode_message(encode_input(None)), {"type": MSG_INPUT, "direction": None})
+expect(decode_message(encode_hello("lobby", ROLE_PLAYER))["session"], "lobby")
+keyframe = decode_message(encode_keyframe(sim))
+expect((keyframe["score"], keyframe["maze"], keyframe["entities"][0][:2]), (1, sim.maze, (358.0, 440.0)))
+
+# A delta carries only what changed
+encoder = DeltaEncoder(sim)
+sim.step(1, 1 / 60)
+delta = decode_message(encoder.encode(sim))
+expect(0 in [moved[0] for moved in delta["moved"]], True)
+expect(delta["cells"], [])
+# Nothing changed since the last encode
+expect(decode_message(encoder.encode(sim))["moved"], [])
+
+# Spectators over loopback mirror the server's state
+async def loopback_session() -> Tuple[Any, ...]:
+    server = GameServer("maze.txt", fps=240)
+    port = await server.start()
+    player = await GameClient.connect("127.0.0.1", port, "test", ROLE_PLAYER)
+    spectator = await GameClient.connect("127.0.0.1", port, "test")
+    await player.send_input(1)
+    while spectator.mirror.frame < 40:
+        await spectator.receive()
+    server_sim = server.sessions["test"].sim
+    result = (spectator.mirror.frame <= server_sim.frame, spectator.mirror.maze[11][8:10], spectator.mirror.score > 0)
+    await player.close()
+    await spectator.close()
+    await server.stop()
+    return result
+
+expect(asyncio.run(loopback_session()), (True, [' ', ' '], True))
+
+# Clients joining a finished game, which no longer ticks, still get its final state
+async def finished_session() -> Tuple[Any, ...]:
+    server = GameServer("maze.txt", fps=240)
+    port = await server.start()
+    server.get_session("done").sim.lost = True
+    while "done" not in server.host.finished:
+        await asyncio.sleep(0.01)
+    spectator = await GameClient.connect("127.0.0.1", port, "done")
+    message = await asyncio.wait_for(spectator.receive(), timeout=2)
+    result = (message["type"], spectator.mirror.frame == server.sessions["done"].sim.frame,
+              spectator.mirror.status & STATUS_LOST)
+    await spectator.close()
+    await server.stop()
+    return result
+
+expect(asyncio.run(finished_session()), (MSG_KEYFRAME, True, STATUS_LOST))
+
+#------------------------------------------------------------------------------#
+# Testing for replay.py
+#------------------------------------------------------------------------------#
+
+replay_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+replay_path = os.path.join(cache_dir, "run.prpl")
+recorded = record_simulation(replay_sim, replay_path, frames=100, controller=lambda s: 1, keyframe_interval=16)
+expect(recorded, 101)
+
+with ReplayReader(replay_path) as replay:
+    expect((len(replay), len(replay.block_offsets)), (101, 7))
+    final = replay.state_at(-1)
+    expect((final.frame, final.score, final.maze), (replay_sim.frame, replay_sim.pacman.score, replay_sim.maze))
+    expect(final.entities[0][:2], (replay_sim.pacman.x, replay_sim.pacman.y))
+    # Seeking agrees with playing forward from the start
+    expect([state.frame for state in replay.states(95)], [95, 96, 97, 98, 99, 100])
+    expect(replay.state_at(40).entities, [list(state.entities) for state in replay.states(0)][40])
+
+# Files that are not replays, or are cut short, raise ValueError and are closed again
+bad_replays = []
+for name, content in [("empty.prpl", b""), ("short.prpl", b"PRPL"), ("maze.prpl", b"#" * 64)]:
+    bad_path = os.path.join(cache_dir, name)
+    with open(bad_path, "wb") as bad_file:
+        bad_file.write(content)
+    try:
+        ReplayReader(bad_path)
+        bad_replays.append("opened")
+    except ValueError:
+        bad_replays.append("ValueError")
+expect(bad_replays, ["ValueError"] * 3)
+try:
+    ReplayWriter(os.path.join(cache_dir, "long.prpl"), keyframe_interval=70000)
+    expect("no error", "ValueError")
+except ValueError:
+    expect(os.path.exists(os.path.join(cache_dir, "long.prpl")), False)
+
+#------------------------------------------------------------------------------#
+# Testing for pacman_env.py
+#------------------------------------------------------------------------------#
+
+env = PacmanEnv("maze.txt", seed=0)
+obs, info = env.reset()
+expect((obs.shape, env.action_count, info["score"]), ((6, 21, 19), 5, 0))
+expect((obs[WALLS, 0, 0], obs[DOTS, 1, 1], obs[PACMAN, 11, 9]), (1, 1, 1))
+expect(int(obs[GHOSTS].sum()), 3)
+expect(int(obs[SCARED_GHOSTS].sum()), 0)
+dots_before = int(obs[DOTS].sum())
+
+# Moving left eats dots: the reward is the score gained and the same buffer is updated in place
+total = 0.0
+for _ in range(10):
+    step_obs, reward, terminated, truncated, info = env.step(1)
+    total += reward
+expect(step_obs is obs, True)
+expect((total, info["score"]), (float(env.game.pacman.score), env.game.pacman.score))
+expect(total > 0, True)
+expect(int(obs[DOTS].sum()), dots_before - env.game.pacman.score)
+expect(int(obs[PACMAN].sum()), 1)
+
+# Each environment draws from its own generator: same seed, same game, and the random module is untouched
+def ghost_trail(seed: int) -> List[Any]:
+    trail_env = PacmanEnv("maze.txt", seed=seed)
+    trail_env.reset()
+    trail = []
+    for _ in range(40):
+        trail_env.step(4)
+        trail.append(tuple(trail_env.game.state.ghost_positions.items()))
+    return trail
+random.seed(9)
+module_state = random.getstate()
+expect(ghost_trail(3), ghost_trail(3))
+expect(random.getstate() == module_state, True)
+try:
+    PacmanEnv("maze.txt").step(0)
+    expect("no error", "RuntimeError")
+except RuntimeError:
+    pass
+
+# Vectorized environments share one observation array and reset when an episode ends
+envs = VectorPacmanEnv(3, "maze.txt", seed=1, max_steps=2)
+batch = envs.reset()
+expect(batch.shape, (3, 6, 21, 19))
+expect(envs.envs[2].observation.base is batch, True)
+batch, rewards, batch_terminated, batch_truncated = envs.step([1, 0, 4])
+expect((rewards.shape, bool(batch_truncated.any())), ((3,), False))
+batch, rewards, batch_terminated, batch_truncated = envs.step([1, 0, 4])
+expect((list(batch_truncated), envs.final_infos[0] is not None, envs.envs[0].steps), ([True, True, True], True, 0))
+
+#------------------------------------------------------------------------------#
+# Testing for hud.py
+#------------------------------------------------------------------------------#
+
+pygame.font.init()
+hud_font = pygame.font.Font(None, 20)
+hud_screen = pygame.Surface((WIDTH, HEIGHT))
+glyphs = TextCache(capacity=2)
+expect(glyphs.render(hud_font, "Score: 1", 'white') is glyphs.render(hud_font, "Score: 1", 'white'), True)
+expect(glyphs.renders, 1)
+glyphs.render(hud_font, "Score: 2", 'white')
+glyphs.render(hud_font, "Score: 3", 'white')
+expect((len(glyphs.surfaces), ("Score: 1", 'white', hud_font) in glyphs.surfaces), (2, False))
+
+# The HUD strip is only rebuilt, and text only rendered, when a value changes
+hud = Hud(hud_font, WIDTH, HEIGHT, TextCache())
+expect(hud.draw(hud_screen, 10, 50, 3), pygame.Rect(0, HEIGHT - HUD_HEIGHT, WIDTH, HUD_HEIGHT))
+expect((hud.draw(hud_screen, 10, 50, 3), hud.text_cache.renders), (None, 2))
+expect(hud.draw(hud_screen, 11, 50, 3) is not None, True)
+expect(hud.text_cache.renders, 3)
+expect(hud.draw(hud_screen, 11, 50, 2) is not None, True)
+expect(hud.text_cache.renders, 3)
+
+# A HUD for a half-size render target keeps the layout at half the size
+small_hud = Hud(hud_font, WIDTH // 2, HEIGHT // 2, TextCache(), 0.5)
+expect(small_hud.draw(pygame.Surface((WIDTH // 2, HEIGHT // 2)), 10, 50, 3),
+       pygame.Rect(0, HEIGHT // 2 - HUD_HEIGHT // 2, WIDTH // 2, HUD_HEIGHT // 2))
+expect(small_hud.life_image is not None and small_hud.life_image.get_size(), (15, 15))
+
+#------------------------------------------------------------------------------#
+# Testing for campaign.py
+#------------------------------------------------------------------------------#
+
+expect(build_move_table([list("#.#"), list(". ."), list("###")])[(1, 1)], [(1, 0), (2, 1), (0, 1)])
+validate_level(parse_game_state_from_txt("maze.txt"))  # A valid level raises nothing
+try:
+    validate_level(GameState((0, 0), {}, [list("#.")]))
+    expect("no error", "ValueError")
+except ValueError:
+    expect(True, True)
+
+second_level = write_fixture(os.path.join(cache_dir, "level2.txt"), 19, 21, seed=4)
+campaign = Campaign(["maze.txt", second_level], render=False)
+first = campaign.start()
+expect((first.index, first.unit_width, campaign.has_next), (0, 40, True))
+expect(first.move_table[(9, 11)], get_valid_moves(first.game_state.maze, (9, 11)))
+expect(campaign.pending is not None and campaign.pending.result().index, 1)  # Prepared in the background while level 0 is played
+second = campaign.advance()
+expect((second.index, second.path, campaign.has_next, campaign.pending), (1, second_level, False, None))
+campaign.close()
+expect(render_background(first.game_state.maze).get_size(), (WIDTH, HEIGHT))
+expect(prepare_level(0, "maze.txt", size=(WIDTH // 2, HEIGHT // 2)).background.get_size(), (WIDTH // 2, HEIGHT // 2))
+
+# Simulations can use the precomputed move table
+table_sim = Simulation(first.game_state, first.unit_width, first.unit_height, move_table=first.move_table)
+plain_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+for _ in range(30):
+    table_sim.step(1, 1 / 60)
+    plain_sim.step(1, 1 / 60)
+expect((table_sim.pacman.x, table_sim.pacman.score), (plain_sim.pacman.x, plain_sim.pacman.score))
+
+#------------------------------------------------------------------------------#
+# Testing for governor.py
+#------------------------------------------------------------------------------#
+
+quality = QualityGovernor(fps=60.0, window=5, cooldown=5)
+for _ in range(4):
+    quality.record(0.030)
+expect(quality.level, 0)  # Window not full yet
+expect(quality.record(0.030), 1)
+expect((quality.sheds(WALL_OUTLINES), quality.sheds(ANIMATION)), (True, False))
+for _ in range(15):
+    quality.record(0.030)
+expect(quality.level, OVERLAYS)  # One stage per cooldown, capped at the last stage
+for _ in range(14):
+    quality.record(0.001)
+expect(quality.level, OVERLAYS)  # Restoring waits three cooldowns
+expect(quality.record(0.001), DISTANT_AI)
+expect(quality.describe().startswith("level 3 (throttled distant ghosts)"), True)
+
+# Throttled distant ghosts only re-plan on their turn
+class CountingStrategy(GhostStrategy):
+    def __init__(self) -> None:
+        self.calls = 0
+    def get_next_position(self, state: GameState, ghost_id: str) -> Tuple[int, int]:
+        self.calls += 1
+        return state.ghost_positions[ghost_id]  # Stays put
+
+counting = CountingStrategy()
+far_state = parse_game_state_from_txt("maze.txt")
+far_state.ghost_positions = {"G1": (1, 1)}
+throttled = Simulation(far_state, strategies={"G1": counting})
+throttled.distant_ai_interval = 4
+for _ in range(8):
+    throttled.update_ghosts(1 / 60)
+    throttled.frame += 1
+expect(counting.calls, 2)
+expect(len(load_pacman_images(40)), 4)
+expect(load_pacman_images(40) is load_pacman_images(40), True)
+
+#------------------------------------------------------------------------------#
+# Testing for autopilot.py
+#------------------------------------------------------------------------------#
+
+random.seed(2)
+bot_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+model = TileModel(bot_sim)
+root_tile = model.root_state(bot_sim)
+expect((root_tile.pacman, model.ghost_period, model.boost_steps), ((9, 11), 3, 30))
+expect(sorted(model.actions(root_tile)), [0, 1])
+left, reward = model.step(root_tile, 1)
+expect((left.pacman, reward, left.tick), ((8, 11), 1.0, 1))
+expect(bin(root_tile.dots).count("1") - bin(left.dots).count("1"), 1)
+expect(model.step(model.step(left, 1)[0], 0)[1], 0.0)  # (8, 11) was already eaten
+
+bot = Autopilot(budget=0.005, seed=1)
+for _ in range(200):
+    bot_sim.step(bot(bot_sim), 1 / 60)
+expect(bot.decisions, 10)  # One decision per tile, every 20 frames
+expect((bot.playouts >= bot.decisions, bot.playouts_per_second > 0, bot.reused > 0), (True, True, True))
+expect(bot_sim.pacman.score > 0, True)
+
+# Equally seeded autopilots make the same moves, whatever the random module's state
+def autopilot_moves(module_seed: int) -> Tuple[List[Optional[int]], int]:
+    random.seed(module_seed)
+    seeded_sim = Simulation(parse_game_state_from_txt("maze.txt"), rng=random.Random(0))
+    seeded_bot = Autopilot(budget=10, seed=4, max_playouts=40)
+    moves = []
+    for _ in range(300):
+        move = seeded_bot(seeded_sim)
+        moves.append(move)
+        seeded_sim.step(move, 1 / 60)
+    return moves, seeded_sim.pacman.score
+expect(autopilot_moves(1), autopilot_moves(2))
+
+#------------------------------------------------------------------------------#
+# Testing for decision_cache.py
+#------------------------------------------------------------------------------#
+
+versioned = VersionedMaze([list("#.o#"), list("# .#")])
+versioned.set_cell(1, 0, ' ')
+versioned.set_cell(1, 0, ' ')  # No change, not logged
+expect((versioned.generation, versioned.layout_generation), (1, 0))
+versioned.set_cell(2, 1, '#')
+expect((versioned.generation, versioned.layout_generation), (2, 1))
+expect(versioned.changes_since(1), [(2, 2, 1, '.', '#')])
+expect(versioned == [list("# o#"), list("# ##")], True)
+short_log = VersionedMaze([list("....")], log_capacity=2)
+for column in range(3):
+    short_log.set_cell(column, 0, ' ')
+expect((short_log.changes_since(1) is not None, short_log.changes_since(0)), (True, None))
+
+# LRU eviction and change-log validation
+lru = DecisionCache(capacity=2)
+lru.put("a", 1, versioned)
+lru.put("b", 2, versioned)
+expect(lru.get("a", versioned), 1)
+lru.put("c", 3, versioned)
+expect((lru.get("b", versioned) is MISSING, lru.get("a", versioned), len(lru)), (True, 1, 2))
+versioned.set_cell(3, 0, '.')
+expect(lru.get("a", versioned, lambda value, changes: False), 1)  # Still valid, refreshed
+versioned.set_cell(1, 1, 'o')
+expect(lru.get("a", versioned, lambda value, changes: changes[0][4] == 'o') is MISSING, True)
+expect(lru.invalidations, 1)
+
+# Nearest-pellet answers survive dots being eaten but not their pellet being eaten
+expect((pellet_changed((2, 0), [(5, 2, 0, 'o', ' ')]), pellet_changed((2, 0), [(5, 1, 0, '.', ' ')])), (True, False))
+hover_maze = VersionedMaze([list(row) for row in ["#####", "#..o#", "#.#.#", "#o..#", "#####"]])
+hovering = PalletHoveringGhostStrategy()
+expect(hovering.memo_nearest_pellet(hover_maze, (1, 1)), (1, 3))
+clear_cell(hover_maze, 2, 1)
+misses = ghost_module.decision_cache.misses
+expect(hovering.memo_nearest_pellet(hover_maze, (1, 1)), (1, 3))
+expect(ghost_module.decision_cache.misses, misses)
+clear_cell(hover_maze, 1, 3)
+expect(hovering.memo_nearest_pellet(hover_maze, (1, 1)), (3, 1))
+expect(memo_shortest_path(hover_maze, (1, 1), (3, 3)) is memo_shortest_path(hover_maze, (1, 1), (3, 3)), True)
+# Mazes with the same walls share layout-only decisions; a layout change gets its own id
+twin_maze = VersionedMaze([list(row) for row in ["#####", "#...#", "#.#.#", "#...#", "#####"]])
+expect(twin_maze.layout_id == hover_maze.layout_id != versioned.layout_id, True)
+expect(memo_shortest_path(twin_maze, (1, 1), (3, 3)) is memo_shortest_path(hover_maze, (1, 1), (3, 3)), True)
+twin_maze.set_cell(2, 1, '#')
+expect(twin_maze.layout_id != hover_maze.layout_id, True)
+twin_maze.set_cell(2, 1, ' ')
+expect(twin_maze.layout_id == hover_maze.layout_id, True)  # Back to the same layout, the same id
+
+# Simulations version their maze, so eating pellets is logged
+versioned_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+expect(versioned_sim.state.maze is versioned_sim.maze and isinstance(versioned_sim.maze, VersionedMaze), True)
+for _ in range(20):
+    versioned_sim.step(1, 1 / 60)
+expect((versioned_sim.maze.generation, versioned_sim.maze.layout_generation), (versioned_sim.pacman.score, 0))
+
+#------------------------------------------------------------------------------#
+# Testing for alloc_tracker.py
+#------------------------------------------------------------------------------#
+
+idle_tracker = AllocationTracker()
+with idle_tracker.phase("simulation"):  # Not started: nothing is recorded
+    pass
+expect((idle_tracker.phases, idle_tracker.per_frame("simulation")), ({}, (0.0, 0.0)))
+
+# Allocations and collections are charged to the phase they happen in
+tracker = AllocationTracker()
+tracker.start()
+with tracker.phase("draw"):
+    kept = [bytearray(1000) for _ in range(10)]
+with tracker.phase("present"):
+    gc.collect()
+tracker.end_frame()
+tracker.stop()
+expect(tracker.stats("draw").bytes >= 10000 and tracker.stats("draw").blocks >= 10, True)
+expect((tracker.stats("present").gc_pauses, tracker.frames, tracker.running), (1, 1, False))
+expect(len(tracker.over_budget({"draw": (1000, None)})), 1)
+expect(tracker.over_budget({"draw": (None, None), "input": (0, 0)}), [])
+expect(tracker.report().splitlines()[0], "1 frames")
+
+# A warmed-up simulation frame stays within its allocation budget
+budget_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+for _ in range(60):
+    budget_sim.step(1, 1 / 60)
+sim_tracker = AllocationTracker()
+sim_tracker.start()
+for frame in range(300):
+    with sim_tracker.phase("simulation"):
+        budget_sim.step((0, 2, 1, 3)[frame // 75], 1 / 60)
+    sim_tracker.end_frame()
+sim_tracker.stop()
+expect(sim_tracker.over_budget({"simulation": (4096, 2)}), [])
+
+# Pacman's flipped and rotated frames are built once and reused
+sprite_screen = pygame.Surface((100, 100))
+oriented_pacman_images.clear()
+for _ in range(3):
+    draw_player(sprite_screen, 10, 10, 30, 2, 15)
+expect(list(oriented_pacman_images), [(30, 1, 2)])
+
+#------------------------------------------------------------------------------#
+# Testing for session_host.py
+#------------------------------------------------------------------------------#
+
+wheel = TimerWheel(4)
+wheel.schedule(1, "a")
+wheel.schedule(5, "late")  # More than a full turn ahead shares a bucket with tick 1
+wheel.schedule(1, "b")
+expect((wheel.advance(), wheel.pending), (["a", "b"], 1))
+expect([wheel.advance() for _ in range(3)], [[], [], []])
+expect((wheel.advance(), wheel.pending), (["late"], 0))
+
+latency = SessionStats()
+latency.record(0.001, 0.0005, 0.01)
+latency.record(0.02, 0.0015, 0.01)
+expect((latency.ticks, latency.late_ticks, latency.max_lateness), (2, 1, 0.02))
+expect(round(latency.mean_step, 6), 0.001)
+
+# One host ticks many isolated sessions, at their own rates, and stops when they finish
+fast_host = SessionHost(fps=1000)
+left_session = fast_host.add(HostedSession("left", Simulation(parse_game_state_from_txt("maze.txt")), lambda sim: 1))
+slow_session = fast_host.add(HostedSession("slow", Simulation(parse_game_state_from_txt("maze.txt")), period=2))
+asyncio.run(fast_host.run(seconds=0.04))
+expect((left_session.stats.ticks, slow_session.stats.ticks), (40, 20))
+expect((left_session.sim.frame, slow_session.sim.frame), (40, 40))  # Two frames per tick keep game time in step
+fast_host.remove("slow")
+expect(asyncio.run(fast_host.run(seconds=0.01)), None)
+expect((slow_session.stats.ticks, set(fast_host.all_stats())), (20, {"left"}))
+expect(len(fast_host.sessions) + len(fast_host.finished), 1)
+try:
+    fast_host.add(HostedSession("left", left_session.sim))
+    expect("duplicate accepted", "ValueError")
+except ValueError:
+    pass
+
+# Session names always map to the same shard
+expect(shard_of("lobby", 4) == shard_of("lobby", 4) and 0 <= shard_of("lobby", 4) < 4, True)
+expect(len({shard_of(f"s{i}", 4) for i in range(50)}), 4)
+shard_results = host_shard("maze.txt", ["x", "y"], 0.05, 200)
+expect((sorted(shard_results), shard_results["x"]["ticks"]), (["x", "y"], 10))
+
+#------------------------------------------------------------------------------#
+# Testing for heatmaps.py
+#------------------------------------------------------------------------------#
+
+expect(layout_key([list("#.#")]) == layout_key([list("# #")]) != layout_key([list("#  ")]), True)
+
+# Counts are folded in with bincount whenever a chunk fills, and on read
+tiny_heatmap = TileHeatmap([list("#..#"), list("#o.#")], chunk=2)
+tiny_sample = FrameSample(0, [], 7, (1, 0), (("RandomGhostStrategy", (2, 1)),), (1, 0), 2, ((1, 1),))
+for _ in range(3):
+    tiny_heatmap.update(tiny_sample)
+tiny_heatmap.add(PACMAN_LAYER, (9, 9))  # Off the maze: ignored
+expect(tiny_heatmap.layer(PACMAN_LAYER).tolist(), [[0, 3, 0, 0], [0, 0, 0, 0]])
+expect((tiny_heatmap.layer(DEATHS_LAYER)[0, 1], tiny_heatmap.layer("RandomGhostStrategy")[1, 2]), (6, 3))
+expect(tiny_heatmap.mean_pellet_frame()[1, 1], 7.0)
+expect(np.isnan(tiny_heatmap.mean_pellet_frame()[0, 2]), True)
+expect(tiny_heatmap.layer("missing").shape, (2, 4))
+
+# Replays and live simulations of the same game produce the same heatmaps
+heatmap_dir = tempfile.mkdtemp()
+random.seed(3)
+recorded_frames = record_simulation(Simulation(parse_game_state_from_txt("maze.txt")),
+                                    os.path.join(heatmap_dir, "run.prpl"), 400, lambda sim: 1)
+random.seed(3)
+live_maps = accumulate(simulation_samples(Simulation(parse_game_state_from_txt("maze.txt")), 400, lambda sim: 1))
+replay_maps = accumulate(replay_samples(os.path.join(heatmap_dir, "run.prpl")))
+expect(list(live_maps) == list(replay_maps) and len(live_maps), 1)
+live_map, replay_map = list(live_maps.values())[0], list(replay_maps.values())[0]
+expect(replay_map.frames, recorded_frames)
+for name in (PACMAN_LAYER, DEATHS_LAYER, PELLETS_LAYER, "ChasingGhostStrategy"):
+    expect(np.array_equal(live_map.layer(name), replay_map.layer(name)), True)
+expect(replay_map.layer(PACMAN_LAYER).sum(), replay_map.frames)
+expect(replay_map.layer(PELLETS_LAYER).sum() > 0, True)
+
+# Export writes the arrays and one PNG overlay per layer
+written = export(replay_maps, heatmap_dir)
+expect(all(os.path.exists(path) for path in written) and len(written) > 5, True)
+saved = np.load(written[0])
+expect((saved["walls"].shape, int(saved["frames"])), ((21, 19), replay_map.frames))
+
+#------------------------------------------------------------------------------#
+# Testing for rewind.py
+#------------------------------------------------------------------------------#
+
+copied_state = GameState((1, 1), {"G1": (2, 2)}, [["#"]])
+expect(copied_state.copy().ghost_positions is copied_state.ghost_positions, False)
+
+def rewind_snapshot(sim: Simulation) -> Tuple[Any, ...]:
+    entities = sim.entities
+    return (list(entities.fx), list(entities.fy), list(entities.target_x), list(entities.counter),
+            list(entities.alive), sim.pacman.score, sim.pacman.lives, ["".join(row) for row in sim.maze])
+
+random.seed(5)
+rewind_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+history = RewindBuffer(rewind_sim, seconds=10, keyframe_interval=30)
+history.record(rewind_sim)
+rewind_snapshots = {}
+for _ in range(400):
+    rewind_sim.step((0, 2, 1, 3)[rewind_sim.frame // 97 % 4], 1 / 60)
+    history.record(rewind_sim)
+    if rewind_sim.frame in (45, 200, 333):
+        rewind_snapshots[rewind_sim.frame] = rewind_snapshot(rewind_sim)
+expect((history.oldest, history.newest, len(history)), (0, 400, 401))
+expect(history.nbytes < 200 * len(history), True)  # A few MB for minutes of play
+
+# Restoring replays the keyframe and the deltas after it, in any order
+for frame in (333, 45, 200):
+    history.restore(rewind_sim, frame)
+    expect((rewind_sim.frame, rewind_snapshot(rewind_sim) == rewind_snapshots[frame]), (frame, True))
+try:
+    history.restore(rewind_sim, 401)
+    expect("restored a future frame", "IndexError")
+except IndexError:
+    pass
+
+# Rewinding drops the later history, and play continues from the restored frame
+history.restore(rewind_sim, 400)
+expect(history.rewind(rewind_sim, 200 / 60), 200)
+expect((history.newest, max(history.keyframes), rewind_snapshot(rewind_sim) == rewind_snapshots[200]), (200, 180, True))
+rewind_sim.step(None, 1 / 60)
+history.record(rewind_sim)
+expect((history.newest, rewind_sim.frame), (201, 201))
+
+# A short buffer keeps only its last `seconds`
+short_history = RewindBuffer(rewind_sim, seconds=1, keyframe_interval=20)
+for _ in range(150):
+    rewind_sim.step(None, 1 / 60)
+    short_history.record(rewind_sim)
+expect((short_history.oldest >= short_history.newest - 60, len(short_history) <= 60), (True, True))
+expect(short_history.rewind(rewind_sim, 100), short_history.oldest)
+
+#------------------------------------------------------------------------------#
+# Testing for autosave.py
+#------------------------------------------------------------------------------#
+
+save_dir = tempfile.mkdtemp()
+save_path = os.path.join(save_dir, "autosave.csv")
+saved_state = parse_game_state_from_txt("maze.txt")
+game1.level = 1
+game1.save(save_path, saved_state, lives=2)
+expect(os.listdir(save_dir), ["autosave.csv"])  # No temporary file left behind
+loaded_game, loaded_state = game2.load(save_path)
+expect((loaded_game.score, loaded_game.level, loaded_state.pacman_pos), (100, 1, saved_state.pacman_pos))
+expect((loaded_state.maze == saved_state.maze, loaded_state.ghost_positions == saved_state.ghost_positions), (True, True))
+expect(read_checkpoint(save_path).lives, 2)
+
+# A crash that damages the latest checkpoint falls back to the previous one
+game1.score = 150
+game1.save(save_path, saved_state)
+expect((read_checkpoint(save_path).score, parse_checkpoint(save_path + ".bak").score), (150, 100))
+with open(save_path, "w") as file:
+    file.write("score,level,timestamp\n150,1")  # Cut off mid-write
+expect(read_checkpoint(save_path).score, 100)
+os.remove(save_path)
+expect(game2.load(save_path)[0].score, 100)
+with open(save_path + ".bak", "w") as file:
+    file.write("score,level\n1,0,now,__import__('os'),{},[]")  # Never evaluated as code
+try:
+    read_checkpoint(save_path)
+    expect("recovered a damaged checkpoint", "ValueError")
+except ValueError:
+    pass
+game1.score, game1.level = 100, 0
+
+# Recovered checkpoints only apply to a level with the same dimensions
+resumed_state = parse_game_state_from_txt("maze.txt")
+checkpoint = game1.checkpoint(saved_state, 3)
+expect(apply_checkpoint(resumed_state, Checkpoint(0, 0, checkpoint.timestamp, (1, 1), {}, ("#",))), False)
+saved_state.maze[11][8] = ' '
+saved_state.pacman_pos = (8, 11)
+expect(apply_checkpoint(resumed_state, game1.checkpoint(saved_state)), True)
+expect((resumed_state.maze[11][8], resumed_state.pacman_pos), (' ', (8, 11)))
+
+# A slow disk drops waiting checkpoints instead of blocking the game loop
+release_writer = threading.Event()
+slow_writes: List[int] = []
+def slow_writer(path: str, checkpoint: Checkpoint) -> None:
+    release_writer.wait()
+    slow_writes.append(checkpoint.score)
+
+slow_saver = Autosaver(save_path, interval=0, writer=slow_writer)
+for score in range(5):
+    slow_saver.submit(Checkpoint(score, 0, checkpoint.timestamp, (1, 1), {}, ("#",)))
+release_writer.set()
+slow_saver.close()
+expect((slow_writes[-1], slow_saver.saved + slow_saver.dropped, slow_saver.dropped >= 3), (4, 5, True))
+
+# Write errors are counted rather than raised, and snapshots are only taken when due
+def failing_writer(path: str, checkpoint: Checkpoint) -> None:
+    raise OSError("disk full")
+
+def untaken_snapshot() -> Checkpoint:
+    raise AssertionError("The snapshot was taken before it was due.")
+
+failing_saver = Autosaver(save_path, interval=60, writer=failing_writer)
+expect(failing_saver.maybe_submit(untaken_snapshot), False)  # Not due: the snapshot is never taken
+expect(failing_saver.maybe_submit(lambda: checkpoint, now=failing_saver.last_submit + 60), True)
+failing_saver.close()
+expect((failing_saver.errors, str(failing_saver.last_error), failing_saver.thread.is_alive()), (1, "disk full", False))
+
+# Any error is kept rather than ending the worker, and closing does not wait on a worker that is gone
+def broken_writer(path: str, checkpoint: Checkpoint) -> None:
+    if checkpoint.score:
+        raise SystemExit  # Ends the worker thread silently
+    raise TypeError("cannot serialize")
+
+broken_saver = Autosaver(save_path, interval=0, writer=broken_writer)
+broken_saver.submit(Checkpoint(0, 0, checkpoint.timestamp, (1, 1), {}, ("#",)))
+while not broken_saver.errors and broken_saver.thread.is_alive():
+    time.sleep(0.001)
+broken_saver.submit(Checkpoint(1, 0, checkpoint.timestamp, (1, 1), {}, ("#",)))
+broken_saver.thread.join(2)
+broken_saver.submit(Checkpoint(2, 0, checkpoint.timestamp, (1, 1), {}, ("#",)))  # Fills the queue
+broken_saver.close()
+expect((broken_saver.errors, type(broken_saver.last_error), broken_saver.closed), (1, TypeError, True))
+
+#------------------------------------------------------------------------------#
+# Testing for sim_thread.py
+#------------------------------------------------------------------------------#
+
+# Snapshots copy what is drawn and share maze rows until the maze changes
+threaded_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+first_view = take_snapshot(threaded_sim)
+expect((first_view.frame, first_view.maze[0] == "".join(threaded_sim.maze[0]), len(first_view.ghosts)), (0, True, 3))
+expect(take_snapshot(threaded_sim, first_view).maze is first_view.maze, True)
+threaded_sim.maze.set_cell(1, 1, ' ')
+expect(take_snapshot(threaded_sim, first_view).maze is first_view.maze, False)
+
+# A runner ticks on the caller's thread, uses the latest input and runs queued calls first
+threaded_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+threaded_history = RewindBuffer(threaded_sim)
+threaded_history.record(threaded_sim)
+sim_runner = SimulationRunner(threaded_sim, fps=60, hooks=[threaded_history.record])
+sim_runner.set_input(0)
+for _ in range(30):
+    view = sim_runner.tick()
+expect((view.frame, sim_runner.buffer.previous.frame, threaded_sim.pacman.direction_command), (30, 29, 0))
+expect((sim_runner.inputs, len(threaded_history)), (1, 31))  # An unchanged input is only counted once
+sim_runner.call(lambda sim: threaded_history.rewind(sim, 10 / 60))
+expect(sim_runner.tick().frame, 21)
+
+# A simulation thread keeps its fixed rate however long the renderer takes per frame
+threaded_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+sim_thread = SimulationThread(threaded_sim, fps=200)
+sim_thread.start()
+seen = sim_thread.buffer.wait_after(0, timeout=1.0)
+time.sleep(0.1)  # A very slow "frame"
+sim_thread.set_input(2)
+latest = sim_thread.buffer.wait_after(sim_thread.buffer.latest.frame, timeout=1.0)
+sim_thread.stop()
+expect((seen.frame >= 1, latest.frame >= 15, sim_thread.running, sim_thread.error), (True, True, False, None))
+expect((sim_thread.inputs, threaded_sim.pacman.direction_command, sim_thread.stats.ticks), (1, 2, threaded_sim.frame))
+
+# Errors on the simulation thread are kept for the render thread to raise
+failing_thread = SimulationThread(Simulation(parse_game_state_from_txt("maze.txt")), fps=200,
+                                  hooks=[lambda sim: 1 / 0])
+failing_thread.start()
+failing_thread.thread.join(1.0)
+expect((type(failing_thread.error), failing_thread.running), (ZeroDivisionError, False))
+
+#------------------------------------------------------------------------------#
+# Testing for junction_graph.py
+#------------------------------------------------------------------------------#
+
+# A loop without forks has no junctions; its corridor comes back round to the start
+ring_graph = JunctionGraph([list("#####"), list("#...#"), list("#.#.#"), list("#...#"), list("#####")])
+expect((ring_graph.junctions, ring_graph.corridor((1, 1), (2, 1)).length), (set(), 8))
+expect(ring_graph.corridor((1, 1), (2, 1)).waypoints, ((3, 1), (3, 3), (1, 3), (1, 1)))
+
+# Corridors end at forks and dead ends, and the graph is shared by mazes with one layout
+maze_graph = junction_graph(VersionedMaze(parse_game_state_from_txt("maze.txt").maze))
+expect((len(maze_graph.junctions), maze_graph.is_junction((4, 1)), maze_graph.is_junction((2, 1))), (48, True, False))
+expect(maze_graph.edges()[(4, 1)], [((4, 3), 2), ((8, 3), 6), ((1, 3), 5)])
+expect(maze_graph.corridor((4, 1), (3, 1)).waypoints, ((1, 1), (1, 3)))
+expect(junction_graph(VersionedMaze(parse_game_state_from_txt("maze.txt").maze)) is maze_graph, True)
+
+# Ghosts follow a corridor to its end and only then ask their strategy again
+class RightStrategy(GhostStrategy):
+    def __init__(self) -> None:
+        self.calls = 0
+    def get_next_position(self, state: GameState, ghost_id: str) -> Tuple[int, int]:
+        self.calls += 1
+        x, y = state.ghost_positions[ghost_id]
+        return (x + 1, y)
+
+rightwards = RightStrategy()
+corridor_state = parse_game_state_from_txt("maze.txt")
+corridor_state.ghost_positions = {"G1": (1, 1)}
+corridor_sim = Simulation(corridor_state, strategies={"G1": rightwards})
+for _ in range(179):
+    corridor_sim.update_ghosts(1 / 60)
+expect((rightwards.calls, corridor_sim.ghosts[0].target_tile), (1, (4, 1)))  # Three tiles on one decision
+for _ in range(20):
+    corridor_sim.update_ghosts(1 / 60)
+expect((rightwards.calls, corridor_sim.ghosts[0].target_tile, corridor_sim.routes["G1"]), (2, (8, 1), [(8, 3)]))
+
+#------------------------------------------------------------------------------#
+# Testing for render_target.py
+#------------------------------------------------------------------------------#
+
+expect(parse_size("380x450"), (380, 450))
+expect(parse_size("380X450"), (380, 450))
+for bad_size in ["380", "0x450", "wide"]:
+    try:
+        parse_size(bad_size)
+        expect(bad_size, "ValueError")
+    except ValueError:
+        expect(True, True)
+
+# Cells, pellets and walls are laid out for the render size
+render_maze = parse_game_state_from_txt("maze.txt").maze
+expect(board_unit_size(render_maze), (40, 40))
+expect(board_unit_size(render_maze, (WIDTH // 2, HEIGHT // 2)), (20, 20))
+expect((scale_to_unit(10, 40), scale_to_unit(10, 20), scale_to_unit(3, 10)), (10, 5, 1))
+
+# A half-size target is drawn off-screen and scaled up to fill the window when presented
+target = RenderTarget((WIDTH, HEIGHT), (WIDTH // 2, HEIGHT // 2))
+expect((target.size, target.offscreen, target.window.get_size()), ((WIDTH // 2, HEIGHT // 2), True, (WIDTH, HEIGHT)))
+expect(target.surface.get_bitsize(), target.window.get_bitsize())  # Already in the display's format
+target.surface.fill('black')
+draw_board(target.surface, render_maze, 0, hud_font, 3, 0, size=target.size)
+target.present()
+expect(target.window.get_at((3 * 40 + 20, 1 * 40 + 20)), target.surface.get_at((3 * 20 + 10, 1 * 20 + 10)))  # A pellet
+expect(target.window.get_at((20, 20)), target.surface.get_at((10, 10)))  # A wall
+full_target = RenderTarget((WIDTH, HEIGHT))
+expect((full_target.offscreen, full_target.surface is full_target.window), (False, True))
+
+#------------------------------------------------------------------------------#
+# Testing for shared_maze.py
+#------------------------------------------------------------------------------#
+
+small_tables = compile_tables([list("#####"), list("#..##"), list("#.#.#"), list("#####")])
+expect(small_tables["tiles"].tolist(), [[1, 1], [2, 1], [1, 2], [3, 2]])
+expect(small_tables["distance"][1].tolist(), [1, 0, 2, UNREACHABLE])
+expect(small_tables["next_hop"][1, 2], 0)
+
+# Workers attach to the published tables; paths match a fresh BFS exactly
+published = SharedMaze.publish("maze.txt")
+attached = SharedMaze.attach(published.spec)
+shared_state = attached.game_state()
+expect((shared_state.pacman_pos, shared_state.ghost_positions, shared_state.maze),
+       (txt_state.pacman_pos, txt_state.ghost_positions, txt_state.maze))
+expect(attached.move_table(), build_move_table(txt_state.maze))
+shared_tiles = [(int(x), int(y)) for x, y in attached.tiles]
+expect(all(attached.shortest_path(a, b) == ghost_module.bfs_shortest_path(txt_state.maze, a, b)
+           for a in shared_tiles[::7] for b in shared_tiles), True)
+expect((attached.shortest_path((0, 0), (1, 1)), attached.steps_between((1, 1), (4, 1))), (None, 3))
+expect(attached.distance.flags.writeable, False)
+shared_state.maze[1][1] = ' '
+expect(attached.game_state().maze[1][1], txt_state.maze[1][1])  # Each game gets its own cells
+
+# Installed tables answer memo_shortest_path for their layout without caching paths
+attached.install()
+installed_maze = VersionedMaze(attached.game_state().maze)
+installed_path = memo_shortest_path(installed_maze, (1, 1), (17, 19))
+expect(installed_path is not None and len(installed_path), 35)
+expect(installed_path, ghost_module.bfs_shortest_path(txt_state.maze, (1, 1), (17, 19)))
+expect(decision_cache.get(("path", installed_maze.layout_id, (1, 1), (17, 19)), installed_maze), MISSING)
+shard_results = host_shard(published.spec, ["x", "y"], 0.05, 200)
+expect((sorted(shard_results), shard_results["x"]["ticks"] > 0), (["x", "y"], True))
+attached.close()
+expect(installed_maze.layout_id in ghost_module.path_tables, False)
+published.close()
+
+#------------------------------------------------------------------------------#
+# Testing for run_stats.py
+#------------------------------------------------------------------------------#
+
+moments = Moments()
+for x in [2, 4, 4, 4, 5, 5, 7, 9]:
+    moments.add(x)
+expect((moments.count, moments.mean, moments.variance, moments.minimum, moments.maximum), (8, 5.0, 4.0, 2, 9))
+left_moments, right_moments = Moments(), Moments()
+for x in [2, 4, 4]:
+    left_moments.add(x)
+for x in [4, 5, 5, 7, 9]:
+    right_moments.add(x)
+left_moments.merge(right_moments)
+expect((left_moments.count, round(left_moments.mean, 9), round(left_moments.variance, 9)), (8, 5.0, 4.0))
+
+# Quantiles stay within the relative accuracy, and merged sketches equal one over both halves
+stat_random = random.Random(11)
+stat_values = [stat_random.expovariate(1 / 200) for _ in range(5000)] + [0] * 100
+whole_sketch, left_sketch, right_sketch = QuantileSketch(), QuantileSketch(), QuantileSketch()
+for i, stat_value in enumerate(stat_values):
+    whole_sketch.add(stat_value)
+    (left_sketch if i % 2 else right_sketch).add(stat_value)
+left_sketch.merge(right_sketch)
+expect((left_sketch.buckets, left_sketch.zeros, left_sketch.count), (whole_sketch.buckets, 100, 5100))
+exact_values = sorted(stat_values)
+def within_accuracy(sketch: QuantileSketch, q: float) -> bool:
+    estimate, exact = sketch.quantile(q), exact_values[round(q * 5099)]
+    return estimate is not None and abs(estimate - exact) <= 0.011 * exact
+expect(all(within_accuracy(whole_sketch, q) for q in (0.1, 0.5, 0.9, 0.99)), True)
+expect((whole_sketch.quantile(0.0), whole_sketch.quantile(1.0), QuantileSketch().quantile(0.5)),
+       (0.0, max(stat_values), None))
+small_sketch = QuantileSketch(max_buckets=100)  # Folding the lowest buckets keeps the upper quantiles
+for stat_value in stat_values:
+    small_sketch.add(stat_value)
+expect((len(small_sketch.buckets), small_sketch.count), (100, 5100))
+expect(all(within_accuracy(small_sketch, q) for q in (0.9, 0.99)), True)
+try:
+    whole_sketch.add(-1)
+    expect("no error", "ValueError")
+except ValueError:
+    expect(True, True)
+
+best_runs = TopK(2)
+for key, value in [("a", 5), ("b", 9), ("c", 7)]:
+    best_runs.add(value, key)
+other_best = TopK(2)
+other_best.add(8, "d")
+best_runs.merge(other_best)
+expect(best_runs.items(), [(9, "b"), (8, "d")])
+
+frequent: FrequentItems[str] = FrequentItems(capacity=2)
+for item in "aabac":
+    frequent.add(item)
+expect((frequent.most_common(1), len(frequent.counts)), ([("a", 3)], 2))
+other_frequent: FrequentItems[str] = FrequentItems(capacity=2)
+other_frequent.add("c", 5)
+frequent.merge(other_frequent)
+expect(frequent.most_common(), [("c", 7), ("a", 3)])
+
+# Runs aggregated per worker merge into the same answers as one aggregate
+outcome_sim = Simulation(parse_game_state_from_txt("maze.txt"))
+outcome_events = GameStatistics()
+outcome_sim.bus.subscribe(outcome_events)
+while not outcome_sim.over:
+    outcome_sim.step(None, 1 / 60)
+played = outcome_of("played", outcome_sim, outcome_events)
+expect((played.score, played.lives_lost, played.duration), (outcome_sim.pacman.score, 3, outcome_sim.frame / 60))
+expect(played.strategies, ("ChasingGhostStrategy", "PalletHoveringGhostStrategy", "RandomGhostStrategy"))
+run_outcomes = [RunOutcome(f"r{i}", stat_random.randrange(300), stat_random.uniform(5, 90), stat_random.randrange(4),
+                           stat_random.randrange(5), played.strategies if i % 3 else ("RandomGhostStrategy",))
+                for i in range(600)]
+all_runs, worker_runs = RunStats(), [RunStats() for _ in range(3)]
+for i, outcome in enumerate(run_outcomes):
+    all_runs.add(outcome)
+    worker_runs[i % 3].add(outcome)
+merged_runs = RunStats()
+for worker_stats in worker_runs:
+    merged_runs.merge(worker_stats)
+expect((merged_runs.count, merged_runs.best.items(), merged_runs.mixes.most_common()),
+       (600, all_runs.best.items(), all_runs.mixes.most_common()))
+expect([merged_runs.quantile(metric, 0.9) for metric in METRICS], [all_runs.quantile(metric, 0.9) for metric in METRICS])
+expect(round(merged_runs.moments["duration"].variance, 6), round(all_runs.moments["duration"].variance, 6))
+expect(merged_runs.strategies.most_common(1), [("RandomGhostStrategy", 600)])
+expect(merged_runs.describe().splitlines()[0].startswith("score: n=600 mean"), True)
+
+# Hosted sessions report their outcomes, and shards aggregate their finished runs
+outcome_results = {"x": dict(score=4, over=True, duration=9.5, lives_lost=3, ghosts_eaten=0, strategies=["A"]),
+                   "y": dict(score=9, over=False, duration=2.0, lives_lost=0, ghosts_eaten=0, strategies=["A"])}
+expect((shard_run_stats(outcome_results).count, shard_run_stats(outcome_results).best.items()), (1, [(4, "x")]))
+expect({"duration", "lives_lost", "ghosts_eaten", "strategies"} <= set(shard_results["x"]), True)
+
+summarize()